@@ -12,6 +12,7 @@ from __future__ import annotations
 import os
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 import yaml
 from pydantic import BaseModel
@@ -54,6 +55,18 @@ class MqttConfig(BaseModel):
     max_reconnect_interval: int = 60
 
 
+class IngestConfig(BaseModel):
+    """Откуда воркеры API получают телеметрию.
+
+    local — процесс сам подключается к MQTT (uvicorn --workers 1).
+    ipc   — MQTT держит один процесс `python -m app.ingest`, воркеры читают
+            декодированные сообщения с его Unix-сокета (uvicorn --workers N).
+    """
+    mode: Literal["local", "ipc"] = "local"
+    socket_path: str = ""          # пусто = <каталог config.yaml>/cg-ingest.sock
+    reconnect_interval: int = 1
+
+
 class MapConfig(BaseModel):
     style_url: str = "https://demotiles.maplibre.org/style.json"
     center: list[float] = [100.0, 62.0]
@@ -80,9 +93,21 @@ class KeyRegisters(BaseModel):
     oil_pressure: int = 40062
     engine_state: int = 46109
 
+    def addrs(self) -> list[int]:
+        """Все ключевые адреса (для выборки ключевых метрик)."""
+        return [
+            self.installed_power, self.current_load, self.engine_hours,
+            self.oil_temp, self.oil_pressure, self.engine_state,
+        ]
+
 
 class TelemetryConfig(BaseModel):
+    """Статус связи оборудования: после offline_timeout_sec тишины — DELAY,
+    после offline_timeout_sec * offline_multiplier — OFFLINE (1 — сразу
+    OFFLINE, без DELAY).
+    """
     offline_timeout_sec: int = 300
+    offline_multiplier: float = 2.0
     key_registers: KeyRegisters = KeyRegisters()
 
 
@@ -94,6 +119,18 @@ class HistoryConfig(BaseModel):
     """
     raw_retention_days: int = 30
     agg_1min_retention_days: int = 90
+    # Отставание материализации CA (end_offset + интервал refresh-политики), сек:
+    # более свежий хвост окна читается из более мелкого источника.
+    agg_1min_lag_sec: int = 600
+    agg_1hour_lag_sec: int = 7_200
+    # Кэш блоков истории (app.services.history_cache), МБ на процесс; 0 — выкл.
+    block_cache_mb: int = 64
+    # Блоки новее now - live_edge не кэшируются (данные ещё дописываются), сек
+    block_cache_live_edge_sec: int = 300
+    # first_data_at серии меняется только при срезе retention — перечитывать не чаще, сек
+    first_data_ttl_sec: int = 3_600
+    # Недавняя история в памяти хаба (из MQTT-потока) для live-графиков, минут; 0 — выкл.
+    memory_horizon_min: int = 15
 
 
 class CgAdminConfig(BaseModel):
@@ -123,6 +160,7 @@ class Settings(BaseModel):
     auth: AuthConfig
     database: DatabaseConfig = DatabaseConfig()
     mqtt: MqttConfig = MqttConfig()
+    ingest: IngestConfig = IngestConfig()
     backend: BackendConfig = BackendConfig()
     frontend: FrontendConfig = FrontendConfig()
     telemetry: TelemetryConfig = TelemetryConfig()
@@ -144,6 +182,10 @@ def get_config_dir() -> Path:
     return _find_config_path().parent
 
 
+def get_ingest_socket_path(cfg: IngestConfig) -> Path:
+    return Path(cfg.socket_path) if cfg.socket_path else get_config_dir() / "cg-ingest.sock"
+
+
 @lru_cache
 def get_settings() -> Settings:
     path = _find_config_path()
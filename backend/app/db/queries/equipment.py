@@ -30,39 +30,51 @@ async def fetch_equipment_by_object(
     return [dict(r) for r in rows]
 
 
+async def fetch_equipment_by_routers(
+    pool: asyncpg.Pool, router_sns: list[str] | None,
+) -> list[dict[str, Any]]:
+    """Оборудование нескольких объектов одним запросом (None — всех объектов)."""
+    where = "" if router_sns is None else "WHERE router_sn = ANY($1::text[])"
+    args = () if router_sns is None else (router_sns,)
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(f"""
+            SELECT router_sn, equip_type, panel_id, name,
+                   first_seen_at, last_seen_at
+            FROM equipment
+            {where}
+            ORDER BY router_sn, equip_type, panel_id
+        """, *args)
+    return [dict(r) for r in rows]
+
+
 async def fetch_key_metrics(
     pool: asyncpg.Pool,
-    router_sn: str,
-    equip_type: str,
-    panel_id: int,
+    router_sns: list[str],
     key_regs: KeyRegisters,
-) -> dict[int, dict[str, Any]]:
-    addrs = [
-        key_regs.installed_power,
-        key_regs.current_load,
-        key_regs.engine_hours,
-        key_regs.oil_temp,
-        key_regs.oil_pressure,
-        key_regs.engine_state,
-    ]
+) -> dict[tuple[str, str, int], dict[int, dict[str, Any]]]:
+    """Ключевые метрики всего оборудования указанных объектов одним запросом.
+
+    Возвращает {(router_sn, equip_type, panel_id): {addr: {addr, value, raw}}};
+    оборудования без единого ключевого регистра в ответе нет.
+    """
     async with pool.acquire() as conn:
         rows = await conn.fetch(
             """
-            SELECT ls.addr, ls.value, ls.raw,
-                   rc.unit_default,
-                   rc.states_json
-            FROM latest_state ls
-            LEFT JOIN register_catalog rc
-                   ON rc.equip_type = $2 AND rc.addr = ls.addr
-            WHERE ls.router_sn  = $1
-              AND ls.equip_type = $2
-              AND ls.panel_id   = $3
-              AND ls.addr = ANY($4::int[])
+            SELECT router_sn, equip_type, panel_id, addr, value, raw
+            FROM latest_state
+            WHERE router_sn = ANY($1::text[])
+              AND addr = ANY($2::int[])
             """,
-            router_sn, equip_type, panel_id, addrs,
+            router_sns, key_regs.addrs(),
         )
 
-    return {r["addr"]: dict(r) for r in rows}
+    result: dict[tuple[str, str, int], dict[int, dict[str, Any]]] = {}
+    for r in rows:
+        key = (r["router_sn"], r["equip_type"], r["panel_id"])
+        result.setdefault(key, {})[r["addr"]] = {
+            "addr": r["addr"], "value": r["value"], "raw": r["raw"],
+        }
+    return result
 
 
 async def update_equipment_name(
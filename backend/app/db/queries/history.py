@@ -9,49 +9,170 @@
 
 from __future__ import annotations
 
+import math
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import asyncpg
 
 from app.config import get_settings
 
+from app.services.history_cache import nice_bucket
+
+if TYPE_CHECKING:
+    from app.mqtt.recent import RecentHistory, Ring
+    from app.services.history_cache import FirstDataCache, HistoryBlockCache
+
 # ─────────────────────────────────────────────────────────────────────────────
-# Выбор источника данных по ширине И возрасту диапазона.
+# Планировщик источников истории.
 #
-# Ширина (объём строк):
-#   span ≤ 30 дней → history (raw hypertable, time_bucket on-the-fly)
-#   span ≤ 90 дней → history_1min  (CA, 1 минута)
-#   span >  90 дней → history_1hour (CA, 1 час)
+# Источники от мелкого к грубому: history (raw), history_1min (CA, 1 минута),
+# history_1hour (CA, 1 час). Целевой бакет = span / limit; берётся самый грубый
+# источник, чья базовая гранулярность не крупнее бакета: месяц на 2000 точек
+# (~1300 с) читается из history_1min, а не time_bucket'ом по месяцу raw.
 #
-# Возраст (retention): raw хранится 30 дней, 1min — 90 дней. Диапазон,
-# начинающийся за пределами retention источника, физически пуст в нём —
-# берём следующий по грубости источник целиком (без сшивки).
+# Покрытие источника ограничено с двух сторон:
+#   снизу — retention (raw 30 дней, 1min 90 дней, 1hour — без ограничения);
+#   сверху — отставание материализации CA (свежий хвост ещё не агрегирован).
+# Окно, выходящее за покрытие, сшивается по подотрезкам: старая часть —
+# из более грубого источника, свежий хвост — из более мелкого. Граница
+# подотрезков кратна бакету более грубого из двух, поэтому бакеты не делятся
+# между запросами и ts в ответе строго возрастают.
+#
+# Окно, целиком лежащее в недавней истории хаба (app.mqtt.recent), отдаётся
+# из памяти в том же формате — без запроса к history.
 #
 # Gap-детекция вынесена в DB_MQTT (таблица data_gaps).
 # ─────────────────────────────────────────────────────────────────────────────
 
-_30D = 30 * 86_400
-_90D = 90 * 86_400
-
 TARGET_POINTS = 2_000   # желаемое количество точек на графике
 
 # Порог сырых точек: если ширина бакета ≤ 5 сек — отдаём как есть
 _RAW_BUCKET_MAX_SECS = 5
 
+# Начало отсчёта бакетов. По умолчанию time_bucket считает от 2000-01-03, и
+# бакет не кратный суткам (2 дня и т.п.) сдвигается относительно эпохи, от
+# которой выровнены блоки HistoryBlockCache, граница сшивки источников и
+# бакеты недавней истории хаба.
+_BUCKET_ORIGIN = "1970-01-01 00:00:00+00"
+
+
+@dataclass(frozen=True)
+class _Source:
+    """Источник истории и его покрытие (epoch-секунды; None — без ограничения)."""
+
+    table: str
+    base: int               # базовая гранулярность, с; 0 = raw
+    lo: float | None        # старейшая точка (retention)
+    hi: float | None        # новейшая материализованная точка
 
-def _choose_table(span_seconds: float, start: datetime) -> tuple[str, int]:
-    """→ (таблица, базовая гранулярность источника в секундах; 0 = raw)."""
+    def bucket(self, target: int) -> int:
+        """Ширина бакета для целевой: для CA — кратная базовой гранулярности."""
+        if self.base == 0:
+            return target
+        return max(self.base, math.ceil(target / self.base) * self.base)
+
+
+@dataclass(frozen=True)
+class _Segment:
+    """Подотрезок плана: [start, end) — или [start, end] у последнего."""
+
+    source: _Source
+    start: datetime
+    end: datetime
+    bucket_secs: int
+    end_inclusive: bool
+
+
+def _sources(now: float) -> list[_Source]:
     cfg = get_settings().history
-    if start.tzinfo is None:
-        start = start.replace(tzinfo=timezone.utc)
-    age_seconds = (datetime.now(timezone.utc) - start).total_seconds()
+    return [
+        _Source("history", 0, now - cfg.raw_retention_days * 86_400, None),
+        _Source(
+            "history_1min", 60,
+            now - cfg.agg_1min_retention_days * 86_400, now - cfg.agg_1min_lag_sec,
+        ),
+        _Source("history_1hour", 3_600, None, now - cfg.agg_1hour_lag_sec),
+    ]
 
-    if span_seconds <= _30D and age_seconds <= cfg.raw_retention_days * 86_400:
-        return "history", 0
-    if span_seconds <= _90D and age_seconds <= cfg.agg_1min_retention_days * 86_400:
-        return "history_1min", 60
-    return "history_1hour", 3_600
+
+def _epoch(dt: datetime) -> float:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _cover(
+    sources: list[_Source],
+    i: int,
+    start: float,
+    end: float,
+    target: int,
+    coarser: bool = True,
+    finer: bool = True,
+) -> list[tuple[int, float, float]]:
+    """Подотрезки (индекс источника, start, end) от старых к новым для [start, end].
+
+    coarser / finer — можно ли уходить к более грубым / мелким источникам
+    (цепочка идёт только в одну сторону, иначе при странных retention/lag
+    она могла бы зациклиться).
+    """
+    if start >= end:
+        return []
+    src = sources[i]
+    if coarser and src.lo is not None and src.lo > start and i + 1 < len(sources):
+        # Старая часть за retention — из более грубого источника
+        b = sources[i + 1].bucket(target)
+        cut = min(end, math.ceil(src.lo / b) * b)
+        return (
+            _cover(sources, i + 1, start, cut, target, finer=False)
+            + _cover(sources, i, cut, end, target, coarser, finer)
+        )
+    if finer and src.hi is not None and src.hi < end and i > 0:
+        # Свежий хвост ещё не материализован — из более мелкого источника
+        b = src.bucket(target)
+        cut = max(start, math.floor(src.hi / b) * b)
+        return (
+            _cover(sources, i, start, cut, target, coarser, finer)
+            + _cover(sources, i - 1, cut, end, target, coarser=False)
+        )
+    return [(i, start, end)]
+
+
+def _plan(
+    start: datetime,
+    end: datetime,
+    limit: int,
+    now: float,
+    target: int | None = None,
+    end_inclusive: bool = True,
+) -> list[_Segment]:
+    """План чтения [start, end]: источники и бакеты по подотрезкам.
+
+    target — целевой бакет (по умолчанию span / limit); end_inclusive=False —
+    окно [start, end) (блоки кэша истории).
+    """
+    sources = _sources(now)
+    t0, t1 = _epoch(start), _epoch(end)
+    if target is None:
+        target = max(1, math.ceil((t1 - t0) / limit))
+    # Самый грубый источник, чья гранулярность не крупнее целевого бакета
+    preferred = max(i for i, src in enumerate(sources) if src.base <= target)
+
+    pieces = _cover(sources, preferred, t0, t1, target) or [(preferred, t0, t1)]
+    segments = []
+    for n, (i, a, b) in enumerate(pieces):
+        src = sources[i]
+        segments.append(_Segment(
+            source=src,
+            start=start if a == t0 else datetime.fromtimestamp(a, timezone.utc),
+            end=end if b == t1 else datetime.fromtimestamp(b, timezone.utc),
+            bucket_secs=src.bucket(target),
+            end_inclusive=end_inclusive and n == len(pieces) - 1,
+        ))
+    return segments
 
 
 async def _query_aggregated(
@@ -61,25 +182,27 @@ async def _query_aggregated(
     router_sn: str,
     equip_type: str,
     panel_id: int,
-    addr: int,
+    addrs: list[int],
     start: datetime,
     end: datetime,
-    span_seconds: float,
+    bucket_secs: int,
     limit: int,
+    end_inclusive: bool = True,
 ) -> tuple[list, int]:
-    """Читает из Continuous Aggregate (history_1min / history_1hour).
+    """Читает из Continuous Aggregate (history_1min / history_1hour) — все addrs одним запросом.
 
-    Если строк в диапазоне больше limit — даунсемплит time_bucket'ом
+    bucket_secs крупнее базовой гранулярности — даунсемплит time_bucket'ом
     (взвешенное среднее по sample_count), а не режет хвост LIMIT'ом.
-    → (rows, фактическая гранулярность в секундах)
+    → (rows c addr, по addr и ts; фактическая гранулярность в секундах)
     """
-    bucket_secs = max(base_resolution, int(span_seconds / limit) + 1)
+    end_op = "<=" if end_inclusive else "<"
 
     if bucket_secs <= base_resolution:
-        # Строк гарантированно ≤ limit — отдаём гранулярность источника
+        # Строк ≤ limit на серию — отдаём гранулярность источника
         rows = await conn.fetch(
             f"""
             SELECT
+                addr,
                 ts,
                 avg_value                        AS value,
                 min_value,
@@ -93,20 +216,22 @@ async def _query_aggregated(
             WHERE router_sn = $1
               AND equip_type = $2
               AND panel_id   = $3
-              AND addr       = $4
-              AND ts BETWEEN $5 AND $6
-            ORDER BY ts ASC
+              AND addr       = ANY($4::int[])
+              AND ts >= $5 AND ts {end_op} $6
+            ORDER BY addr, ts ASC
             LIMIT $7
             """,
-            router_sn, equip_type, panel_id, addr, start, end, limit,
+            router_sn, equip_type, panel_id, addrs, start, end, (limit + 1) * len(addrs),
         )
         return rows, base_resolution
 
-    # Диапазон шире, чем limit строк источника — укрупняем бакеты
+    # Бакет шире гранулярности источника — укрупняем
     rows = await conn.fetch(
         f"""
         SELECT
-            time_bucket(make_interval(secs => $1::int), ts)       AS ts,
+            addr,
+            time_bucket(make_interval(secs => $1::int), ts,
+                        origin => '{_BUCKET_ORIGIN}'::timestamptz) AS ts,
             sum(avg_value * sample_count)
                 / NULLIF(sum(sample_count), 0)                     AS value,
             min(min_value)                                         AS min_value,
@@ -120,13 +245,13 @@ async def _query_aggregated(
         WHERE router_sn = $2
           AND equip_type = $3
           AND panel_id   = $4
-          AND addr       = $5
-          AND ts BETWEEN $6 AND $7
-        GROUP BY 1
-        ORDER BY 1
+          AND addr       = ANY($5::int[])
+          AND ts >= $6 AND ts {end_op} $7
+        GROUP BY 1, 2
+        ORDER BY 1, 2
         """,
         bucket_secs,
-        router_sn, equip_type, panel_id, addr, start, end,
+        router_sn, equip_type, panel_id, addrs, start, end,
     )
     return rows, bucket_secs
 
@@ -136,25 +261,27 @@ async def _query_raw(
     router_sn: str,
     equip_type: str,
     panel_id: int,
-    addr: int,
+    addrs: list[int],
     start: datetime,
     end: datetime,
-    span_seconds: float,
+    bucket_secs: int,
     limit: int,
+    end_inclusive: bool = True,
 ) -> tuple[list, int]:
-    """Читает из raw hypertable history.
+    """Читает из raw hypertable history — все addrs одним запросом.
 
-    Для коротких диапазонов возвращает сырые точки (разрешение 0).
-    Для длинных — агрегирует on-the-fly через time_bucket (TimescaleDB).
-    → (rows, фактическое разрешение в секундах; 0 = raw)
+    Для коротких диапазонов возвращает сырые точки (разрешение 0; не больше
+    limit * 5 на серию). Для длинных — агрегирует on-the-fly через time_bucket.
+    → (rows c addr, по addr и ts; фактическое разрешение в секундах; 0 = raw)
     """
-    bucket_secs = max(1, int(span_seconds / limit))
+    end_op = "<=" if end_inclusive else "<"
 
     if bucket_secs <= _RAW_BUCKET_MAX_SECS:
         # Сырые точки — диапазон достаточно короткий
         rows = await conn.fetch(
-            """
+            f"""
             SELECT
+                addr,
                 ts,
                 value,
                 value                        AS min_value,
@@ -164,24 +291,30 @@ async def _query_raw(
                 1::bigint                    AS sample_count,
                 NULL::text                   AS text,
                 NULL::text                   AS reason
-            FROM history
-            WHERE router_sn = $1
-              AND equip_type = $2
-              AND panel_id   = $3
-              AND addr       = $4
-              AND ts BETWEEN $5 AND $6
-            ORDER BY ts ASC
-            LIMIT $7
+            FROM (
+                SELECT addr, ts, value,
+                       row_number() OVER (PARTITION BY addr ORDER BY ts) AS rn
+                FROM history
+                WHERE router_sn = $1
+                  AND equip_type = $2
+                  AND panel_id   = $3
+                  AND addr       = ANY($4::int[])
+                  AND ts >= $5 AND ts {end_op} $6
+            ) h
+            WHERE rn <= $7
+            ORDER BY addr, ts ASC
             """,
-            router_sn, equip_type, panel_id, addr, start, end, limit * 5,
+            router_sn, equip_type, panel_id, addrs, start, end, limit * 5,
         )
         return rows, 0
 
     # On-the-fly агрегация через TimescaleDB time_bucket
     rows = await conn.fetch(
-        """
+        f"""
         SELECT
-            time_bucket(make_interval(secs => $1::int), ts)  AS ts,
+            addr,
+            time_bucket(make_interval(secs => $1::int), ts,
+                        origin => '{_BUCKET_ORIGIN}'::timestamptz) AS ts,
             avg(value)                                        AS value,
             min(value)                                        AS min_value,
             max(value)                                        AS max_value,
@@ -194,17 +327,127 @@ async def _query_raw(
         WHERE router_sn = $2
           AND equip_type = $3
           AND panel_id   = $4
-          AND addr       = $5
-          AND ts BETWEEN $6 AND $7
-        GROUP BY 1
-        ORDER BY 1
+          AND addr       = ANY($5::int[])
+          AND ts >= $6 AND ts {end_op} $7
+        GROUP BY 1, 2
+        ORDER BY 1, 2
         """,
         bucket_secs,
-        router_sn, equip_type, panel_id, addr, start, end,
+        router_sn, equip_type, panel_id, addrs, start, end,
     )
     return rows, bucket_secs
 
 
+def _points_from_ring(
+    ring: Ring,
+    start: datetime,
+    end: datetime,
+    span_seconds: float,
+    limit: int,
+) -> tuple[list[dict], int]:
+    """То же, что _query_raw, но по буферу недавней истории хаба.
+
+    → (points, фактическое разрешение в секундах; 0 = raw)
+    """
+    ts_list, values = ring.window(start, end)
+    bucket_secs = max(1, int(span_seconds / limit))
+
+    if bucket_secs <= _RAW_BUCKET_MAX_SECS:
+        return [
+            {
+                "ts": datetime.fromtimestamp(ts, timezone.utc),
+                "value": v, "min_value": v, "max_value": v,
+                "open_value": v, "close_value": v,
+                "sample_count": 1, "text": None, "reason": None,
+            }
+            for ts, v in zip(ts_list[:limit * 5], values[:limit * 5])
+        ], 0
+
+    # Как time_bucket: бакеты кратны bucket_secs от эпохи
+    points: list[dict] = []
+    bucket_start = None
+    for ts, v in zip(ts_list, values):
+        b = math.floor(ts / bucket_secs) * bucket_secs
+        if b != bucket_start:
+            bucket_start = b
+            point = {
+                "ts": datetime.fromtimestamp(b, timezone.utc),
+                "value": 0.0, "min_value": v, "max_value": v,
+                "open_value": v, "close_value": v,
+                "sample_count": 0, "text": None, "reason": None,
+            }
+            points.append(point)
+        point["value"] += v
+        point["min_value"] = min(point["min_value"], v)
+        point["max_value"] = max(point["max_value"], v)
+        point["close_value"] = v
+        point["sample_count"] += 1
+    for point in points:
+        point["value"] /= point["sample_count"]
+    return points, bucket_secs
+
+
+async def _read_segments(
+    conn: asyncpg.Connection,
+    segments: list[_Segment],
+    router_sn: str,
+    equip_type: str,
+    panel_id: int,
+    addrs: list[int],
+    limit: int,
+) -> tuple[dict[int, list[dict]], int]:
+    """Точки плана по сериям: один запрос на подотрезок (источник) для всех addrs.
+
+    → ({addr: points по возрастанию ts}, самое грубое разрешение)
+    """
+    series: dict[int, list[dict]] = {addr: [] for addr in addrs}
+    resolution = 0
+    for seg in segments:
+        if seg.source.base == 0:
+            rows, seg_resolution = await _query_raw(
+                conn, router_sn, equip_type, panel_id, addrs,
+                seg.start, seg.end, seg.bucket_secs, limit, seg.end_inclusive,
+            )
+        else:
+            rows, seg_resolution = await _query_aggregated(
+                conn, seg.source.table, seg.source.base,
+                router_sn, equip_type, panel_id, addrs,
+                seg.start, seg.end, seg.bucket_secs, limit, seg.end_inclusive,
+            )
+        # Подотрезки идут от старых к новым — серии остаются упорядоченными.
+        # Строки остаются Record'ами (лишний addr HistoryPoint игнорирует)
+        for r in rows:
+            series[r["addr"]].append(r)
+        resolution = max(resolution, seg_resolution)
+    return series, resolution
+
+
+async def _fetch_first_data_at(
+    conn: asyncpg.Connection,
+    router_sn: str,
+    equip_type: str,
+    panel_id: int,
+    addrs: list[int],
+) -> dict[int, datetime | None]:
+    # По addr отдельные MIN(ts) — каждый берётся из индекса; LEAST в Postgres
+    # игнорирует NULL — вернёт минимум по непустым источникам
+    rows = await conn.fetch(
+        """
+        SELECT a.addr, LEAST(
+            (SELECT MIN(ts) FROM history
+              WHERE router_sn=$1 AND equip_type=$2 AND panel_id=$3 AND addr=a.addr),
+            (SELECT MIN(ts) FROM history_1min
+              WHERE router_sn=$1 AND equip_type=$2 AND panel_id=$3 AND addr=a.addr),
+            (SELECT MIN(ts) FROM history_1hour
+              WHERE router_sn=$1 AND equip_type=$2 AND panel_id=$3 AND addr=a.addr)
+        ) AS first_data_at
+        FROM unnest($4::int[]) AS a(addr)
+        """,
+        router_sn, equip_type, panel_id, addrs,
+    )
+    return {r["addr"]: r["first_data_at"] for r in rows}
+
+
 async def fetch_history(
     pool: asyncpg.Pool,
     router_sn: str,
@@ -214,53 +457,103 @@ async def fetch_history(
     start: datetime,
     end: datetime,
     limit: int = TARGET_POINTS,
+    recent: RecentHistory | None = None,
+    cache: HistoryBlockCache | None = None,
+    first_data: FirstDataCache | None = None,
 ) -> dict[str, Any]:
-    """Выбирает данные из нужного источника.
+    """История одного регистра (см. fetch_history_multi)."""
+    result = await fetch_history_multi(
+        pool, router_sn, equip_type, panel_id, [addr], start, end,
+        limit=limit, recent=recent, cache=cache, first_data=first_data,
+    )
+    return result[addr]
+
 
-    Возвращает:
+async def fetch_history_multi(
+    pool: asyncpg.Pool,
+    router_sn: str,
+    equip_type: str,
+    panel_id: int,
+    addrs: list[int],
+    start: datetime,
+    end: datetime,
+    limit: int = TARGET_POINTS,
+    recent: RecentHistory | None = None,
+    cache: HistoryBlockCache | None = None,
+    first_data: FirstDataCache | None = None,
+) -> dict[int, dict[str, Any]]:
+    """История нескольких регистров одной панели: один запрос на источник для всех.
+
+    recent — недавняя история хаба; cache — кэш блоков (app.services.history_cache)
+    для бакетированных окон: бакет округляется до «круглого», не мельче нужного;
+    first_data — общий кэш first_data_at серии (иначе — запрос на каждый вызов).
+
+    Возвращает {addr: {...}}:
       points          — [{ts, value, min_value, max_value,
                           open_value, close_value, sample_count, text, reason}]
       first_data_at   — самая старая точка по ВСЕМ источникам (граница «данных нет»);
                         не зависит от выбранной таблицы, иначе retention raw (30 дней)
                         запирает пан/зум в 30-дневном окне
-      resolution_secs — фактическое разрешение ответа (0 = сырые точки)
+      resolution_secs — фактическое разрешение ответа (0 = сырые точки);
+                        при сшивке источников — самое грубое из подотрезков
     """
+    addrs = list(dict.fromkeys(addrs))
     span = (end - start).total_seconds()
-    table, base_resolution = _choose_table(span, start)
-
-    async with pool.acquire() as conn:
-        if table == "history":
-            rows, resolution = await _query_raw(
-                conn, router_sn, equip_type, panel_id, addr, start, end, span, limit
-            )
-        else:
-            rows, resolution = await _query_aggregated(
-                conn, table, base_resolution,
-                router_sn, equip_type, panel_id, addr, start, end, span, limit,
+    equip = (router_sn, equip_type, panel_id)
+    result: dict[int, dict[str, Any]] = {}
+
+    # Окна внутри недавней истории хаба — без запроса к history
+    db_addrs: list[int] = []
+    for addr in addrs:
+        ring = recent.lookup(equip, addr, start, end) if recent is not None else None
+        if ring is None:
+            db_addrs.append(addr)
+            continue
+        points, resolution = _points_from_ring(ring, start, end, span, limit)
+        result[addr] = {"points": points, "resolution_secs": resolution}
+
+    target = max(1, math.ceil(span / limit))
+    if db_addrs and cache is not None and cache.enabled and target > _RAW_BUCKET_MAX_SECS:
+        # Бакетированное окно — из кэша выровненных блоков
+        bucket = nice_bucket(target)
+
+        async def load(
+            block_start: datetime, block_end: datetime, bucket_secs: int, load_addrs: list[int],
+        ) -> dict[int, list[dict]]:
+            segments = _plan(
+                block_start, block_end, 0, time.time(),
+                target=bucket_secs, end_inclusive=False,
             )
-
-        # LEAST в Postgres игнорирует NULL — вернёт минимум по непустым источникам
-        first_data_at = await conn.fetchval(
-            """
-            SELECT LEAST(
-                (SELECT MIN(ts) FROM history
-                  WHERE router_sn=$1 AND equip_type=$2 AND panel_id=$3 AND addr=$4),
-                (SELECT MIN(ts) FROM history_1min
-                  WHERE router_sn=$1 AND equip_type=$2 AND panel_id=$3 AND addr=$4),
-                (SELECT MIN(ts) FROM history_1hour
-                  WHERE router_sn=$1 AND equip_type=$2 AND panel_id=$3 AND addr=$4)
+            n_buckets = math.ceil((block_end - block_start).total_seconds() / bucket_secs)
+            async with pool.acquire() as conn:
+                series, _ = await _read_segments(
+                    conn, segments, router_sn, equip_type, panel_id, load_addrs, n_buckets,
+                )
+            return series
+
+        cached = await cache.read_many(equip, db_addrs, bucket, start, end, load)
+        for addr in db_addrs:
+            result[addr] = {"points": cached[addr], "resolution_secs": bucket}
+    elif db_addrs:
+        segments = _plan(start, end, limit, time.time())
+        async with pool.acquire() as conn:
+            series, resolution = await _read_segments(
+                conn, segments, router_sn, equip_type, panel_id, db_addrs, limit,
             )
-            """,
-            router_sn, equip_type, panel_id, addr,
-        )
+        for addr in db_addrs:
+            result[addr] = {"points": series[addr], "resolution_secs": resolution}
 
-    points = [dict(r) for r in rows]
+    async def load_first_data_at(load_addrs: list[int]) -> dict[int, datetime | None]:
+        async with pool.acquire() as conn:
+            return await _fetch_first_data_at(conn, router_sn, equip_type, panel_id, load_addrs)
 
-    return {
-        "points":          points,
-        "first_data_at":   first_data_at,
-        "resolution_secs": resolution,
-    }
+    if first_data is None:
+        first = await load_first_data_at(addrs)
+    else:
+        first = await first_data.get_many(equip, addrs, load_first_data_at)
+    for addr in addrs:
+        result[addr]["first_data_at"] = first.get(addr)
+    return result
 
 
 async def fetch_journal(
@@ -270,61 +563,30 @@ async def fetch_journal(
     panel_id: int,
     limit: int = 500,
 ) -> dict[str, Any]:
-    """Журнал enum-состояний из enum_history, обогащённый register_catalog.
+    """Журнал enum-состояний из enum_history (каждая строка — один период состояния).
 
-    Читает из enum_history (каждая строка — один период состояния).
-    label_ru / label — расшифровки из states_json.
-    Gracefully degrades to name_default if name_ru column is absent.
-    """
-    _sql_ru = """
-        SELECT
-            e.addr,
-            COALESCE(r.name_ru, r.name_default)         AS name,
-            r.name_default                               AS name_en,
-            e.value,
-            r.states_json->'labels'   ->> e.value::text AS label,
-            r.states_json->'labels_ru'->> e.value::text AS label_ru,
-            e.state_start,
-            e.state_end,
-            EXTRACT(EPOCH FROM (
-                COALESCE(e.state_end, now()) - e.state_start
-            ))::int                                      AS duration_seconds
-        FROM enum_history e
-        LEFT JOIN register_catalog r
-            ON r.equip_type = e.equip_type AND r.addr = e.addr
-        WHERE e.router_sn  = $1
-          AND e.equip_type = $2
-          AND e.panel_id   = $3
-        ORDER BY e.state_start DESC
-        LIMIT $4
-    """
-    _sql_fallback = """
-        SELECT
-            e.addr,
-            r.name_default                               AS name,
-            r.name_default                               AS name_en,
-            e.value,
-            r.states_json->'labels'   ->> e.value::text AS label,
-            NULL::text                                   AS label_ru,
-            e.state_start,
-            e.state_end,
-            EXTRACT(EPOCH FROM (
-                COALESCE(e.state_end, now()) - e.state_start
-            ))::int                                      AS duration_seconds
-        FROM enum_history e
-        LEFT JOIN register_catalog r
-            ON r.equip_type = e.equip_type AND r.addr = e.addr
-        WHERE e.router_sn  = $1
-          AND e.equip_type = $2
-          AND e.panel_id   = $3
-        ORDER BY e.state_start DESC
-        LIMIT $4
+    Имена и расшифровки значений присоединяет роутер из кэша register_catalog.
     """
     async with pool.acquire() as conn:
-        try:
-            rows = await conn.fetch(_sql_ru, router_sn, equip_type, panel_id, limit)
-        except asyncpg.UndefinedColumnError:
-            rows = await conn.fetch(_sql_fallback, router_sn, equip_type, panel_id, limit)
+        rows = await conn.fetch(
+            """
+            SELECT
+                e.addr,
+                e.value,
+                e.state_start,
+                e.state_end,
+                EXTRACT(EPOCH FROM (
+                    COALESCE(e.state_end, now()) - e.state_start
+                ))::int AS duration_seconds
+            FROM enum_history e
+            WHERE e.router_sn  = $1
+              AND e.equip_type = $2
+              AND e.panel_id   = $3
+            ORDER BY e.state_start DESC
+            LIMIT $4
+            """,
+            router_sn, equip_type, panel_id, limit,
+        )
     return {"events": [dict(r) for r in rows]}
 
 
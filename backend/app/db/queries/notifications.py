@@ -23,13 +23,8 @@ _SELECT = """
         CASE WHEN f.fault_end IS NOT NULL
             THEN EXTRACT(EPOCH FROM (f.fault_end - f.fault_start))::int
             ELSE NULL
-        END AS duration_seconds,
-        rc.states_json -> f.bit::text ->> 'name_ru' AS fault_name_ru,
-        rc.states_json -> f.bit::text ->> 'name'    AS fault_name_en,
-        rc.states_json -> f.bit::text ->> 'severity' AS severity
+        END AS duration_seconds
     FROM fault_history f
-    LEFT JOIN register_catalog rc
-           ON rc.equip_type = $2 AND rc.addr = f.addr
     WHERE f.router_sn  = $1
       AND f.equip_type = $2
       AND f.panel_id   = $3
@@ -54,7 +49,7 @@ async def fetch_notifications(
     panel_id: int,
     mode: Literal["latest", "all"] = "latest",
 ) -> list[dict[str, Any]]:
-    """Уведомления из fault_history, обогащённые register_catalog.
+    """Уведомления из fault_history (имена битов присоединяет роутер из кэша каталога).
 
     mode='latest' — одно (последнее) срабатывание на каждый бит.
     mode='all'    — все инциденты, последние 500 по дате.
@@ -71,13 +66,8 @@ async def fetch_notifications(
                 CASE WHEN f.fault_end IS NOT NULL
                     THEN EXTRACT(EPOCH FROM (f.fault_end - f.fault_start))::int
                     ELSE NULL
-                END AS duration_seconds,
-                rc.states_json -> f.bit::text ->> 'name_ru' AS fault_name_ru,
-                rc.states_json -> f.bit::text ->> 'name'    AS fault_name_en,
-                rc.states_json -> f.bit::text ->> 'severity' AS severity
+                END AS duration_seconds
             FROM fault_history f
-            LEFT JOIN register_catalog rc
-                   ON rc.equip_type = $2 AND rc.addr = f.addr
             WHERE f.router_sn  = $1
               AND f.equip_type = $2
               AND f.panel_id   = $3
@@ -93,13 +83,8 @@ async def fetch_notifications(
                 CASE WHEN f.fault_end IS NOT NULL
                     THEN EXTRACT(EPOCH FROM (f.fault_end - f.fault_start))::int
                     ELSE NULL
-                END AS duration_seconds,
-                rc.states_json -> f.bit::text ->> 'name_ru' AS fault_name_ru,
-                rc.states_json -> f.bit::text ->> 'name'    AS fault_name_en,
-                rc.states_json -> f.bit::text ->> 'severity' AS severity
+                END AS duration_seconds
             FROM fault_history f
-            LEFT JOIN register_catalog rc
-                   ON rc.equip_type = $2 AND rc.addr = f.addr
             WHERE f.router_sn  = $1
               AND f.equip_type = $2
               AND f.panel_id   = $3
@@ -14,16 +14,31 @@ from typing import Any
 import asyncpg
 
 
+# Число единиц оборудования и последняя активность объекта — одним проходом
+# по equipment (GROUP BY), а не запросом на каждый объект. Статус связи объекта
+# монотонен по last_seen_at, поэтому статус по MAX(last_seen_at) совпадает
+# с агрегатом статусов отдельных единиц (хоть одна ONLINE — объект ONLINE).
+_EQUIPMENT_AGG = """
+    SELECT router_sn,
+           COUNT(*) AS equipment_count,
+           MAX(last_seen_at) AS last_activity
+    FROM equipment
+    GROUP BY router_sn
+"""
+
+
 async def fetch_all_objects(pool: asyncpg.Pool) -> list[dict[str, Any]]:
+    """Все объекты с числом оборудования и last_activity (MAX(equipment.last_seen_at))."""
     async with pool.acquire() as conn:
-        rows = await conn.fetch("""
+        rows = await conn.fetch(f"""
             SELECT
                 o.router_sn, o.name, o.notes, o.created_at, o.updated_at,
                 g.lat, g.lon,
-                (SELECT COUNT(*) FROM equipment e
-                 WHERE e.router_sn = o.router_sn) AS equipment_count
+                COALESCE(e.equipment_count, 0) AS equipment_count,
+                e.last_activity
             FROM objects o
             LEFT JOIN gps_latest_filtered g ON g.router_sn = o.router_sn
+            LEFT JOIN ({_EQUIPMENT_AGG}) e ON e.router_sn = o.router_sn
             ORDER BY o.name NULLS LAST, o.router_sn
         """)
     return [dict(r) for r in rows]
@@ -36,7 +51,9 @@ async def fetch_object_by_sn(pool: asyncpg.Pool, router_sn: str) -> dict[str, An
                 o.router_sn, o.name, o.notes, o.created_at, o.updated_at,
                 g.lat, g.lon,
                 (SELECT COUNT(*) FROM equipment e
-                 WHERE e.router_sn = o.router_sn) AS equipment_count
+                 WHERE e.router_sn = o.router_sn) AS equipment_count,
+                (SELECT MAX(e.last_seen_at) FROM equipment e
+                 WHERE e.router_sn = o.router_sn) AS last_activity
             FROM objects o
             LEFT JOIN gps_latest_filtered g ON g.router_sn = o.router_sn
             WHERE o.router_sn = $1
@@ -81,6 +98,48 @@ async def fetch_power_totals_bulk(
     return {r["router_sn"]: dict(r) for r in rows}
 
 
+async def fetch_summary_seed(
+    pool: asyncpg.Pool,
+    installed_addr: int,
+    load_addr: int,
+) -> list[dict[str, Any]]:
+    """Начальные данные для сводок хаба: по каждой единице оборудования
+    last_seen_at и ключевые мощность / нагрузка из latest_state.
+
+    FULL JOIN — те же единицы, что и в fetch_all_objects (статус) и
+    fetch_power_totals_bulk (суммы), включая строки latest_state без equipment.
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT
+                COALESCE(e.router_sn, p.router_sn)   AS router_sn,
+                COALESCE(e.equip_type, p.equip_type) AS equip_type,
+                COALESCE(e.panel_id, p.panel_id)     AS panel_id,
+                e.last_seen_at,
+                p.installed,
+                p.load
+            FROM equipment e
+            FULL JOIN (
+                SELECT
+                    router_sn, equip_type, panel_id,
+                    SUM(value) FILTER (
+                        WHERE addr = $1
+                          AND (raw IS NULL OR raw NOT IN (65535, 32767))
+                    ) AS installed,
+                    SUM(value) FILTER (
+                        WHERE addr = $2
+                          AND (raw IS NULL OR raw NOT IN (65535, 32767))
+                    ) AS load
+                FROM latest_state
+                WHERE addr IN ($1, $2)
+                GROUP BY router_sn, equip_type, panel_id
+            ) p ON p.router_sn = e.router_sn
+               AND p.equip_type = e.equip_type
+               AND p.panel_id = e.panel_id
+        """, installed_addr, load_addr)
+    return [dict(r) for r in rows]
+
+
 async def fetch_power_totals_single(
     pool: asyncpg.Pool,
     router_sn: str,
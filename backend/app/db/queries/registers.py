@@ -13,44 +13,6 @@ from typing import Any
 
 import asyncpg
 
-_SQL_WITH_RU = """
-    SELECT
-        ls.addr,
-        ls.value,
-        ls.raw,
-        rc.name_default,
-        rc.name_ru,
-        rc.unit_default,
-        rc.register_kind,
-        rc.states_json
-    FROM latest_state ls
-    LEFT JOIN register_catalog rc
-           ON rc.equip_type = $2 AND rc.addr = ls.addr
-    WHERE ls.router_sn  = $1
-      AND ls.equip_type = $2
-      AND ls.panel_id   = $3
-    ORDER BY ls.addr
-"""
-
-_SQL_FALLBACK = """
-    SELECT
-        ls.addr,
-        ls.value,
-        ls.raw,
-        rc.name_default,
-        NULL::text        AS name_ru,
-        rc.unit_default,
-        rc.register_kind,
-        rc.states_json
-    FROM latest_state ls
-    LEFT JOIN register_catalog rc
-           ON rc.equip_type = $2 AND rc.addr = ls.addr
-    WHERE ls.router_sn  = $1
-      AND ls.equip_type = $2
-      AND ls.panel_id   = $3
-    ORDER BY ls.addr
-"""
-
 
 async def fetch_registers(
     pool: asyncpg.Pool,
@@ -58,14 +20,47 @@ async def fetch_registers(
     equip_type: str,
     panel_id: int,
 ) -> list[dict[str, Any]]:
-    """Fetch latest register values joined with catalog metadata.
+    """Последние значения регистров из latest_state (addr, value, raw).
+
+    Метаданные каталога присоединяются в Python (app.services.catalog).
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT addr, value, raw
+            FROM latest_state
+            WHERE router_sn  = $1
+              AND equip_type = $2
+              AND panel_id   = $3
+            ORDER BY addr
+        """, router_sn, equip_type, panel_id)
+    return [dict(r) for r in rows]
+
+
+_SQL_CATALOG_WITH_RU = """
+    SELECT equip_type, addr, name_default, name_ru, unit_default, register_kind, states_json
+    FROM register_catalog
+"""
+
+_SQL_CATALOG_FALLBACK = """
+    SELECT equip_type, addr, name_default, NULL::text AS name_ru,
+           unit_default, register_kind, states_json
+    FROM register_catalog
+"""
+
+
+async def fetch_catalog(pool: asyncpg.Pool) -> dict[str, dict[int, dict[str, Any]]]:
+    """Весь register_catalog: equip_type → addr → метаданные.
 
     Gracefully degrades to NULL name_ru if the column is not yet present.
     """
     async with pool.acquire() as conn:
         try:
-            rows = await conn.fetch(_SQL_WITH_RU, router_sn, equip_type, panel_id)
+            rows = await conn.fetch(_SQL_CATALOG_WITH_RU)
         except asyncpg.UndefinedColumnError:
             # name_ru column not yet in register_catalog — fall back
-            rows = await conn.fetch(_SQL_FALLBACK, router_sn, equip_type, panel_id)
-    return [dict(r) for r in rows]
+            rows = await conn.fetch(_SQL_CATALOG_FALLBACK)
+    catalog: dict[str, dict[int, dict[str, Any]]] = {}
+    for r in rows:
+        row = dict(r)
+        catalog.setdefault(row.pop("equip_type"), {})[row["addr"]] = row
+    return catalog
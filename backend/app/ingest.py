@@ -0,0 +1,41 @@
+# Copyright (c) 2026 ООО «НГ-ЭНЕРГОСЕРВИС». Все права защищены.
+# Программный комплекс «Честная Генерация»
+# Модуль веб-дашборда и визуализации телеметрии
+# Автор: Саввиди Александр Анатольевич | ИНН 4725009270
+#
+# Данное программное обеспечение является конфиденциальным.
+# Несанкционированное копирование, распространение или использование
+# без письменного разрешения правообладателя запрещено.
+
+"""Отдельный процесс MQTT-ingest для многопроцессного режима (ingest.mode: ipc).
+
+Запуск: python -m app.ingest
+Держит единственное MQTT-подключение (client_id из конфига) и раздаёт
+декодированную телеметрию воркерам uvicorn через Unix-сокет.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from app.config import get_ingest_socket_path, get_settings
+from app.mqtt.ipc import IngestBroadcaster, serve_ingest
+from app.mqtt.listener import mqtt_listener
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)-8s %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    settings = get_settings()
+    broadcaster = IngestBroadcaster(replay_max_age=settings.telemetry.offline_timeout_sec)
+    server = await serve_ingest(get_ingest_socket_path(settings.ingest), broadcaster)
+    async with server:
+        await mqtt_listener(settings.mqtt, broadcaster)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -16,16 +16,19 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.config import APP_VERSION, get_settings
+from app.config import APP_VERSION, get_ingest_socket_path, get_settings
 from app.db.pool import close_pool, create_pool
 from app.mqtt.hub import TelemetryHub
+from app.mqtt.ipc import ipc_subscriber
 from app.mqtt.listener import mqtt_listener
 from app.routers import admin_proxy, analytics_proxy, chart_settings, dgu_card_settings, equipment, events, history, notifications, objects, registers, share, system, tiles, ws
+from app.services.catalog import register_catalog
+from app.services.history_cache import first_data_cache, history_cache
 from app.services.nginx_check import log_nginx_status
 from app.services.updater import get_current_version
 from app.services.offline_tracker import offline_tracker
 from app.services.tile_cache import prefetch_for_objects
-from app.db.queries.objects import fetch_all_objects
+from app.db.queries.objects import fetch_all_objects, fetch_summary_seed
 
 logging.basicConfig(
     level=logging.INFO,
@@ -48,16 +51,56 @@ async def lifespan(app: FastAPI):
         logger.error("Database connection failed: %s", exc)
         app.state.db_pool = None
 
+    # Каталог регистров — в память сразу (иначе загрузится первым запросом)
+    if app.state.db_pool is not None:
+        try:
+            await register_catalog.refresh(app.state.db_pool)
+        except Exception as exc:
+            logger.warning("register_catalog preload failed: %s", exc)
+
     # 2. Create telemetry hub
-    hub = TelemetryHub()
+    hub = TelemetryHub(
+        history_horizon_sec=settings.history.memory_horizon_min * 60,
+        offline_timeout_sec=settings.telemetry.offline_timeout_sec,
+        offline_multiplier=settings.telemetry.offline_multiplier,
+        power_addrs=(
+            settings.telemetry.key_registers.installed_power,
+            settings.telemetry.key_registers.current_load,
+        ),
+    )
     app.state.hub = hub
 
-    # 3. Start MQTT listener (raw telemetry only)
-    mqtt_task = asyncio.create_task(mqtt_listener(settings.mqtt, hub))
+    # Сводки объектов — из БД до потока телеметрии (иначе после рестарта они
+    # покрывают только вышедшее на связь оборудование)
+    if app.state.db_pool is not None:
+        try:
+            hub.seed_summaries(await fetch_summary_seed(
+                app.state.db_pool,
+                settings.telemetry.key_registers.installed_power,
+                settings.telemetry.key_registers.current_load,
+            ))
+        except Exception as exc:
+            logger.warning("Object summary seed failed: %s", exc)
+
+    history_cache.max_bytes = settings.history.block_cache_mb * 1024 * 1024
+    history_cache.live_edge_sec = settings.history.block_cache_live_edge_sec
+    first_data_cache.ttl_sec = settings.history.first_data_ttl_sec
+
+    # 3. Start MQTT listener (raw telemetry only).
+    #    ingest.mode=ipc — MQTT держит отдельный процесс app.ingest, а каждый
+    #    воркер uvicorn читает его Unix-сокет (иначе воркеры с одним client_id
+    #    выбивают друг друга с брокера).
+    if settings.ingest.mode == "ipc":
+        mqtt_task = asyncio.create_task(ipc_subscriber(
+            get_ingest_socket_path(settings.ingest), hub,
+            settings.ingest.reconnect_interval,
+        ))
+    else:
+        mqtt_task = asyncio.create_task(mqtt_listener(settings.mqtt, hub))
 
     # 4. Start offline tracker
     offline_task = asyncio.create_task(
-        offline_tracker(hub, settings.telemetry.offline_timeout_sec)
+        offline_tracker(hub)
     )
 
     # 5. Check nginx availability
@@ -111,6 +154,7 @@ app.add_middleware(
 # Routers
 app.include_router(objects.router)
 app.include_router(equipment.router)
+app.include_router(equipment.fleet_router)
 app.include_router(registers.router)
 app.include_router(history.router)
 app.include_router(notifications.router)
@@ -7,54 +7,544 @@
 # Несанкционированное копирование, распространение или использование
 # без письменного разрешения правообладателя запрещено.
 
-"""In-memory pub/sub: MQTT messages → WebSocket fan-out."""
+"""In-memory pub/sub: MQTT messages → WebSocket fan-out.
+
+Каждое сообщение кодируется в JSON один раз при publish (Frame) —
+WS-клиенты отправляют готовый текст, без повторной сериализации.
+
+Delta-режим: хаб помнит последнее (value, raw) каждого регистра оборудования
+и для подписчиков mode=delta рассылает telemetry_delta только с изменившимися
+регистрами. Полное состояние по-прежнему приходит в snapshot при подключении.
+
+Состояние регистров хранится компактно (app.mqtt.state.EquipmentState):
+массивы вместо словаря на каждый регистр; полное сообщение собирается и
+кодируется только когда нужно (snapshot, схлопнутые дельты).
+"""
 from __future__ import annotations
 
-import asyncio
+import heapq
+import itertools
+import json
 import logging
-from collections import defaultdict
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from datetime import datetime, timezone
 
+from app.mqtt.mailbox import EquipKey, Mailbox, Subscription
+from app.mqtt.packed import pack_record
+from app.mqtt.recent import RecentHistory
+from app.mqtt.state import EquipmentState, RegisterLayout
+from app.mqtt.summary import SUMMARY_TYPE, ObjectSummary, SeededEquipment
+from app.services.catalog import register_catalog
+from app.services.enrichment import enrich_telemetry
+from app.services.metrics import ws_stats
+from app.services.telemetry import derive_connection_status
+
 logger = logging.getLogger(__name__)
 
 
+def encode_json(message: dict) -> str:
+    """JSON в том же виде, что и WebSocket.send_json (компактный, UTF-8)."""
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+
+# Ещё не кодировали (None — уже известно, что не упаковывается)
+_UNSET = object()
+
+
+class Frame:
+    """Сообщение хаба вместе с его закодированным представлением.
+
+    message — исходный dict; у кадра полного состояния (Frame(state=...))
+              собирается из EquipmentState по требованию и не хранится,
+    text    — JSON, закодированный один раз на всех подписчиков,
+    delta   — telemetry_delta для подписчиков mode=delta (None — шлём message),
+    full    — кадр полного состояния оборудования (отправляется delta-клиенту,
+              если его дельты схлопнулись в Mailbox). Пакет со всеми регистрами
+              сам является полным состоянием, иначе — текущее состояние
+              оборудования: оно не старше этого кадра.
+
+    binary / delta_binary — упакованная запись cg.bin.v1 (см. app.mqtt.packed),
+    тоже кодируется один раз; None — сообщение не упаковывается (тип или
+    нечисловые значения), такой ответ тоже запоминается.
+
+    enriched_text / enriched_delta_text — то же с text / unit / faults / na
+    у регистров (WS enrich=1); обогащается и кодируется один раз на кадр,
+    при первом таком подписчике.
+
+    only(addrs) — тот же кадр только с заданными регистрами; кэшируется на кадре,
+    так что клиенты с одинаковым фильтром делят одно кодирование.
+    """
+
+    __slots__ = (
+        "_message", "_state", "delta", "complete",
+        "_text", "_delta_text", "_binary", "_delta_binary", "_views",
+        "_enriched_text", "_enriched_delta_text",
+    )
+
+    def __init__(
+        self,
+        message: dict | None = None,
+        delta: dict | None = None,
+        *,
+        state: EquipmentState | None = None,
+    ) -> None:
+        self._message = message
+        self._state = state
+        self.delta = delta
+        # Кадр сам несёт полное состояние оборудования
+        self.complete = message is None
+        self._text: str | None = None
+        self._delta_text: str | None = None
+        self._binary: bytes | None | object = _UNSET
+        self._delta_binary: bytes | None | object = _UNSET
+        self._views: dict[frozenset[int], Frame] | None = None
+        self._enriched_text: str | None = None
+        self._enriched_delta_text: str | None = None
+
+    @property
+    def message(self) -> dict:
+        if self._message is not None:
+            return self._message
+        return self._state.message()
+
+    @property
+    def full(self) -> Frame | None:
+        if self.complete:
+            return self
+        if self._state is not None:
+            return state_frame(self._state)
+        return None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = encode_json(self.message)
+        return self._text
+
+    @property
+    def delta_text(self) -> str:
+        if self.delta is None:
+            return self.text
+        if self._delta_text is None:
+            self._delta_text = encode_json(self.delta)
+        return self._delta_text
+
+    @property
+    def binary(self) -> bytes | None:
+        if self._binary is _UNSET:
+            self._binary = pack_record(self.message)
+        return self._binary
+
+    @property
+    def delta_binary(self) -> bytes | None:
+        if self.delta is None:
+            return self.binary
+        if self._delta_binary is _UNSET:
+            self._delta_binary = pack_record(self.delta)
+        return self._delta_binary
+
+    @property
+    def enriched_text(self) -> str:
+        if self._enriched_text is None:
+            self._enriched_text = _encode_enriched(self.message)
+        return self._enriched_text
+
+    @property
+    def enriched_delta_text(self) -> str:
+        if self.delta is None:
+            return self.enriched_text
+        if self._enriched_delta_text is None:
+            self._enriched_delta_text = _encode_enriched(self.delta)
+        return self._enriched_delta_text
+
+    def only(self, addrs: frozenset[int]) -> Frame:
+        message = self.message
+        if "registers" not in message:
+            return self
+        if self._views is None:
+            self._views = {}
+        view = self._views.get(addrs)
+        if view is None:
+            view = Frame(
+                _only_registers(message, addrs),
+                None if self.delta is None else _only_registers(self.delta, addrs),
+            )
+            if len(self._views) < _MAX_VIEWS:
+                self._views[addrs] = view
+        return view
+
+
+def state_frame(state: EquipmentState) -> Frame:
+    """Кадр полного состояния оборудования — кодируется один раз до следующего обновления."""
+    if state.frame is None:
+        state.frame = Frame(state=state)
+    return state.frame
+
+
+def _cached_frames(state: EquipmentState) -> list[Frame]:
+    """Что отдаёт snapshot: полное состояние и за ним status_change, если он новее.
+
+    Полное состояние идёт всегда — delta-клиенту дальше приходят только
+    изменившиеся регистры, без него остальные он бы так и не получил.
+    """
+    frames = [state_frame(state)] if state.count else []
+    if state.status is not None:
+        frames.append(state.status)
+    return frames
+
+
+# Сколько разных фильтров регистров кэшировать на одном кадре
+_MAX_VIEWS = 8
+
+
+def _only_registers(message: dict, addrs: frozenset[int]) -> dict:
+    registers = [r for r in message.get("registers") or () if r.get("addr") in addrs]
+    return {**message, "registers": registers}
+
+
+def _encode_enriched(message: dict) -> str:
+    if "registers" not in message:
+        return encode_json(message)
+    decoders = register_catalog.compiled(message.get("equip_type", ""))
+    return encode_json(enrich_telemetry(message, decoders))
+
+
+def encode_snapshot(frames: list[Frame], enriched: bool = False) -> str:
+    """Конверт snapshot из уже закодированных сообщений — без повторного json.dumps."""
+    texts = (f.enriched_text if enriched else f.text for f in frames)
+    return '{"type":"snapshot","items":[' + ",".join(texts) + "]}"
+
+
+def encode_batch(texts: list[str]) -> str:
+    """Конверт batch (в стиле snapshot) из уже закодированных кадров."""
+    return '{"type":"batch","items":[' + ",".join(texts) + "]}"
+
+
+@dataclass
+class HubStats:
+    """Счётчики стоимости кодирования и рассылки (накопительные)."""
+
+    published: int = 0
+    deliveries: int = 0
+    encode_ns: int = 0
+    fanout_ns: int = 0
+    encoded_chars: int = 0
+    delta_chars: int = 0
+
+    def as_dict(self) -> dict:
+        n = self.published or 1
+        return {
+            "published": self.published,
+            "deliveries": self.deliveries,
+            "encoded_chars": self.encoded_chars,
+            "delta_chars": self.delta_chars,
+            "avg_encode_us": round(self.encode_ns / n / 1000, 2),
+            "avg_fanout_us": round(self.fanout_ns / n / 1000, 2),
+        }
+
+
 class TelemetryHub:
-    def __init__(self) -> None:
-        # router_sn → set of asyncio.Queue (per WS client)
-        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+    """Хаб телеметрии с индексом по объектам.
+
+    Все структуры вложены как router_sn → (equip_type, panel_id) → …,
+    поэтому snapshot объекта, маршрутизация publish и очистка стоят
+    O(оборудования этого объекта), а не O(всего парка).
+    """
+
+    def __init__(
+        self,
+        history_horizon_sec: int = 0,
+        offline_timeout_sec: int = 300,
+        offline_multiplier: float = 2.0,
+        power_addrs: tuple[int, int] | None = None,
+    ) -> None:
+        # router_sn → set of Mailbox (per WS client); пустые множества удаляются
+        self._subscribers: dict[str, set[Mailbox]] = {}
         # Global subscribers (start page — receive everything)
-        self._global: set[asyncio.Queue] = set()
-        # (router_sn, equip_type, panel_id) → last message timestamp
-        self.last_seen: dict[tuple[str, str, int], datetime] = {}
-        # In-memory cache: (router_sn, equip_type, panel_id) → last full message
-        self.cache: dict[tuple[str, str, int], dict] = {}
-
-    def subscribe(self, router_sn: str | None = None) -> asyncio.Queue:
-        queue: asyncio.Queue = asyncio.Queue(maxsize=256)
-        if router_sn is None:
-            self._global.add(queue)
-        else:
-            self._subscribers[router_sn].add(queue)
-        return queue
+        self._global: set[Mailbox] = set()
+        # Все подписчики — для метрик
+        self._mailboxes: set[Mailbox] = set()
+        # Сколько подписчиков в delta-режиме — дельту кодируем, только если они есть
+        self._delta_subscribers = 0
+        # router_sn → (equip_type, panel_id) → последнее состояние регистров
+        # (полное состояние для snapshot и база для дельт)
+        self.state: dict[str, dict[EquipKey, EquipmentState]] = {}
+        # equip_type → раскладка addr → индекс, общая для всех панелей типа
+        self._layouts: dict[str, RegisterLayout] = {}
+        self.stats = HubStats()
+        # Недавняя история регистров для live-графиков (см. app.mqtt.recent)
+        self.recent = RecentHistory(history_horizon_sec)
+        # Куча дедлайнов связи (monotonic, seq, состояние). publish только
+        # обновляет state.last_seen; устаревшая запись при извлечении
+        # переставляется на новый дедлайн (см. expire). Тишина offline_timeout —
+        # DELAY, offline_timeout * offline_multiplier — OFFLINE
+        self.offline_timeout = offline_timeout_sec
+        self.offline_multiplier = offline_multiplier
+        self.offline_after = offline_timeout_sec * offline_multiplier
+        self._deadlines: list[tuple[float, int, EquipmentState]] = []
+        # Дедлайны засеянного из БД оборудования (см. seed_summaries):
+        # (monotonic, seq, router_sn, (equip_type, panel_id))
+        self._seed_deadlines: list[tuple[float, int, str, EquipKey]] = []
+        self._seq = itertools.count()
+        # router_sn → сводка объекта (статус связи, суммы мощности/нагрузки);
+        # power_addrs — (установленная мощность, нагрузка), None — без сумм
+        self.summaries: dict[str, ObjectSummary] = {}
+        self._power_addrs = power_addrs
 
-    def unsubscribe(self, queue: asyncio.Queue, router_sn: str | None = None) -> None:
-        if router_sn is None:
-            self._global.discard(queue)
-        else:
-            self._subscribers[router_sn].discard(queue)
+    def subscribe(
+        self,
+        routers: set[str] | None = None,
+        *,
+        allowed_sns: set[str] | None = None,
+        delta: bool = False,
+        binary: bool = False,
+        enriched: bool = False,
+        max_rate: float | None = None,
+    ) -> Mailbox:
+        """Новый подписчик; routers=None — все объекты, пустое множество — ничего
+        (подписка придёт командами, см. reroute)."""
+        mailbox = Mailbox(
+            allowed_sns=allowed_sns, sub=Subscription(routers),
+            delta=delta, binary=binary, enriched=enriched, max_rate=max_rate,
+        )
+        self._index(mailbox, routers)
+        self._mailboxes.add(mailbox)
+        if delta:
+            self._delta_subscribers += 1
+        return mailbox
+
+    def unsubscribe(self, mailbox: Mailbox) -> None:
+        self._unindex(mailbox, mailbox.sub.routers)
+        self._mailboxes.discard(mailbox)
+        ws_stats.closed_coalesced += mailbox.coalesced
+        if mailbox.delta:
+            self._delta_subscribers -= 1
+
+    def mailboxes(self) -> list[Mailbox]:
+        """Текущие подписчики (для метрик)."""
+        return list(self._mailboxes)
+
+    def reroute(self, mailbox: Mailbox, previous: set[str] | None) -> None:
+        """Перестроить индекс после изменения mailbox.sub (previous — прежние routers)."""
+        current = mailbox.sub.routers
+        if previous is None or current is None:
+            self._unindex(mailbox, previous)
+            self._index(mailbox, current)
+            return
+        self._unindex(mailbox, previous - current)
+        self._index(mailbox, current - previous)
+
+    def _index(self, mailbox: Mailbox, routers: set[str] | None) -> None:
+        if routers is None:
+            self._global.add(mailbox)
+            return
+        for router_sn in routers:
+            self._subscribers.setdefault(router_sn, set()).add(mailbox)
 
-    def get_snapshot(self, router_sn: str | None = None) -> list[dict]:
-        """Возвращает последние закэшированные сообщения.
+    def _unindex(self, mailbox: Mailbox, routers: set[str] | None) -> None:
+        if routers is None:
+            self._global.discard(mailbox)
+            return
+        for router_sn in routers:
+            bucket = self._subscribers.get(router_sn)
+            if bucket is not None:
+                bucket.discard(mailbox)
+                if not bucket:
+                    del self._subscribers[router_sn]
+
+    def device_count(self) -> int:
+        """Сколько единиц оборудования в кэше."""
+        return sum(len(equips) for equips in self.state.values())
+
+    def get_state(self, router_sn: str, equip_type: str, panel_id: int) -> EquipmentState | None:
+        """Последнее состояние регистров оборудования (для REST) или None."""
+        return self.state.get(router_sn, {}).get((equip_type, panel_id))
+
+    def memory_stats(self) -> dict:
+        """Объём компактного кэша регистров (для диагностики)."""
+        states = [st for equips in self.state.values() for st in equips.values()]
+        return {
+            "equipment": len(states),
+            "registers": sum(st.count for st in states),
+            "state_bytes": sum(st.nbytes() for st in states),
+            "layout_bytes": sum(layout.nbytes() for layout in self._layouts.values()),
+            "encoded_frames": sum(1 for st in states if st.frame is not None),
+            "layouts": {et: len(layout.addrs) for et, layout in self._layouts.items()},
+        }
+
+    def _arm(self, state: EquipmentState, deadline: float) -> None:
+        heapq.heappush(self._deadlines, (deadline, next(self._seq), state))
+        state.armed = True
+
+    def next_deadline(self) -> float | None:
+        """Ближайший дедлайн связи (time.monotonic) или None."""
+        heads = [heap[0][0] for heap in (self._deadlines, self._seed_deadlines) if heap]
+        return min(heads) if heads else None
+
+    def seed_summaries(self, rows: Iterable[dict]) -> None:
+        """Засеять сводки объектов из БД (при запуске, до потока телеметрии).
+
+        rows — fetch_summary_seed: router_sn, equip_type, panel_id, last_seen_at,
+        installed, load. Без этого сводка после рестарта покрывала бы только
+        уже приславшее телеметрию оборудование и занижала суммы объекта.
+        Оборудование, которое хаб уже видел, пропускается.
+        """
+        timeout, offline_after = self.offline_timeout, self.offline_after
+        now_wall = datetime.now(timezone.utc)
+        now = time.monotonic()
+        touched: set[str] = set()
+        for row in rows:
+            router_sn = row["router_sn"]
+            key = (row["equip_type"], row["panel_id"])
+            state = self.get_state(router_sn, *key)
+            if state is not None and state.last_seen:
+                continue
+            last_seen_at = row["last_seen_at"]
+            if last_seen_at is not None and last_seen_at.tzinfo is None:
+                last_seen_at = last_seen_at.replace(tzinfo=timezone.utc)
+            status = derive_connection_status(last_seen_at, timeout, self.offline_multiplier)
+            last_seen = (
+                now - (now_wall - last_seen_at).total_seconds()
+                if last_seen_at is not None else now - offline_after
+            )
+            summary = self._summary_of(router_sn)
+            previous = summary.seeded.get(key)
+            summary.move(previous.status if previous else None, status)
+            summary.seeded[key] = SeededEquipment(
+                status, last_seen,
+                None if row["installed"] is None else float(row["installed"]),
+                None if row["load"] is None else float(row["load"]),
+            )
+            if status != "OFFLINE":
+                deadline = last_seen + (timeout if status == "ONLINE" else offline_after)
+                heapq.heappush(self._seed_deadlines, (deadline, next(self._seq), router_sn, key))
+            touched.add(router_sn)
+
+        power_addrs = self._power_addrs
+        for router_sn in touched:
+            summary = self.summaries[router_sn]
+            if power_addrs is not None:
+                summary.recompute_power(self.state.get(router_sn, {}).values(), *power_addrs)
+            self._refresh_summary(router_sn)
+
+    def expire(self, now: float) -> list[EquipmentState]:
+        """Обработать наступившие дедлайны → оборудование, сменившее статус связи.
+
+        ONLINE → DELAY после offline_timeout тишины, DELAY → OFFLINE после
+        offline_after (как derive_connection_status). Каждое извлечение — O(log n).
+        """
+        heap, timeout, offline_after = self._deadlines, self.offline_timeout, self.offline_after
+        changed: list[EquipmentState] = []
+        while heap and heap[0][0] <= now:
+            _, _, state = heapq.heappop(heap)
+            state.armed = False
+            if self.state.get(state.router_sn, {}).get((state.equip_type, state.panel_id)) is not state:
+                continue  # объект забыт (drop_router)
+            age = now - state.last_seen
+            if age < timeout:
+                # Телеметрия приходила — переставляем на новый дедлайн
+                self._arm(state, state.last_seen + timeout)
+                continue
+            status = "DELAY" if age < offline_after else "OFFLINE"
+            if status != state.conn_status:
+                self._summary_of(state.router_sn).move(state.conn_status, status)
+                state.conn_status = status
+                changed.append(state)
+            if status == "DELAY":
+                self._arm(state, state.last_seen + offline_after)
+        touched = {state.router_sn for state in changed}
+
+        # Засеянное оборудование: статус только в сводке, status_change не шлётся
+        seed_heap = self._seed_deadlines
+        while seed_heap and seed_heap[0][0] <= now:
+            _, _, router_sn, key = heapq.heappop(seed_heap)
+            summary = self.summaries.get(router_sn)
+            seeded = summary.seeded.get(key) if summary is not None else None
+            if seeded is None:
+                continue  # вышло на связь или объект забыт
+            status = "DELAY" if now - seeded.last_seen < offline_after else "OFFLINE"
+            if status != seeded.status:
+                summary.move(seeded.status, status)
+                seeded.status = status
+                touched.add(router_sn)
+            if status == "DELAY":
+                heapq.heappush(
+                    seed_heap, (seeded.last_seen + offline_after, next(self._seq), router_sn, key),
+                )
+
+        for router_sn in touched:
+            self._refresh_summary(router_sn)
+        return changed
+
+    def _summary_of(self, router_sn: str) -> ObjectSummary:
+        summary = self.summaries.get(router_sn)
+        if summary is None:
+            summary = self.summaries[router_sn] = ObjectSummary(router_sn)
+        return summary
+
+    def _refresh_summary(self, router_sn: str) -> None:
+        """Разослать object_summary, если сводка объекта изменилась."""
+        summary = self.summaries[router_sn]
+        key = summary.key()
+        if key == summary.sent:
+            return
+        summary.sent = key
+        frame = summary.frame = Frame(summary.message())
+        mailbox_key = (router_sn, "", 0, SUMMARY_TYPE)
+        for mailbox in self._mailboxes:
+            mailbox.put_summary(mailbox_key, frame)
+
+    def summary_frames(self, routers: set[str] | None = None) -> list[Frame]:
+        """Текущие object_summary (для snapshot) по объектам (None — всем)."""
+        sns = self.summaries.keys() if routers is None else routers & self.summaries.keys()
+        return [
+            self.summaries[sn].frame for sn in sns if self.summaries[sn].frame is not None
+        ]
+
+    def iter_cache(
+        self, routers: set[str] | None = None,
+    ) -> Iterator[tuple[str, EquipKey, Frame]]:
+        """(router_sn, (equip_type, panel_id), кадр) по кэшу объектов (None — всех)."""
+        sns = self.state.keys() if routers is None else routers & self.state.keys()
+        for router_sn in sns:
+            for key, state in self.state[router_sn].items():
+                for frame in _cached_frames(state):
+                    yield router_sn, key, frame
+
+    def ingest_restarted(self) -> None:
+        """Поток телеметрии (пере)подключён — пропущенное могло лечь в БД мимо хаба."""
+        self.recent.restart()
+
+    def drop_router(self, router_sn: str) -> None:
+        """Забыть всё состояние объекта (например, после его удаления)."""
+        self.state.pop(router_sn, None)
+        self.summaries.pop(router_sn, None)
+
+    def get_snapshot(self, router_sn: str | None = None) -> list[Frame]:
+        """Возвращает последние закэшированные сообщения (уже закодированные).
 
         Если router_sn задан — только для этого объекта,
         если None — все данные (для стартовой страницы).
         """
         if router_sn is None:
-            return list(self.cache.values())
-        return [
-            msg for (sn, _, _), msg in self.cache.items()
-            if sn == router_sn
-        ]
+            states = [st for equips in self.state.values() for st in equips.values()]
+        else:
+            states = list(self.state.get(router_sn, {}).values())
+        return [frame for st in states for frame in _cached_frames(st)]
+
+    def _state_of(self, router_sn: str, equip_type: str, panel_id: int) -> EquipmentState:
+        equips = self.state.setdefault(router_sn, {})
+        state = equips.get((equip_type, panel_id))
+        if state is None:
+            layout = self._layouts.get(equip_type)
+            if layout is None:
+                layout = self._layouts[equip_type] = RegisterLayout()
+            state = equips[(equip_type, panel_id)] = EquipmentState(
+                router_sn, equip_type, panel_id, layout,
+            )
+        return state
 
     async def publish(self, router_sn: str, message: dict) -> None:
         equip_type = message.get("equip_type", "")
@@ -62,21 +552,54 @@ class TelemetryHub:
         if isinstance(panel_id, str):
             panel_id = int(panel_id) if panel_id.isdigit() else 0
 
-        key = (router_sn, equip_type, panel_id)
-        self.last_seen[key] = datetime.now(timezone.utc)
-        self.cache[key] = message
-
-        targets = list(self._subscribers.get(router_sn, set())) + list(self._global)
-        for queue in targets:
-            try:
-                queue.put_nowait(message)
-            except asyncio.QueueFull:
-                # Drop message — client too slow
-                try:
-                    queue.get_nowait()
-                except asyncio.QueueEmpty:
-                    pass
-                try:
-                    queue.put_nowait(message)
-                except asyncio.QueueFull:
-                    pass
+        state = self._state_of(router_sn, equip_type, panel_id)
+
+        # Кодируем один раз — все очереди получают один и тот же Frame
+        t0 = time.perf_counter_ns()
+        if message.get("type") == "telemetry":
+            changed = state.apply(message)
+            self.recent.record((router_sn, equip_type, panel_id), message)
+            delta = {**message, "type": "telemetry_delta", "registers": changed}
+            frame = Frame(message, delta, state=state)
+            # Пакет содержит все известные регистры — он и есть полное состояние
+            frame.complete = state.count == len(message.get("registers") or ())
+            # Только телеметрия продлевает связь (свои status_change — нет)
+            previous = state.conn_status if state.last_seen else None
+            state.last_seen = time.monotonic()
+            state.conn_status = "ONLINE"
+            if not state.armed:
+                self._arm(state, state.last_seen + self.offline_timeout)
+            summary = self._summary_of(router_sn)
+            # Первая телеметрия засеянного оборудования — оно переходит в живое
+            seeded = summary.seeded.pop((equip_type, panel_id), None) if previous is None else None
+            if seeded is not None:
+                previous = seeded.status
+            if previous != "ONLINE":
+                summary.move(previous, "ONLINE")
+            power_addrs = self._power_addrs
+            if power_addrs is not None and (
+                seeded is not None or any(reg["addr"] in power_addrs for reg in changed)
+            ):
+                summary.recompute_power(self.state[router_sn].values(), *power_addrs)
+        else:
+            frame = Frame(message)
+            state.status = frame
+        self.stats.encoded_chars += len(frame.text)
+        if self._delta_subscribers and frame.delta is not None:
+            self.stats.delta_chars += len(frame.delta_text)
+        t1 = time.perf_counter_ns()
+
+        # Новый кадр затирает неотправленный кадр того же оборудования и типа
+        mailbox_key = (router_sn, equip_type, panel_id, message.get("type"))
+        targets = list(self._subscribers.get(router_sn, ())) + list(self._global)
+        for mailbox in targets:
+            mailbox.put(mailbox_key, frame)
+
+        stats = self.stats
+        stats.published += 1
+        stats.deliveries += len(targets)
+        stats.encode_ns += t1 - t0
+        stats.fanout_ns += time.perf_counter_ns() - t1
+
+        if router_sn in self.summaries:
+            self._refresh_summary(router_sn)
@@ -0,0 +1,217 @@
+# Copyright (c) 2026 ООО «НГ-ЭНЕРГОСЕРВИС». Все права защищены.
+# Программный комплекс «Честная Генерация»
+# Модуль веб-дашборда и визуализации телеметрии
+# Автор: Саввиди Александр Анатольевич | ИНН 4725009270
+#
+# Данное программное обеспечение является конфиденциальным.
+# Несанкционированное копирование, распространение или использование
+# без письменного разрешения правообладателя запрещено.
+
+"""Межпроцессная раздача телеметрии: один MQTT-ingest → N воркеров API.
+
+Процесс `python -m app.ingest` держит единственное MQTT-подключение и
+рассылает декодированные сообщения всем подключённым воркерам по Unix-сокету
+(одна строка JSON на сообщение). Каждый воркер кормит ими свой TelemetryHub,
+так что WS fan-out масштабируется на несколько ядер.
+
+Обратно воркер шлёт только управляющие сообщения ({"type": "control", "op": ...}):
+действие администратора (удаление объекта, перечитывание каталога) выполняется
+в одном воркере, а ingest пересылает его остальным — их хабы и кэши иначе
+остались бы прежними.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from app.mqtt.hub import TelemetryHub, encode_json
+from app.services.catalog import register_catalog
+from app.services.history_cache import first_data_cache, history_cache
+from app.services.metrics import ingest_stats
+
+logger = logging.getLogger(__name__)
+
+# Воркер, не вычитывающий сокет, отключается при таком объёме неотправленного
+_MAX_WRITE_BUFFER = 8 * 1024 * 1024
+
+
+# Служебная строка: ingest-процесс переподключился к MQTT
+_RESTARTED = b'{"type":"ingest_restarted"}\n'
+
+CONTROL = "control"
+OP_DROP_ROUTER = "drop_router"
+OP_CATALOG_RELOAD = "catalog_reload"
+
+
+def apply_control(hub: TelemetryHub, message: dict) -> None:
+    """Применить управляющее сообщение к состоянию этого процесса."""
+    op = message.get("op")
+    if op == OP_DROP_ROUTER:
+        router_sn = message["router_sn"]
+        hub.drop_router(router_sn)
+        history_cache.drop_router(router_sn)
+        first_data_cache.drop_router(router_sn)
+    elif op == OP_CATALOG_RELOAD:
+        # Пул БД у воркера есть только в запросах — перечитает при следующем
+        register_catalog.invalidate()
+    else:
+        logger.warning("Unknown IPC control op: %r", op)
+
+
+class IngestControl:
+    """Сторона воркера: отправка управляющих сообщений остальным воркерам через ingest."""
+
+    def __init__(self) -> None:
+        # ingest.mode=ipc — воркеров несколько; иначе процесс один
+        self.enabled = False
+        # Сокет к ingest (None — не подключён); ставит ipc_subscriber
+        self.writer: asyncio.StreamWriter | None = None
+
+    def broadcast(self, op: str, **fields) -> bool:
+        """Разослать op остальным воркерам (сам воркер применяет его сам).
+
+        → False, если воркеров несколько, а ingest недоступен: действие
+        затронуло только этот воркер.
+        """
+        if not self.enabled:
+            return True
+        if self.writer is None or self.writer.is_closing():
+            logger.warning("IPC control %s not delivered: ingest unavailable", op)
+            return False
+        self.writer.write((encode_json({"type": CONTROL, "op": op, **fields}) + "\n").encode("utf-8"))
+        return True
+
+
+ingest_control = IngestControl()
+
+
+class IngestBroadcaster:
+    """Замена TelemetryHub на стороне ingest: тот же publish(), но в сокеты воркеров.
+
+    Последнее сообщение по каждому оборудованию запоминается и проигрывается
+    новому воркеру при подключении — его хаб сразу получает кэш для snapshot.
+    Проигрываются только сообщения моложе replay_max_age: хаб воркера считает
+    их свежими, устаревшее оборудование не должно «ожить» после рестарта.
+    """
+
+    def __init__(self, replay_max_age: float) -> None:
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._replay_max_age = replay_max_age
+        # (router_sn, equip_type, panel_id, type) → (monotonic, закодированная строка)
+        self._last: dict[tuple, tuple[float, bytes]] = {}
+
+    async def publish(self, router_sn: str, message: dict) -> None:
+        # Кодируем один раз на всех воркеров
+        line = (encode_json(message) + "\n").encode("utf-8")
+        key = (
+            router_sn, message.get("equip_type"), message.get("panel_id"),
+            message.get("type"),
+        )
+        self._last[key] = (time.monotonic(), line)
+
+        for writer in list(self._writers):
+            if writer.transport.get_write_buffer_size() > _MAX_WRITE_BUFFER:
+                logger.warning("IPC worker too slow — disconnecting")
+                self._drop(writer)
+                continue
+            writer.write(line)
+
+    def ingest_restarted(self) -> None:
+        """MQTT переподключился — сообщить воркерам (их буферы истории могли получить дыру)."""
+        for writer in list(self._writers):
+            writer.write(_RESTARTED)
+
+    def _drop(self, writer: asyncio.StreamWriter) -> None:
+        self._writers.discard(writer)
+        writer.close()
+
+    def _control(self, sender: asyncio.StreamWriter, line: bytes) -> None:
+        """Управляющее сообщение воркера — остальным воркерам."""
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError as exc:
+            logger.warning("Bad IPC control message: %s", exc)
+            return
+        if message.get("type") != CONTROL:
+            return
+        if message.get("op") == OP_DROP_ROUTER:
+            # Удалённый объект не должен вернуться в replay новому воркеру
+            router_sn = message.get("router_sn")
+            for key in [k for k in self._last if k[0] == router_sn]:
+                del self._last[key]
+        logger.info("IPC control %s from worker", message.get("op"))
+        for writer in list(self._writers):
+            if writer is not sender:
+                writer.write(line)
+
+    async def handle_worker(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+    ) -> None:
+        logger.info("IPC worker connected (%d total)", len(self._writers) + 1)
+        cutoff = time.monotonic() - self._replay_max_age
+        writer.write(b"".join(line for ts, line in self._last.values() if ts >= cutoff))
+        self._writers.add(writer)
+        try:
+            # Воркеры шлют только управляющие сообщения; EOF — отключение
+            while line := await reader.readline():
+                self._control(writer, line)
+        finally:
+            self._drop(writer)
+            logger.info("IPC worker disconnected (%d left)", len(self._writers))
+
+
+async def serve_ingest(path: Path, broadcaster: IngestBroadcaster) -> asyncio.AbstractServer:
+    """Поднять Unix-сокет ingest-процесса (старый файл сокета удаляется)."""
+    if path.exists():
+        path.unlink()
+    server = await asyncio.start_unix_server(broadcaster.handle_worker, path=str(path))
+    os.chmod(path, 0o660)
+    logger.info("IPC ingest listening on %s", path)
+    return server
+
+
+async def ipc_subscriber(path: Path, hub: TelemetryHub, reconnect_interval: int = 1) -> None:
+    """Воркер API: читать сообщения ingest-процесса и публиковать в свой хаб."""
+    ingest_control.enabled = True
+    while True:
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(path), limit=1 << 22)
+            logger.info("IPC connected to ingest %s", path)
+            hub.ingest_restarted()
+            ingest_control.writer = writer
+            try:
+                while line := await reader.readline():
+                    if line == _RESTARTED:
+                        hub.ingest_restarted()
+                        continue
+                    ingest_stats.record(len(line))
+                    try:
+                        message = json.loads(line)
+                        if message.get("type") == CONTROL:
+                            apply_control(hub, message)
+                            continue
+                        await hub.publish(message["router_sn"], message)
+                    except (json.JSONDecodeError, KeyError, TypeError) as exc:
+                        ingest_stats.parse_errors += 1
+                        logger.warning("Bad IPC message: %s", exc)
+                    except Exception as exc:
+                        # Ошибка одного сообщения не должна обрывать единственный
+                        # поток телеметрии воркера
+                        ingest_stats.parse_errors += 1
+                        logger.exception("Failed to publish IPC message: %s", exc)
+            finally:
+                ingest_control.writer = None
+                writer.close()
+            logger.warning("IPC ingest closed connection — reconnecting")
+        except asyncio.CancelledError:
+            logger.info("IPC subscriber cancelled")
+            break
+        except OSError as exc:
+            logger.error("IPC ingest unavailable (%s): %s", path, exc)
+        except Exception as exc:
+            logger.exception("Unexpected error in IPC subscriber: %s", exc)
+        await asyncio.sleep(reconnect_interval)
@@ -17,16 +17,24 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+from typing import TYPE_CHECKING, Union
 
 import aiomqtt
 
 from app.config import MqttConfig
 from app.mqtt.hub import TelemetryHub
+from app.services.metrics import ingest_stats
+
+if TYPE_CHECKING:
+    from app.mqtt.ipc import IngestBroadcaster
+
+# Хаб этого процесса или (в ingest-процессе) раздатчик по воркерам
+Publisher = Union[TelemetryHub, "IngestBroadcaster"]
 
 logger = logging.getLogger(__name__)
 
 
-async def mqtt_listener(cfg: MqttConfig, hub: TelemetryHub) -> None:
+async def mqtt_listener(cfg: MqttConfig, hub: Publisher) -> None:
     telemetry_topic = f"{cfg.topic_prefix}/+/pcc/+"
     reconnect_interval = cfg.reconnect_interval
 
@@ -45,14 +53,21 @@ async def mqtt_listener(cfg: MqttConfig, hub: TelemetryHub) -> None:
                 )
                 await client.subscribe(telemetry_topic)
                 reconnect_interval = cfg.reconnect_interval
+                hub.ingest_restarted()
 
                 async for message in client.messages:
                     topic_str = str(message.topic)
+                    ingest_stats.record(len(message.payload))
                     try:
                         payload = json.loads(message.payload)
                         await _handle_telemetry(topic_str, payload, hub)
                     except (json.JSONDecodeError, KeyError, TypeError) as exc:
+                        ingest_stats.parse_errors += 1
                         logger.warning("Bad MQTT message on %s: %s", topic_str, exc)
+                    except Exception as exc:
+                        # Один пакет не должен рвать MQTT-сессию
+                        ingest_stats.parse_errors += 1
+                        logger.exception("Failed to handle MQTT message on %s: %s", topic_str, exc)
 
         except aiomqtt.MqttError as exc:
             logger.error(
@@ -71,7 +86,7 @@ async def mqtt_listener(cfg: MqttConfig, hub: TelemetryHub) -> None:
 async def _handle_telemetry(
     topic_str: str,
     payload: dict,
-    hub: TelemetryHub,
+    hub: Publisher,
 ) -> None:
     router_sn: str = payload["router_sn"]
     bserver_id: int = payload.get("bserver_id", 0)
@@ -0,0 +1,296 @@
+# Copyright (c) 2026 ООО «НГ-ЭНЕРГОСЕРВИС». Все права защищены.
+# Программный комплекс «Честная Генерация»
+# Модуль веб-дашборда и визуализации телеметрии
+# Автор: Саввиди Александр Анатольевич | ИНН 4725009270
+#
+# Данное программное обеспечение является конфиденциальным.
+# Несанкционированное копирование, распространение или использование
+# без письменного разрешения правообладателя запрещено.
+
+"""Почтовый ящик WS-клиента: последнее значение по ключу побеждает.
+
+Вместо очереди с вытеснением самого старого сообщения каждый клиент получает
+Mailbox, где ожидающие кадры хранятся по ключу оборудования. Новая телеметрия
+затирает ещё не отправленную старую для того же ключа, поэтому медленный клиент
+(мобильный по LTE) всегда получает свежее состояние, а память ограничена
+числом единиц оборудования, а не длиной очереди.
+
+Подписка клиента (Subscription) меняется командами по тому же соединению:
+объекты, отдельное оборудование и список регистров.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+from app.mqtt.summary import SUMMARY_TYPE
+from app.services.metrics import SubscriberStats
+
+if TYPE_CHECKING:
+    from app.mqtt.hub import Frame
+
+EquipKey = tuple[str, int]                       # (equip_type, panel_id)
+MailboxKey = tuple[str, str, int, "str | None"]  # (router_sn, equip_type, panel_id, type)
+
+
+class Subscription:
+    """Что нужно клиенту сейчас (меняется командами по WebSocket).
+
+    routers   — объекты; None — все объекты (в пределах scope клиента).
+    equipment — router_sn → только это оборудование объекта; объекта нет
+                в словаре — всё его оборудование.
+    addrs     — только эти регистры в телеметрии; None — все регистры.
+    summary   — object_summary по всем объектам scope (подписчики на все объекты
+                получают их и так).
+    """
+
+    __slots__ = ("routers", "equipment", "addrs", "summary")
+
+    def __init__(self, routers: set[str] | None = None) -> None:
+        self.routers = routers
+        self.equipment: dict[str, set[EquipKey]] = {}
+        self.addrs: frozenset[int] | None = None
+        self.summary = False
+
+    def copy(self) -> Subscription:
+        sub = Subscription(None if self.routers is None else set(self.routers))
+        sub.equipment = {sn: set(keys) for sn, keys in self.equipment.items()}
+        sub.addrs = self.addrs
+        sub.summary = self.summary
+        return sub
+
+    def wants(self, router_sn: str, equip_key: EquipKey) -> bool:
+        if self.routers is not None and router_sn not in self.routers:
+            return False
+        only = self.equipment.get(router_sn)
+        return only is None or equip_key in only
+
+    def wants_summary(self) -> bool:
+        return self.summary or self.routers is None
+
+    def add_routers(self, router_sns: Iterable[str] | None) -> None:
+        """Подписаться на объекты целиком (None — на все)."""
+        if router_sns is None:
+            self.routers = None
+            self.equipment.clear()
+            return
+        if self.routers is None:
+            return
+        for sn in router_sns:
+            self.routers.add(sn)
+            self.equipment.pop(sn, None)
+
+    def remove_routers(self, router_sns: Iterable[str] | None) -> None:
+        """Отписаться от объектов (None — от всего, фильтр регистров и сводки сбрасываются).
+
+        Из подписки на все объекты отдельный объект не исключить —
+        сначала отписка от всего.
+        """
+        if router_sns is None:
+            self.routers = set()
+            self.equipment.clear()
+            self.addrs = None
+            self.summary = False
+            return
+        if self.routers is None:
+            return
+        for sn in router_sns:
+            self.routers.discard(sn)
+            self.equipment.pop(sn, None)
+
+    def add_equipment(self, refs: Iterable[tuple[str, EquipKey]]) -> None:
+        """Подписаться на отдельное оборудование (уже подписанный целиком объект не сужается)."""
+        if self.routers is None:
+            return
+        for sn, key in refs:
+            if sn in self.routers and sn not in self.equipment:
+                continue
+            self.routers.add(sn)
+            self.equipment.setdefault(sn, set()).add(key)
+
+    def remove_equipment(self, refs: Iterable[tuple[str, EquipKey]]) -> None:
+        """Отписаться от оборудования, на которое подписывались поштучно."""
+        for sn, key in refs:
+            only = self.equipment.get(sn)
+            if only is None:
+                continue
+            only.discard(key)
+            if not only:
+                del self.equipment[sn]
+                if self.routers is not None:
+                    self.routers.discard(sn)
+
+    def as_dict(self) -> dict:
+        """Текущая подписка в формате команд (для подтверждения клиенту)."""
+        return {
+            "routers": "*" if self.routers is None else sorted(
+                sn for sn in self.routers if sn not in self.equipment
+            ),
+            "equipment": [
+                {"router_sn": sn, "equip_type": et, "panel_id": pid}
+                for sn, keys in sorted(self.equipment.items())
+                for et, pid in sorted(keys)
+            ],
+            "addrs": "*" if self.addrs is None else sorted(self.addrs),
+            "summary": self.wants_summary(),
+        }
+
+
+class Mailbox:
+    """Ожидающие кадры одного подписчика.
+
+    allowed_sns — scope клиента (None — без ограничений); чужие кадры не копятся.
+    sub         — текущая подписка (Subscription); маршрутизацию по объектам делает
+                  хаб, здесь отсекается оборудование и регистры.
+    delta       — клиент в delta-режиме: если дельта затёрла неотправленную дельту,
+                  вместо неё отправляется полное состояние (иначе изменения потеряются).
+    binary      — клиент согласовал cg.bin.v1: телеметрия отдаётся упакованной
+                  записью (bytes), остальное — JSON-текстом.
+    enriched    — телеметрия с text / unit / faults / na (JSON; cg.bin.v1 их не несёт).
+    max_rate    — не больше N кадров в секунду; пока клиент ждёт, обновления
+                  продолжают схлопываться.
+    """
+
+    __slots__ = (
+        "allowed_sns", "sub", "delta", "binary", "enriched", "_min_interval", "_pending",
+        "_control", "_event", "_last_get", "coalesced", "stats",
+    )
+
+    def __init__(
+        self,
+        allowed_sns: set[str] | None = None,
+        sub: Subscription | None = None,
+        delta: bool = False,
+        binary: bool = False,
+        enriched: bool = False,
+        max_rate: float | None = None,
+    ) -> None:
+        self.allowed_sns = allowed_sns
+        self.sub = sub if sub is not None else Subscription()
+        self.delta = delta
+        self.binary = binary
+        self.enriched = enriched
+        self._min_interval = 1.0 / max_rate if max_rate else 0.0
+        # key → (frame, затёрт ли неотправленный кадр)
+        self._pending: dict[MailboxKey, tuple[Frame, bool]] = {}
+        # Готовые сообщения (snapshot после подписки, подтверждения) — уходят первыми
+        self._control: deque[str | bytes] = deque()
+        self._event = asyncio.Event()
+        self._last_get = 0.0
+        # Сколько кадров было заменено более свежими (не дошли до клиента)
+        self.coalesced = 0
+        # Отправлено / время send() — заполняет WS-отправитель
+        self.stats = SubscriberStats()
+
+    def wants(self, router_sn: str, equip_key: EquipKey) -> bool:
+        """Нужен ли клиенту кадр этого оборудования (scope + подписка)."""
+        if self.allowed_sns is not None and router_sn not in self.allowed_sns:
+            return False
+        return self.sub.wants(router_sn, equip_key)
+
+    def wants_summary(self, router_sn: str) -> bool:
+        """Нужна ли клиенту сводка объекта (scope + подписка на сводки)."""
+        if self.allowed_sns is not None and router_sn not in self.allowed_sns:
+            return False
+        return self.sub.wants_summary()
+
+    def _wanted(self, key: MailboxKey) -> bool:
+        if key[3] == SUMMARY_TYPE:
+            return self.wants_summary(key[0])
+        return self.wants(key[0], (key[1], key[2]))
+
+    def put(self, key: MailboxKey, frame: Frame) -> None:
+        if not self.wants(key[0], (key[1], key[2])):
+            return
+        self._enqueue(key, frame)
+
+    def put_summary(self, key: MailboxKey, frame: Frame) -> None:
+        if not self.wants_summary(key[0]):
+            return
+        self._enqueue(key, frame)
+
+    def _enqueue(self, key: MailboxKey, frame: Frame) -> None:
+        # Порядок ключей сохраняется: обновлённый ключ не уходит в конец очереди
+        if key in self._pending:
+            self._pending[key] = (frame, True)
+            self.coalesced += 1
+        else:
+            self._pending[key] = (frame, False)
+        self._event.set()
+
+    def put_control(self, message: str | bytes) -> None:
+        """Поставить готовое сообщение вне очереди кадров (без схлопывания и max_rate)."""
+        self._control.append(message)
+        self._event.set()
+
+    def take_control(self) -> list[str | bytes]:
+        control = list(self._control)
+        self._control.clear()
+        return control
+
+    def prune(self) -> None:
+        """Выбросить ожидающие кадры, которые больше не входят в подписку."""
+        for key in [k for k in self._pending if not self._wanted(k)]:
+            del self._pending[key]
+
+    def discard_pending(self) -> None:
+        """Забыть ожидающие кадры (их заменяет только что поставленный snapshot)."""
+        self._pending.clear()
+
+    def view(self, frame: Frame) -> Frame:
+        """Кадр в том виде, в каком его видит клиент (с фильтром регистров)."""
+        if self.sub.addrs is None:
+            return frame
+        return frame.only(self.sub.addrs)
+
+    def qsize(self) -> int:
+        return len(self._pending)
+
+    async def get(self) -> str | bytes | None:
+        """Дождаться следующего кадра и вернуть его представление для отправки.
+
+        None — кадров нет, но есть управляющие сообщения (take_control).
+        """
+        if self._min_interval and not self._control:
+            wait = self._last_get + self._min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        while not self._pending:
+            if self._control:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        key = next(iter(self._pending))
+        frame, coalesced = self._pending.pop(key)
+        self._last_get = time.monotonic()
+        return self._render(frame, coalesced)
+
+    async def get_batch(self, window: float) -> list[str | bytes]:
+        """Дождаться первого кадра, подождать window секунд и забрать всё накопленное."""
+        first = await self.get()
+        if first is None:
+            return []
+        await asyncio.sleep(window)
+        return [first, *self.drain()]
+
+    def drain(self) -> list[str | bytes]:
+        """Забрать все ожидающие кадры без ожидания."""
+        pending, self._pending = self._pending, {}
+        return [self._render(frame, coalesced) for frame, coalesced in pending.values()]
+
+    def _render(self, frame: Frame, coalesced: bool) -> str | bytes:
+        use_delta = self.delta
+        if use_delta and coalesced and frame.full is not None:
+            # Несколько дельт схлопнулись — шлём полное состояние
+            frame, use_delta = frame.full, False
+        frame = self.view(frame)
+        if self.enriched:
+            return frame.enriched_delta_text if use_delta else frame.enriched_text
+        if self.binary:
+            packed = frame.delta_binary if use_delta else frame.binary
+            if packed is not None:
+                return packed
+        return frame.delta_text if use_delta else frame.text
@@ -0,0 +1,105 @@
+# Copyright (c) 2026 ООО «НГ-ЭНЕРГОСЕРВИС». Все права защищены.
+# Программный комплекс «Честная Генерация»
+# Модуль веб-дашборда и визуализации телеметрии
+# Автор: Саввиди Александр Анатольевич | ИНН 4725009270
+#
+# Данное программное обеспечение является конфиденциальным.
+# Несанкционированное копирование, распространение или использование
+# без письменного разрешения правообладателя запрещено.
+
+"""Компактная бинарная упаковка телеметрии для WS-субпротокола cg.bin.v1.
+
+Только telemetry / telemetry_delta — остальные сообщения (snapshot-служебные,
+status_change) идут обычными JSON-кадрами. Все числа little-endian.
+
+Кадр:
+    u8   version (= 1)
+    u16  record_count
+    record × record_count
+
+Запись:
+    u8   kind: 1 = telemetry, 2 = telemetry_delta; бит 0x80 — raw как f64
+    str8 router_sn              (u8 длина + UTF-8)
+    str8 equip_type
+    u32  panel_id
+    str8 timestamp              (длина 0 — null)
+    u16  n                      (число регистров)
+    u16[n] addr
+    f64[n] value                (NaN — null)
+    i32[n] raw                  (INT32_MIN — null); f64[n] при флаге 0x80
+"""
+from __future__ import annotations
+
+import math
+import struct
+from typing import Any
+
+SUBPROTOCOL = "cg.bin.v1"
+VERSION = 1
+
+KIND_TELEMETRY = 1
+KIND_DELTA = 2
+FLAG_RAW_F64 = 0x80
+
+_RAW_NULL = -(2 ** 31)
+_I32_MAX = 2 ** 31 - 1
+
+_KINDS = {"telemetry": KIND_TELEMETRY, "telemetry_delta": KIND_DELTA}
+
+
+def _str8(value: str | None) -> bytes:
+    data = (value or "").encode("utf-8")[:255]
+    return bytes((len(data),)) + data
+
+
+def _raw_fits_i32(raws: list) -> bool:
+    return all(
+        r is None or (isinstance(r, int) and _RAW_NULL < r <= _I32_MAX)
+        for r in raws
+    )
+
+
+def _numeric(v: Any) -> bool:
+    return v is None or isinstance(v, (int, float))
+
+
+def pack_record(message: dict) -> bytes | None:
+    """Упаковать telemetry / telemetry_delta; None — сообщение не упаковывается."""
+    kind = _KINDS.get(message.get("type"))
+    if kind is None:
+        return None
+
+    regs = message.get("registers") or []
+    n = len(regs)
+    addrs = [r["addr"] for r in regs]
+    if n > 0xFFFF or any(not 0 <= a <= 0xFFFF for a in addrs):
+        # Не укладывается в u16 — такой кадр уйдёт JSON-текстом
+        return None
+    values = [r.get("value") for r in regs]
+    raws = [r.get("raw") for r in regs]
+    if not all(map(_numeric, values)) or not all(map(_numeric, raws)):
+        # Строки и прочие нечисловые значения (EquipmentState.other) — JSON-текстом
+        return None
+    values = [math.nan if v is None else float(v) for v in values]
+
+    if _raw_fits_i32(raws):
+        raw_part = struct.pack(f"<{n}i", *(_RAW_NULL if r is None else r for r in raws))
+    else:
+        kind |= FLAG_RAW_F64
+        raw_part = struct.pack(f"<{n}d", *(math.nan if r is None else float(r) for r in raws))
+
+    return b"".join((
+        bytes((kind,)),
+        _str8(message.get("router_sn")),
+        _str8(message.get("equip_type")),
+        struct.pack("<I", int(message.get("panel_id") or 0)),
+        _str8(message.get("timestamp")),
+        struct.pack(f"<H{n}H", n, *addrs),
+        struct.pack(f"<{n}d", *values),
+        raw_part,
+    ))
+
+
+def pack_frame(records: list[bytes]) -> bytes:
+    """Собрать бинарный WS-кадр из готовых записей."""
+    return struct.pack("<BH", VERSION, len(records)) + b"".join(records)
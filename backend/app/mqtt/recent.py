@@ -0,0 +1,201 @@
+# Copyright (c) 2026 ООО «НГ-ЭНЕРГОСЕРВИС». Все права защищены.
+# Программный комплекс «Честная Генерация»
+# Модуль веб-дашборда и визуализации телеметрии
+# Автор: Саввиди Александр Анатольевич | ИНН 4725009270
+#
+# Данное программное обеспечение является конфиденциальным.
+# Несанкционированное копирование, распространение или использование
+# без письменного разрешения правообладателя запрещено.
+
+"""Недавняя история регистров в памяти (кольцевые буферы из MQTT-потока).
+
+Live-график каждую минуту перезапрашивает последние минуты истории —
+самый частый запрос к raw-таблице history. Хаб держит для таких регистров
+буфер (ts, value) в array('d') за последние horizon секунд и отвечает из него,
+если окно запроса целиком внутри покрытия буфера.
+
+Буфер заводится при первом запросе истории регистра (watch) — не для всего
+парка: 2k панелей × 150 регистров в памяти не держим. Покрытие начинается
+с первой точки после заведения, поэтому первый запрос (и все, что раньше
+покрытия) идут в БД. Буферы, которые давно не запрашивали, удаляются.
+"""
+from __future__ import annotations
+
+import time
+from array import array
+from datetime import datetime, timezone
+
+# (router_sn, equip_type, panel_id)
+EquipRef = tuple[str, str, int]
+
+# Как часто чистить давно не запрашиваемые буферы, сек
+_SWEEP_INTERVAL = 60
+
+
+class Ring:
+    """Точки одного регистра: параллельные массивы ts (epoch, сек) и value.
+
+    head — индекс самой старой живой точки; при сдвиге за половину массивы
+    уплотняются (амортизированно O(1) на точку).
+    """
+
+    __slots__ = ("ts", "values", "head", "last_access")
+
+    def __init__(self) -> None:
+        self.ts = array("d")
+        self.values = array("d")
+        self.head = 0
+        self.last_access = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.ts) - self.head
+
+    def append(self, ts: float, value: float, horizon: float, max_points: int) -> None:
+        if len(self) and ts <= self.ts[-1]:
+            # Повтор или пакет не по порядку — в буфере только возрастающие ts
+            return
+        self.ts.append(ts)
+        self.values.append(value)
+        cutoff = ts - horizon
+        head = self.head
+        end = len(self.ts)
+        while head < end - 1 and (self.ts[head] < cutoff or end - head > max_points):
+            head += 1
+        self.head = head
+        if head > 64 and head * 2 > end:
+            del self.ts[:head]
+            del self.values[:head]
+            self.head = 0
+
+    def covered_from(self) -> float | None:
+        """С какого момента буфер содержит все точки потока (None — точек нет)."""
+        return self.ts[self.head] if len(self) else None
+
+    def clear(self) -> None:
+        self.ts = array("d")
+        self.values = array("d")
+        self.head = 0
+
+    def window(self, start: datetime, end: datetime) -> tuple[list[float], list[float]]:
+        """Точки с start ≤ ts ≤ end (ts — epoch, по возрастанию)."""
+        ts = self.ts
+        lo = _bisect(ts, _epoch(start), self.head)
+        hi = _bisect(ts, _epoch(end), lo, right=True)
+        return ts[lo:hi].tolist(), self.values[lo:hi].tolist()
+
+
+def _bisect(arr: array, x: float, lo: int, right: bool = False) -> int:
+    hi = len(arr)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if arr[mid] < x or (right and arr[mid] == x):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def parse_ts(value: str | None) -> float | None:
+    """ISO-время из пакета телеметрии → epoch (сек); None — не разобрать."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class RecentHistory:
+    """Кольцевые буферы недавней истории регистров, которые кто-то смотрит."""
+
+    def __init__(self, horizon_sec: int) -> None:
+        self.horizon = float(horizon_sec)
+        # Не больше двух точек в секунду на регистр — защита от всплесков
+        self.max_points = max(2 * horizon_sec, 1)
+        self._rings: dict[EquipRef, dict[int, Ring]] = {}
+        self._last_sweep = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.horizon > 0
+
+    def record(self, equip: EquipRef, message: dict) -> None:
+        """Добавить точки пакета telemetry в буферы этого оборудования (если есть)."""
+        rings = self._rings.get(equip)
+        if not rings:
+            return
+        ts = parse_ts(message.get("timestamp"))
+        if ts is None:
+            return
+        for reg in message.get("registers") or ():
+            ring = rings.get(reg["addr"])
+            value = reg.get("value")
+            if ring is not None and isinstance(value, (int, float)):
+                ring.append(ts, float(value), self.horizon, self.max_points)
+
+    def lookup(
+        self, equip: EquipRef, addr: int, start: datetime, end: datetime,
+    ) -> Ring | None:
+        """Буфер, целиком покрывающий окно [start, end], или None (тогда — в БД).
+
+        Регистр без буфера ставится на наблюдение: следующие запросы после
+        накопления точек пойдут из памяти.
+        """
+        if not self.enabled or _epoch(end) < time.time() - self.horizon:
+            # Окно целиком в прошлом — буфер ему не поможет, не наблюдаем
+            return None
+        now = time.monotonic()
+        if now - self._last_sweep > _SWEEP_INTERVAL:
+            self._sweep(now)
+
+        rings = self._rings.setdefault(equip, {})
+        ring = rings.get(addr)
+        if ring is None:
+            rings[addr] = Ring()
+            self.misses += 1
+            return None
+        ring.last_access = now
+
+        covered = ring.covered_from()
+        if covered is None or _epoch(start) < covered:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ring
+
+    def restart(self) -> None:
+        """Поток прерывался — в буферах могут быть дыры, покрытие начинается заново."""
+        for rings in self._rings.values():
+            for ring in rings.values():
+                ring.clear()
+
+    def _sweep(self, now: float) -> None:
+        self._last_sweep = now
+        stale = now - max(self.horizon, _SWEEP_INTERVAL) * 2
+        for equip in list(self._rings):
+            rings = self._rings[equip]
+            for addr in [a for a, r in rings.items() if r.last_access < stale]:
+                del rings[addr]
+            if not rings:
+                del self._rings[equip]
+
+    def stats(self) -> dict:
+        rings = [r for rs in self._rings.values() for r in rs.values()]
+        return {
+            "horizon_sec": int(self.horizon),
+            "registers": len(rings),
+            "points": sum(len(r) for r in rings),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _epoch(dt: datetime) -> float:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
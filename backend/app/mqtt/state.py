@@ -0,0 +1,250 @@
+# Copyright (c) 2026 ООО «НГ-ЭНЕРГОСЕРВИС». Все права защищены.
+# Программный комплекс «Честная Генерация»
+# Модуль веб-дашборда и визуализации телеметрии
+# Автор: Саввиди Александр Анатольевич | ИНН 4725009270
+#
+# Данное программное обеспечение является конфиденциальным.
+# Несанкционированное копирование, распространение или использование
+# без письменного разрешения правообладателя запрещено.
+
+"""Компактное состояние регистров оборудования для кэша хаба.
+
+Вместо словаря {"addr", "value", "raw"} на каждый регистр каждой панели
+(сотни тысяч мелких объектов на парке) состояние оборудования — это
+параллельные массивы array('d') / array('q'), индексированные по общей для
+equip_type раскладке addr → индекс. Словари собираются только по запросу
+(snapshot, REST) и не хранятся.
+"""
+from __future__ import annotations
+
+import math
+import sys
+from array import array
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from app.mqtt.hub import Frame
+
+_NAN = math.nan
+# raw = null; raw вне int64 или нечисловые значения хранятся в EquipmentState.other
+_RAW_NULL = -(2 ** 63)
+_RAW_MAX = 2 ** 63 - 1
+
+# present[i]: регистра нет / значение в массивах / значение в other
+_ABSENT, _PACKED, _OTHER = 0, 1, 2
+
+# addr хранится в array('i') раскладки
+_ADDR_MIN, _ADDR_MAX = -(2 ** 31), 2 ** 31 - 1
+# Значения, которые состояние умеет хранить (в массивах или в other)
+_SCALARS = (int, float, str)
+
+
+def valid_register(reg: Any) -> bool:
+    """Регистр пакета можно применить: int addr в пределах int32, скалярные value / raw."""
+    if not isinstance(reg, dict):
+        return False
+    addr = reg.get("addr")
+    if type(addr) is not int or not _ADDR_MIN <= addr <= _ADDR_MAX:
+        return False
+    value, raw = reg.get("value"), reg.get("raw")
+    return (value is None or isinstance(value, _SCALARS)) and (
+        raw is None or isinstance(raw, _SCALARS)
+    )
+
+
+class RegisterLayout:
+    """Общий для equip_type порядок регистров: addr → индекс в массивах состояния."""
+
+    __slots__ = ("addrs", "index")
+
+    def __init__(self) -> None:
+        self.addrs = array("i")
+        self.index: dict[int, int] = {}
+
+    def slot(self, addr: int) -> int:
+        i = self.index.get(addr)
+        if i is None:
+            # Сначала append: некорректный addr (не int, вне int32) бросает
+            # исключение, не оставив в index ссылку за конец addrs
+            i = len(self.addrs)
+            self.addrs.append(addr)
+            self.index[addr] = i
+        return i
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.addrs) + sys.getsizeof(self.index)
+
+
+def _pack_value(value: Any) -> float | None:
+    if value is None:
+        return _NAN
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def _pack_raw(raw: Any) -> int | None:
+    if raw is None:
+        return _RAW_NULL
+    if isinstance(raw, int) and _RAW_NULL < raw <= _RAW_MAX:
+        return raw
+    return None
+
+
+class EquipmentState:
+    """Последнее известное значение каждого регистра одной единицы оборудования.
+
+    values / raws — по индексу раскладки (NaN / _RAW_NULL — null), present —
+    какие индексы у этого оборудования есть. Значения, не укладывающиеся
+    в массивы (raw-float, строки), лежат в other.
+
+    frame  — закодированное полное состояние (строит хаб, сбрасывается при обновлении),
+    status — последний status_change, если он новее телеметрии (идёт в snapshot вместо неё).
+
+    last_seen / conn_status — монотонное время последней телеметрии и текущий
+    статус связи (ONLINE/DELAY/OFFLINE); armed — стоит ли оборудование в куче
+    дедлайнов хаба (не больше одной записи на оборудование).
+
+    db_addrs — регистры, которые были у оборудования в latest_state при первом
+    REST-чтении (None — ещё не читали; см. app.services.latest).
+    """
+
+    __slots__ = (
+        "router_sn", "equip_type", "panel_id", "layout", "timestamp", "count",
+        "present", "values", "raws", "other", "frame", "status",
+        "last_seen", "conn_status", "armed", "db_addrs",
+    )
+
+    def __init__(
+        self, router_sn: str, equip_type: str, panel_id: int, layout: RegisterLayout,
+    ) -> None:
+        self.router_sn = router_sn
+        self.equip_type = equip_type
+        self.panel_id = panel_id
+        self.layout = layout
+        self.timestamp: str | None = None
+        self.count = 0
+        self.present = bytearray()
+        self.values = array("d")
+        self.raws = array("q")
+        self.other: dict[int, tuple[Any, Any]] | None = None
+        self.frame: Frame | None = None
+        self.status: Frame | None = None
+        self.last_seen = 0.0
+        self.conn_status = "ONLINE"
+        self.armed = False
+        self.db_addrs: frozenset[int] | None = None
+
+    def _grow(self) -> None:
+        extra = len(self.layout.addrs) - len(self.present)
+        self.present.extend(bytes(extra))
+        self.values.extend([_NAN] * extra)
+        self.raws.extend([_RAW_NULL] * extra)
+
+    def apply(self, message: dict) -> list[dict]:
+        """Применить пакет telemetry → регистры, изменившиеся относительно прежних.
+
+        Некорректные регистры (см. valid_register) пропускаются до любых
+        изменений состояния и убираются из message["registers"], чтобы
+        дальше по хабу (кадры, недавняя история) шёл только проверенный пакет.
+        """
+        layout = self.layout
+        index = layout.index
+        present, values, raws = self.present, self.values, self.raws
+        changed: list[dict] = []
+
+        registers = message.get("registers") or ()
+        if not all(map(valid_register, registers)):
+            registers = [reg for reg in registers if valid_register(reg)]
+            message["registers"] = registers
+
+        for reg in registers:
+            addr = reg["addr"]
+            i = index.get(addr)
+            if i is None:
+                i = layout.slot(addr)
+            if i >= len(present):
+                self._grow()
+            value, raw = reg.get("value"), reg.get("raw")
+            v, r = _pack_value(value), _pack_raw(raw)
+
+            if v is None or r is None:
+                # Не укладывается в массивы — храним как есть
+                other = self.other if self.other is not None else {}
+                self.other = other
+                if present[i] != _OTHER or other.get(addr) != (value, raw):
+                    changed.append(reg)
+                if present[i] == _ABSENT:
+                    self.count += 1
+                present[i] = _OTHER
+                other[addr] = (value, raw)
+                continue
+
+            state = present[i]
+            if state == _ABSENT:
+                self.count += 1
+                changed.append(reg)
+            elif state == _OTHER:
+                del self.other[addr]
+                changed.append(reg)
+            else:
+                old = values[i]
+                if raws[i] != r or (old != v and not (old != old and v != v)):
+                    changed.append(reg)
+            present[i] = _PACKED
+            values[i] = v
+            raws[i] = r
+
+        self.timestamp = message.get("timestamp")
+        self.frame = None
+        self.status = None
+        return changed
+
+    def registers(self) -> list[dict]:
+        """Все известные регистры в формате сообщения telemetry (в порядке раскладки)."""
+        addrs, values, raws, other = self.layout.addrs, self.values, self.raws, self.other
+        result: list[dict] = []
+        for i, state in enumerate(self.present):
+            if state == _PACKED:
+                v, r = values[i], raws[i]
+                result.append({
+                    "addr": addrs[i],
+                    "value": None if v != v else v,
+                    "raw": None if r == _RAW_NULL else r,
+                })
+            elif state == _OTHER:
+                value, raw = other[addrs[i]]
+                result.append({"addr": addrs[i], "value": value, "raw": raw})
+        return result
+
+    def get(self, addr: int) -> dict | None:
+        """Один регистр или None, если он ни разу не приходил."""
+        i = self.layout.index.get(addr)
+        if i is None or i >= len(self.present) or self.present[i] == _ABSENT:
+            return None
+        if self.present[i] == _OTHER:
+            value, raw = self.other[addr]
+            return {"addr": addr, "value": value, "raw": raw}
+        v, r = self.values[i], self.raws[i]
+        return {"addr": addr, "value": None if v != v else v, "raw": None if r == _RAW_NULL else r}
+
+    def message(self) -> dict:
+        """Полное состояние как сообщение telemetry (собирается заново при каждом вызове)."""
+        return {
+            "type": "telemetry",
+            "router_sn": self.router_sn,
+            "equip_type": self.equip_type,
+            "panel_id": self.panel_id,
+            "timestamp": self.timestamp,
+            "registers": self.registers(),
+        }
+
+    def nbytes(self) -> int:
+        """Память самого состояния (без раскладки и закодированного кадра)."""
+        size = (
+            sys.getsizeof(self) + sys.getsizeof(self.present)
+            + sys.getsizeof(self.values) + sys.getsizeof(self.raws)
+        )
+        if self.other is not None:
+            size += sys.getsizeof(self.other)
+        return size
@@ -0,0 +1,126 @@
+# Copyright (c) 2026 ООО «НГ-ЭНЕРГОСЕРВИС». Все права защищены.
+# Программный комплекс «Честная Генерация»
+# Модуль веб-дашборда и визуализации телеметрии
+# Автор: Саввиди Александр Анатольевич | ИНН 4725009270
+#
+# Данное программное обеспечение является конфиденциальным.
+# Несанкционированное копирование, распространение или использование
+# без письменного разрешения правообладателя запрещено.
+
+"""Сводка по объекту для стартовой страницы: статус связи и суммарные мощности.
+
+Хаб ведёт её инкрементально, вместо пересчёта по БД на каждый GET /api/objects:
+статус — счётчиками оборудования по ONLINE / DELAY / OFFLINE (меняются только
+на переходах), суммы — по оборудованию объекта и только когда пакет изменил
+ключевой регистр. Изменившаяся сводка уходит кадром object_summary.
+
+При запуске сводки засеваются из БД (seed: equipment.last_seen_at и ключевые
+регистры latest_state), поэтому с первого кадра они совпадают с /api/objects.
+Засеянная единица живёт в ObjectSummary.seeded, пока хаб не получит её
+телеметрию; её DELAY / OFFLINE ведёт хаб по тем же дедлайнам.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+from app.mqtt.state import EquipmentState
+from app.services.telemetry import NA_RAW_VALUES
+
+if TYPE_CHECKING:
+    from app.mqtt.hub import Frame
+    from app.mqtt.mailbox import EquipKey
+
+SUMMARY_TYPE = "object_summary"
+
+
+def _key_value(state: EquipmentState, addr: int) -> float | None:
+    """Значение ключевого регистра для суммы (NA и нечисловые — не учитываются)."""
+    reg = state.get(addr)
+    if reg is None or reg["raw"] in NA_RAW_VALUES:
+        return None
+    value = reg["value"]
+    return value if isinstance(value, (int, float)) else None
+
+
+def _sum(values: Iterable[float | None]) -> float | None:
+    """Как SQL SUM: None, если не было ни одного значения."""
+    total = None
+    for value in values:
+        if value is not None:
+            total = value if total is None else total + value
+    return total
+
+
+class SeededEquipment:
+    """Единица оборудования из БД, которую хаб ещё не видел (last_seen — monotonic)."""
+
+    __slots__ = ("status", "last_seen", "installed", "load")
+
+    def __init__(
+        self, status: str, last_seen: float, installed: float | None, load: float | None,
+    ) -> None:
+        self.status = status
+        self.last_seen = last_seen
+        self.installed = installed
+        self.load = load
+
+
+class ObjectSummary:
+    """Агрегаты одного объекта; sent — последнее отправленное (статус, мощность, нагрузка).
+
+    seeded — засеянное из БД оборудование, ещё не приславшее телеметрию:
+    входит в счётчики статусов и в суммы наравне с живым.
+    """
+
+    __slots__ = ("router_sn", "counts", "installed", "load", "seeded", "sent", "frame")
+
+    def __init__(self, router_sn: str) -> None:
+        self.router_sn = router_sn
+        self.counts = {"ONLINE": 0, "DELAY": 0, "OFFLINE": 0}
+        self.installed: float | None = None
+        self.load: float | None = None
+        self.seeded: dict[EquipKey, SeededEquipment] = {}
+        self.sent: tuple | None = None
+        self.frame: Frame | None = None
+
+    @property
+    def status(self) -> str:
+        """Как статус в /api/objects: хоть что-то ONLINE — объект ONLINE."""
+        if self.counts["ONLINE"]:
+            return "ONLINE"
+        if self.counts["DELAY"]:
+            return "DELAY"
+        return "OFFLINE"
+
+    def move(self, old: str | None, new: str) -> None:
+        """Оборудование сменило статус связи (old=None — новое оборудование)."""
+        if old is not None:
+            self.counts[old] -= 1
+        self.counts[new] += 1
+
+    def recompute_power(
+        self, states: Iterable[EquipmentState], installed_addr: int, load_addr: int,
+    ) -> None:
+        states = list(states)
+        seeded = self.seeded.values()
+        self.installed = _sum([
+            *(_key_value(st, installed_addr) for st in states),
+            *(eq.installed for eq in seeded),
+        ])
+        self.load = _sum([
+            *(_key_value(st, load_addr) for st in states),
+            *(eq.load for eq in seeded),
+        ])
+
+    def key(self) -> tuple:
+        return (self.status, self.installed, self.load)
+
+    def message(self) -> dict:
+        return {
+            "type": SUMMARY_TYPE,
+            "router_sn": self.router_sn,
+            "status": self.status,
+            "total_installed_power_kw": self.installed,
+            "total_load_kw": self.load,
+        }
@@ -10,17 +10,21 @@
 from __future__ import annotations
 
 import asyncpg
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 
 from app.auth import AuthContext, enforce_router_scope, require_admin, require_auth
-from app.config import Settings, get_settings
+from app.config import Settings, TelemetryConfig, get_settings
 from app.db.queries.equipment import (
     fetch_equipment_by_object,
-    fetch_key_metrics,
+    fetch_equipment_by_routers,
     update_equipment_name,
 )
-from app.deps import get_pool
+from app.deps import get_hub, get_pool
+from app.mqtt.hub import TelemetryHub
 from app.schemas.equipment import EquipmentNameUpdate, EquipmentOut
+from app.services.catalog import register_catalog
+from app.services.enrichment import decoder_for
+from app.services.latest import combine_sources, latest_key_metrics
 from app.services.telemetry import (
     derive_connection_status,
     derive_engine_state,
@@ -30,13 +34,15 @@ from app.services.telemetry import (
 )
 
 router = APIRouter(prefix="/api/objects/{router_sn}/equipment", tags=["equipment"])
+# Всё оборудование парка (в пределах scope) — стартовая страница, карта
+fleet_router = APIRouter(prefix="/api/equipment", tags=["equipment"])
 
 
 def _build_equipment_out(
     eq: dict,
     metrics: dict[int, dict],
     key_regs,
-    offline_timeout: int,
+    telemetry: TelemetryConfig,
 ) -> EquipmentOut:
     def _val(addr: int) -> float | None:
         m = metrics.get(addr)
@@ -66,8 +72,10 @@ def _build_equipment_out(
     state_text = state_m.get("text") if state_m else None
     last_upd = state_m.get("updated_at") if state_m else None
 
-    state = derive_engine_state(state_text, last_upd, offline_timeout)
-    conn_status = derive_connection_status(eq.get("last_seen_at"), offline_timeout)
+    state = derive_engine_state(state_text, last_upd, telemetry.offline_timeout_sec)
+    conn_status = derive_connection_status(
+        eq.get("last_seen_at"), telemetry.offline_timeout_sec, telemetry.offline_multiplier,
+    )
 
     return EquipmentOut(
         router_sn=eq["router_sn"],
@@ -87,40 +95,62 @@ def _build_equipment_out(
     )
 
 
+async def _equipment_out_list(
+    pool: asyncpg.Pool,
+    hub: TelemetryHub,
+    settings: Settings,
+    equips: list[dict],
+    response: Response,
+) -> list[EquipmentOut]:
+    """EquipmentOut для списка оборудования; X-Data-Source — по источникам метрик."""
+    key_regs = settings.telemetry.key_registers
+    # Оборудование на связи — ключевые значения из хаба, остальное — одним
+    # запросом к latest_state
+    metrics_by_equip, sources = await latest_key_metrics(pool, hub, equips, key_regs)
+    results = []
+    for eq in equips:
+        equip_type = eq["equip_type"]
+        metrics = metrics_by_equip.get((eq["router_sn"], equip_type, eq["panel_id"]), {})
+        # text и unit — из скомпилированного каталога
+        decoders = await register_catalog.decoders(pool, equip_type)
+        for m in metrics.values():
+            decoder = decoder_for(decoders, m["addr"])
+            m["unit"] = decoder.unit
+            m["text"] = decoder.label(m.get("raw")) if decoder.enum else None
+        results.append(_build_equipment_out(eq, metrics, key_regs, settings.telemetry))
+    response.headers["X-Data-Source"] = combine_sources(sources)
+    return results
+
+
 @router.get("", response_model=list[EquipmentOut])
 async def list_equipment(
     router_sn: str,
+    response: Response,
     pool: asyncpg.Pool = Depends(get_pool),
+    hub: TelemetryHub = Depends(get_hub),
     settings: Settings = Depends(get_settings),
     ctx: AuthContext = Depends(require_auth),
 ):
     enforce_router_scope(ctx, router_sn)
     equips = await fetch_equipment_by_object(pool, router_sn)
-    results = []
-    for eq in equips:
-        equip_type = eq["equip_type"]
-        metrics = await fetch_key_metrics(
-            pool, router_sn, equip_type, eq["panel_id"],
-            settings.telemetry.key_registers,
-        )
-        # Обогащаем text и unit из JOIN с register_catalog
-        for m in metrics.values():
-            unit: str = m.get("unit_default") or ""
-            states_json: dict = m.get("states_json") or {}
-            m["unit"] = unit or None
-            raw = m.get("raw")
-            if unit == "enum" and raw is not None:
-                key = str(int(raw))
-                labels_ru: dict = states_json.get("labels_ru") or {}
-                labels: dict = states_json.get("labels") or {}
-                m["text"] = labels_ru.get(key) or labels.get(key)
-            else:
-                m["text"] = None
-        results.append(_build_equipment_out(
-            eq, metrics, settings.telemetry.key_registers,
-            settings.telemetry.offline_timeout_sec,
-        ))
-    return results
+    return await _equipment_out_list(pool, hub, settings, equips, response)
+
+
+@fleet_router.get("", response_model=list[EquipmentOut])
+async def list_fleet_equipment(
+    response: Response,
+    pool: asyncpg.Pool = Depends(get_pool),
+    hub: TelemetryHub = Depends(get_hub),
+    settings: Settings = Depends(get_settings),
+    ctx: AuthContext = Depends(require_auth),
+):
+    """Всё оборудование, видимое вызывающему (scope фильтруется в запросе)."""
+    allowed = ctx.allowed_router_sns
+    if allowed is not None and not allowed:
+        return []
+    router_sns = None if allowed is None else sorted(allowed)
+    equips = await fetch_equipment_by_routers(pool, router_sns)
+    return await _equipment_out_list(pool, hub, settings, equips, response)
 
 
 @router.patch("/{equip_type}/{panel_id}/name")
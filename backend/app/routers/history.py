@@ -9,27 +9,48 @@
 
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
+from typing import Literal
 
 import asyncpg
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
 from app.auth import AuthContext, enforce_router_scope, require_auth
 from app.db.queries.gaps import fetch_gaps
-from app.db.queries.history import fetch_history, fetch_journal, fetch_state_events
-from app.deps import get_pool
+from app.db.queries.history import (
+    fetch_history,
+    fetch_history_multi,
+    fetch_journal,
+    fetch_state_events,
+)
+from app.deps import get_hub, get_pool
+from app.mqtt.hub import TelemetryHub
+from app.services.catalog import register_catalog
+from app.services.history_cache import first_data_cache, history_cache
+from app.services.history_format import (
+    BINARY_MEDIA_TYPE,
+    encode_binary,
+    encode_columnar,
+    encode_columnar_multi,
+)
 from app.schemas.history import (
     GapZone,
     HistoryPoint,
     HistoryResponse,
+    HistorySeries,
     JournalEvent,
     JournalResponse,
+    MultiHistoryResponse,
     StateEvent,
     StateEventsResponse,
 )
 
 router = APIRouter(prefix="/api/history", tags=["history"])
 
+# Регистров в одном /multi (вкладка графиков показывает ~6)
+MAX_MULTI_ADDRS = 32
+
 
 @router.get("", response_model=HistoryResponse)
 async def get_history(
@@ -40,15 +61,24 @@ async def get_history(
     start: datetime = Query(...),
     end: datetime = Query(...),
     points: int = Query(2000, ge=100, le=20000),
+    format: Literal["json", "columnar", "binary"] = Query("json"),
     pool: asyncpg.Pool = Depends(get_pool),
+    hub: TelemetryHub = Depends(get_hub),
     ctx: AuthContext = Depends(require_auth),
 ):
     enforce_router_scope(ctx, router_sn)
-    result = await fetch_history(
-        pool, router_sn, equip_type, panel_id, addr, start, end,
-        limit=points,
+    result, gap_rows = await asyncio.gather(
+        fetch_history(
+            pool, router_sn, equip_type, panel_id, addr, start, end,
+            limit=points, recent=hub.recent, cache=history_cache, first_data=first_data_cache,
+        ),
+        fetch_gaps(pool, router_sn, equip_type, panel_id, start, end),
     )
-    gap_rows = await fetch_gaps(pool, router_sn, equip_type, panel_id, start, end)
+    # columnar / binary — колонки прямо из строк, без HistoryPoint на точку
+    if format == "columnar":
+        return Response(encode_columnar(result, gap_rows), media_type="application/json")
+    if format == "binary":
+        return Response(encode_binary({addr: result}, gap_rows), media_type=BINARY_MEDIA_TYPE)
     return HistoryResponse(
         points=[HistoryPoint(**p) for p in result["points"]],
         first_data_at=result["first_data_at"],
@@ -57,6 +87,51 @@ async def get_history(
     )
 
 
+@router.get("/multi", response_model=MultiHistoryResponse)
+async def get_history_multi(
+    router_sn: str = Query(...),
+    equip_type: str = Query(...),
+    panel_id: int = Query(...),
+    addrs: list[int] = Query(...),
+    start: datetime = Query(...),
+    end: datetime = Query(...),
+    points: int = Query(2000, ge=100, le=20000),
+    format: Literal["json", "columnar", "binary"] = Query("json"),
+    pool: asyncpg.Pool = Depends(get_pool),
+    hub: TelemetryHub = Depends(get_hub),
+    ctx: AuthContext = Depends(require_auth),
+):
+    """История нескольких регистров панели: один запрос на источник для всех addrs,
+    gap'ы — один раз на панель; история и gap'ы читаются параллельно."""
+    enforce_router_scope(ctx, router_sn)
+    if len(addrs) > MAX_MULTI_ADDRS:
+        raise HTTPException(status_code=422, detail=f"Не больше {MAX_MULTI_ADDRS} регистров")
+    result, gap_rows = await asyncio.gather(
+        fetch_history_multi(
+            pool, router_sn, equip_type, panel_id, addrs, start, end,
+            limit=points, recent=hub.recent, cache=history_cache, first_data=first_data_cache,
+        ),
+        fetch_gaps(pool, router_sn, equip_type, panel_id, start, end),
+    )
+    ordered = {addr: result[addr] for addr in dict.fromkeys(addrs)}
+    if format == "columnar":
+        return Response(encode_columnar_multi(ordered, gap_rows), media_type="application/json")
+    if format == "binary":
+        return Response(encode_binary(ordered, gap_rows), media_type=BINARY_MEDIA_TYPE)
+    return MultiHistoryResponse(
+        series=[
+            HistorySeries(
+                addr=addr,
+                points=[HistoryPoint(**p) for p in series["points"]],
+                first_data_at=series["first_data_at"],
+                resolution_secs=series["resolution_secs"],
+            )
+            for addr, series in ordered.items()
+        ],
+        gaps=[GapZone(**g) for g in gap_rows],
+    )
+
+
 @router.get("/journal", response_model=JournalResponse)
 async def get_journal(
     router_sn: str = Query(...),
@@ -68,21 +143,24 @@ async def get_journal(
 ):
     """Журнал состояний (все discrete/enum регистры оборудования).
 
-    Имя и text берутся из register_catalog через SQL JOIN.
+    Имя и text берутся из кэша register_catalog.
     """
     enforce_router_scope(ctx, router_sn)
     result = await fetch_journal(pool, router_sn, equip_type, panel_id, limit=limit)
+    decoders = await register_catalog.decoders(pool, equip_type)
     events = []
     for e in result["events"]:
+        decoder = decoders.get(e["addr"])
+        value = e.get("value")
         # label_ru — русский, label — английский, fallback → str(value)
-        text = e.get("label_ru") or e.get("label") or (
-            str(e["value"]) if e.get("value") is not None else None
+        text = (decoder.label(value) if decoder else None) or (
+            str(value) if value is not None else None
         )
         events.append(JournalEvent(
             ts=e["state_start"],
             addr=e["addr"],
-            name=e.get("name"),
-            name_en=e.get("name_en"),
+            name=decoder.name if decoder else None,
+            name_en=decoder.name_en if decoder else None,
             raw=e.get("value"),
             text=text,
             state_end=e.get("state_end"),
@@ -18,6 +18,7 @@ from app.auth import AuthContext, enforce_router_scope, require_auth
 from app.db.queries.notifications import fetch_notifications
 from app.deps import get_pool
 from app.schemas.notifications import NotificationOut
+from app.services.catalog import register_catalog
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
 
@@ -41,16 +42,19 @@ async def get_notifications(
     """
     enforce_router_scope(ctx, router_sn)
     rows = await fetch_notifications(pool, router_sn, equip_type, panel_id, mode=mode)
-    return [
-        NotificationOut(
+    decoders = await register_catalog.decoders(pool, equip_type)
+    results = []
+    for r in rows:
+        decoder = decoders.get(r["addr"])
+        name, name_ru, severity = decoder.bit(r["bit"]) if decoder else (None, None, None)
+        results.append(NotificationOut(
             addr=r["addr"],
             bit=r["bit"],
-            fault_name=r["fault_name_en"],
-            fault_description=r["fault_name_ru"],
-            severity=r["severity"],
+            fault_name=name,
+            fault_description=name_ru,
+            severity=severity,
             fault_start=r["fault_start"],
             fault_end=r["fault_end"],
             duration_seconds=r["duration_seconds"],
-        )
-        for r in rows
-    ]
+        ))
+    return results
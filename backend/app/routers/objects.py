@@ -9,7 +9,6 @@
 
 from __future__ import annotations
 
-import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
 
@@ -17,8 +16,7 @@ import asyncpg
 from fastapi import APIRouter, Depends, HTTPException
 
 from app.auth import AuthContext, require_admin, require_auth
-from app.config import Settings, get_settings
-from app.db.queries.equipment import fetch_equipment_by_object
+from app.config import Settings, TelemetryConfig, get_settings
 from app.db.queries.objects import (
     check_object_last_activity,
     delete_object_cascade,
@@ -28,7 +26,9 @@ from app.db.queries.objects import (
     fetch_power_totals_single,
     update_object_name,
 )
-from app.deps import get_pool
+from app.deps import get_hub, get_pool
+from app.mqtt.hub import TelemetryHub
+from app.mqtt.ipc import OP_DROP_ROUTER, apply_control, ingest_control
 from app.schemas.objects import ObjectNameUpdate, ObjectOut
 from app.services.telemetry import derive_connection_status
 
@@ -40,27 +40,16 @@ router = APIRouter(prefix="/api/objects", tags=["objects"])
 DELETE_QUIET_MINUTES = 30
 
 
-def _aggregate_connection_status(statuses: list[str]) -> str:
-    """Агрегированный статус связи объекта по его оборудованию."""
-    if not statuses:
-        return "OFFLINE"
-    if any(s == "ONLINE" for s in statuses):
-        return "ONLINE"
-    if any(s == "DELAY" for s in statuses):
-        return "DELAY"
-    return "OFFLINE"
+def _object_status(row: dict, telemetry: TelemetryConfig) -> str:
+    """Статус объекта = связь по last_seen_at самого свежего оборудования.
 
-
-async def _calc_object_status(
-    pool: asyncpg.Pool, router_sn: str, timeout: int,
-) -> str:
-    """Статус объекта = наличие связи по last_seen_at любого оборудования."""
-    equips = await fetch_equipment_by_object(pool, router_sn)
-    statuses = [
-        derive_connection_status(eq.get("last_seen_at"), timeout)
-        for eq in equips
-    ]
-    return _aggregate_connection_status(statuses)
+    Хоть одна единица ONLINE — объект ONLINE, иначе DELAY, иначе OFFLINE
+    (нет оборудования — OFFLINE); last_activity = MAX(last_seen_at) приходит
+    вместе со строкой объекта, отдельных запросов на объект нет.
+    """
+    return derive_connection_status(
+        row.get("last_activity"), telemetry.offline_timeout_sec, telemetry.offline_multiplier,
+    )
 
 
 @router.get("", response_model=list[ObjectOut])
@@ -80,9 +69,7 @@ async def list_objects(
 
     results = []
     for row in rows:
-        status = await _calc_object_status(
-            pool, row["router_sn"], settings.telemetry.offline_timeout_sec,
-        )
+        status = _object_status(row, settings.telemetry)
         pw = power_map.get(row["router_sn"], {})
         results.append(ObjectOut(
             router_sn=row["router_sn"],
@@ -116,10 +103,8 @@ async def get_object(
         raise HTTPException(status_code=404, detail="Object not found")
 
     kr = settings.telemetry.key_registers
-    status, pw = await asyncio.gather(
-        _calc_object_status(pool, router_sn, settings.telemetry.offline_timeout_sec),
-        fetch_power_totals_single(pool, router_sn, kr.installed_power, kr.current_load),
-    )
+    status = _object_status(row, settings.telemetry)
+    pw = await fetch_power_totals_single(pool, router_sn, kr.installed_power, kr.current_load)
     return ObjectOut(
         router_sn=row["router_sn"],
         name=row.get("name"),
@@ -152,6 +137,7 @@ async def rename_object(
 async def delete_object(
     router_sn: str,
     pool: asyncpg.Pool = Depends(get_pool),
+    hub: TelemetryHub = Depends(get_hub),
     ctx: AuthContext = Depends(require_admin),
 ):
     """Полное каскадное удаление объекта и всех его данных.
@@ -183,8 +169,13 @@ async def delete_object(
     if summary is None:
         raise HTTPException(status_code=404, detail="Object not found")
 
+    # Кэш хаба больше не должен отдавать удалённый объект в snapshot — ни в
+    # этом воркере, ни в остальных (ingest.mode=ipc)
+    apply_control(hub, {"op": OP_DROP_ROUTER, "router_sn": router_sn})
+    all_workers = ingest_control.broadcast(OP_DROP_ROUTER, router_sn=router_sn)
+
     logger.info(
         "Объект %s удалён администратором (IP: %s), итого: %s",
         router_sn, ctx.client_ip, summary,
     )
-    return {"deleted": summary}
+    return {"deleted": summary, "all_workers": all_workers}
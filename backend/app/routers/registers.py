@@ -10,13 +10,15 @@
 from __future__ import annotations
 
 import asyncpg
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 
 from app.auth import AuthContext, enforce_router_scope, require_auth
-from app.db.queries.registers import fetch_registers
-from app.deps import get_pool
+from app.deps import get_hub, get_pool
+from app.mqtt.hub import TelemetryHub
 from app.schemas.registers import RegisterOut
-from app.services.enrichment import enrich_from_catalog_row
+from app.services.catalog import register_catalog
+from app.services.enrichment import enrich_rows
+from app.services.latest import latest_registers
 
 router = APIRouter(prefix="/api/registers", tags=["registers"])
 
@@ -29,9 +31,14 @@ async def get_registers(
     router_sn: str,
     equip_type: str,
     panel_id: int,
+    response: Response,
     pool: asyncpg.Pool = Depends(get_pool),
+    hub: TelemetryHub = Depends(get_hub),
     ctx: AuthContext = Depends(require_auth),
 ):
     enforce_router_scope(ctx, router_sn)
-    rows = await fetch_registers(pool, router_sn, equip_type, panel_id)
-    return [RegisterOut(**enrich_from_catalog_row(r)) for r in rows]
+    # Оборудование на связи — значения из хаба, иначе из latest_state
+    rows, source = await latest_registers(pool, hub, router_sn, equip_type, panel_id)
+    response.headers["X-Data-Source"] = source
+    decoders = await register_catalog.decoders(pool, equip_type)
+    return [RegisterOut(**r) for r in enrich_rows(rows, decoders)]
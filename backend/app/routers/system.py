@@ -12,10 +12,15 @@ from __future__ import annotations
 
 import asyncpg
 from fastapi import APIRouter, Depends, Request
+from fastapi.responses import PlainTextResponse
 
 from app.auth import AuthContext, require_admin, require_auth
 from app.config import APP_VERSION, get_settings
 from app.deps import get_pool
+from app.mqtt.ipc import OP_CATALOG_RELOAD, ingest_control
+from app.services.catalog import register_catalog
+from app.services.history_cache import first_data_cache, history_cache
+from app.services.metrics import ingest_stats, render_prometheus, ws_summary
 from app.services.updater import (
     check_for_updates,
     get_current_version,
@@ -92,12 +97,15 @@ async def diagnostics(
     except Exception as exc:
         db_error = str(exc)
 
-    # 3. TelemetryHub — сколько устройств в кэше
+    # 3. TelemetryHub — сколько устройств в кэше, его память и стоимость рассылки
     hub = request.app.state.hub
-    hub_cache_size = len(hub.cache)
+    hub_cache_size = hub.device_count()
 
     return {
         "catalog": catalog_stats,
+        "catalog_cache": register_catalog.stats(),
+        "history_cache": history_cache.stats(),
+        "first_data_cache": first_data_cache.stats(),
         "db": {
             "ok": db_ok,
             "latest_state_rows": db_row_count,
@@ -105,5 +113,36 @@ async def diagnostics(
         },
         "hub": {
             "cached_devices": hub_cache_size,
+            "fanout": hub.stats.as_dict(),
+            "state": hub.memory_stats(),
+            "recent_history": hub.recent.stats(),
         },
+        "ingest": ingest_stats.as_dict(),
+        "ws": ws_summary(hub),
     }
+
+
+@router.post("/catalog/reload")
+async def reload_catalog(
+    pool: asyncpg.Pool = Depends(get_pool),
+    ctx: AuthContext = Depends(require_admin),
+):
+    """Перечитать register_catalog сразу (после загрузки справочников), не дожидаясь TTL.
+
+    Остальные воркеры (ingest.mode=ipc) перечитают его при следующем обращении;
+    all_workers=false — ingest недоступен, обновлён только этот воркер.
+    """
+    await register_catalog.refresh(pool)
+    return {
+        **register_catalog.stats(),
+        "all_workers": ingest_control.broadcast(OP_CATALOG_RELOAD),
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request, ctx: AuthContext = Depends(require_auth)):
+    """Метрики ingest / хаба / WebSocket в формате Prometheus (для scrape)."""
+    return PlainTextResponse(
+        render_prometheus(request.app.state.hub),
+        media_type="text/plain; version=0.0.4",
+    )
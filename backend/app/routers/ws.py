@@ -11,23 +11,37 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
+from itertools import groupby
+from typing import Literal
 
 from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
 
-from app.auth import COOKIE_NAME, get_ws_auth_context
+from app.auth import COOKIE_NAME, AuthContext, get_ws_auth_context
 from app.config import get_settings
-from app.mqtt.hub import TelemetryHub
+from app.mqtt import packed
+from app.mqtt.hub import Frame, TelemetryHub, encode_batch, encode_json, encode_snapshot
+from app.mqtt.mailbox import Mailbox
+from app.schemas.ws import WsCommand
 from app.services.access_log import log_access
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+JSON_SUBPROTOCOL = "cg.json.v1"
+
 
 @router.websocket("/ws")
 async def websocket_endpoint(
     websocket: WebSocket,
     token: str = Query(""),
     subscribe: str | None = Query(None),
+    idle: bool = Query(False),
+    mode: Literal["full", "delta"] = Query("full"),
+    max_rate: float | None = Query(None, gt=0, le=100),
+    batch_ms: int | None = Query(None, ge=10, le=1000),
+    enrich: bool = Query(False),
 ):
     settings = get_settings()
 
@@ -43,15 +57,25 @@ async def websocket_endpoint(
         await websocket.close(code=4001, reason="Unauthorized")
         return
 
-    await websocket.accept()
+    # Субпротокол: cg.bin.v1 — бинарная упаковка телеметрии, иначе JSON (по умолчанию).
+    # Если клиент предложил протоколы, сервер обязан выбрать один из них.
+    offered = websocket.scope.get("subprotocols") or []
+    binary = packed.SUBPROTOCOL in offered
+    if binary:
+        await websocket.accept(subprotocol=packed.SUBPROTOCOL)
+    elif JSON_SUBPROTOCOL in offered:
+        await websocket.accept(subprotocol=JSON_SUBPROTOCOL)
+    else:
+        await websocket.accept()
     hub: TelemetryHub = websocket.app.state.hub
 
     # Scope: если viewer с ограниченным scope — подписываем только на его объект
     effective_subscribe = subscribe
     if ctx.allowed_router_sns is not None:
         if subscribe is None:
-            # Viewer с scope=site подписывается только на свой объект
-            if len(ctx.allowed_router_sns) == 1:
+            # idle — стартуем без подписок, scope проверяется на каждой команде;
+            # иначе viewer с scope=site подписывается только на свой объект
+            if not idle and len(ctx.allowed_router_sns) == 1:
                 effective_subscribe = next(iter(ctx.allowed_router_sns))
         elif subscribe not in ctx.allowed_router_sns:
             # Пытается подписаться на чужой объект
@@ -64,35 +88,55 @@ async def websocket_endpoint(
             await websocket.close(code=4003, reason="Access denied to this object")
             return
 
-    queue = hub.subscribe(router_sn=effective_subscribe)
+    # Начальная подписка: subscribe — один объект, idle — ничего (клиент подпишется
+    # командами), иначе — все объекты.
+    if effective_subscribe is not None:
+        routers: set[str] | None = {effective_subscribe}
+    elif idle:
+        routers = set()
+    else:
+        routers = None
+
+    # Mailbox: свежая телеметрия затирает неотправленную по тому же оборудованию;
+    # max_rate — клиент просит не больше N кадров в секунду (мобильные, share-ссылки)
+    mailbox = hub.subscribe(
+        routers=routers,
+        allowed_sns=ctx.allowed_router_sns,
+        delta=mode == "delta",
+        binary=binary,
+        enriched=enrich,
+        max_rate=max_rate,
+    )
+    mailbox.stats.label = f"{ctx.role}@{ctx.client_ip}"
     log_access(
         action="ws_connect", role=ctx.role,
         scope=f"subscribe={effective_subscribe}",
         client_ip=ctx.client_ip, result="ok",
-        detail=f"method={ctx.method}",
+        detail=(
+            f"method={ctx.method} idle={idle} mode={mode} binary={binary} enrich={enrich} "
+            f"max_rate={max_rate} batch_ms={batch_ms}"
+        ),
     )
 
     try:
-        # Сразу отправляем snapshot из кэша — клиент не ждёт новый MQTT пакет
-        snapshot = hub.get_snapshot(router_sn=effective_subscribe)
-
-        # Scope filtering для snapshot (global subscribe)
-        if ctx.allowed_router_sns is not None and effective_subscribe is None:
-            snapshot = [
-                msg for msg in snapshot
-                if msg.get("router_sn") in ctx.allowed_router_sns
-            ]
+        # Сразу отправляем snapshot из кэша — клиент не ждёт новый MQTT пакет.
+        # В delta-режиме snapshot — база, к которой применяются telemetry_delta.
+        if routers == set():
+            snapshot = []
+        elif ctx.allowed_router_sns is not None and effective_subscribe is None:
+            # Scope filtering для snapshot (global subscribe)
+            snapshot = [frame for _, _, frame in hub.iter_cache(ctx.allowed_router_sns)]
+        else:
+            snapshot = hub.get_snapshot(router_sn=effective_subscribe)
+        if routers is None:
+            # Подписчики на все объекты получают и сводки объектов
+            snapshot += hub.summary_frames(ctx.allowed_router_sns)
 
         if snapshot:
-            await websocket.send_json({
-                "type": "snapshot",
-                "items": snapshot,
-            })
+            await _send_snapshot(websocket, mailbox, snapshot)
 
-        send_task = asyncio.create_task(
-            _ws_sender(websocket, queue, ctx.allowed_router_sns)
-        )
-        recv_task = asyncio.create_task(_ws_receiver(websocket))
+        send_task = asyncio.create_task(_ws_sender(websocket, mailbox, batch_ms))
+        recv_task = asyncio.create_task(_ws_receiver(websocket, hub, mailbox, ctx))
         done, pending = await asyncio.wait(
             {send_task, recv_task},
             return_when=asyncio.FIRST_COMPLETED,
@@ -104,26 +148,166 @@ async def websocket_endpoint(
     except Exception as exc:
         logger.warning("WS error: %s", exc)
     finally:
-        hub.unsubscribe(queue, router_sn=effective_subscribe)
+        hub.unsubscribe(mailbox)
         logger.info("WS disconnected, role=%s subscribe=%s", ctx.role, effective_subscribe)
 
 
+def _snapshot_messages(frames: list[Frame], mailbox: Mailbox) -> list[str | bytes]:
+    """Snapshot: в cg.bin.v1 телеметрия уходит одним бинарным кадром, остальное — JSON
+    (enrich=1 — всё JSON: упаковка не несёт text / faults)."""
+    messages: list[str | bytes] = []
+    if mailbox.binary and not mailbox.enriched:
+        records = [f.binary for f in frames if f.binary is not None]
+        frames = [f for f in frames if f.binary is None]
+        if records:
+            messages.append(packed.pack_frame(records))
+    if frames:
+        messages.append(encode_snapshot(frames, enriched=mailbox.enriched))
+    return messages
+
+
+async def _send_snapshot(websocket: WebSocket, mailbox: Mailbox, frames: list[Frame]) -> None:
+    for message in _snapshot_messages(frames, mailbox):
+        await _send_message(websocket, mailbox, message)
+
+
+async def _send_message(websocket: WebSocket, mailbox: Mailbox, message: str | bytes) -> None:
+    """Отправить готовое сообщение и учесть его в метриках клиента."""
+    t0 = time.perf_counter()
+    if isinstance(message, bytes):
+        await websocket.send_bytes(message)
+    else:
+        await websocket.send_text(message)
+    mailbox.stats.record_send(len(message), time.perf_counter() - t0)
+
+
+async def _send_items(websocket: WebSocket, mailbox: Mailbox, items: list[str | bytes]) -> None:
+    """Отправить кадры из Mailbox: подряд идущие записи cg.bin.v1 — одним
+    бинарным кадром, подряд идущий JSON — текстом (несколько — конвертом batch).
+    Порядок между группами сохраняется.
+    """
+    for is_binary, group in groupby(items, key=lambda item: isinstance(item, bytes)):
+        chunk = list(group)
+        if is_binary:
+            await _send_message(websocket, mailbox, packed.pack_frame(chunk))
+        elif len(chunk) == 1:
+            await _send_message(websocket, mailbox, chunk[0])
+        else:
+            await _send_message(websocket, mailbox, encode_batch(chunk))
+
+
 async def _ws_sender(
     websocket: WebSocket,
-    queue: asyncio.Queue,
-    allowed_sns: set[str] | None,
+    mailbox: Mailbox,
+    batch_ms: int | None = None,
 ) -> None:
-    """Отправляет сообщения клиенту с фильтрацией по scope."""
+    """Отправляет клиенту готовые кадры хаба.
+
+    JSON/cg.bin.v1 уже закодированы в хабе, scope отфильтрован в Mailbox —
+    здесь только send.
+
+    batch_ms — кадры, накопившиеся за окно после первого, уходят одним
+    {"type": "batch", "items": [...]}: меньше send() на сервере и
+    onmessage/JSON.parse в браузере при пачке пакетов от многих панелей.
+
+    Управляющие сообщения (подтверждение подписки и её snapshot) уходят
+    перед кадрами — отправка только из этой задачи, порядок сохраняется.
+    """
+    if not batch_ms:
+        while True:
+            item = await mailbox.get()
+            for message in mailbox.take_control():
+                await _send_message(websocket, mailbox, message)
+            if item is not None:
+                await _send_items(websocket, mailbox, [item])
+
+    window = batch_ms / 1000
     while True:
-        message = await queue.get()
-        # Фильтрация: если у клиента ограниченный scope
-        if allowed_sns is not None:
-            msg_sn = message.get("router_sn")
-            if msg_sn and msg_sn not in allowed_sns:
-                continue
-        await websocket.send_json(message)
+        items = await mailbox.get_batch(window)
+        for message in mailbox.take_control():
+            await _send_message(websocket, mailbox, message)
+        if items:
+            await _send_items(websocket, mailbox, items)
 
 
-async def _ws_receiver(websocket: WebSocket) -> None:
+async def _ws_receiver(
+    websocket: WebSocket,
+    hub: TelemetryHub,
+    mailbox: Mailbox,
+    ctx: AuthContext,
+) -> None:
+    """Команды подписки от клиента (WsCommand) — без переподключения сокета."""
     while True:
-        await websocket.receive_text()
+        text = await websocket.receive_text()
+        try:
+            command = WsCommand.model_validate_json(text)
+        except ValidationError:
+            mailbox.put_control(encode_json({"type": "error", "detail": "Invalid command"}))
+            continue
+        _apply_command(hub, mailbox, command, ctx)
+
+
+def _apply_command(
+    hub: TelemetryHub,
+    mailbox: Mailbox,
+    command: WsCommand,
+    ctx: AuthContext,
+) -> None:
+    """Применить команду к подписке, перестроить маршрутизацию в хабе и поставить
+    клиенту подтверждение и snapshot того, что он ещё не получал."""
+    allowed = ctx.allowed_router_sns
+    sub = mailbox.sub
+    before = sub.copy()
+
+    routers = None if command.routers == "*" else [
+        sn for sn in command.routers or () if allowed is None or sn in allowed
+    ]
+    equipment = [
+        (ref.router_sn, (ref.equip_type, ref.panel_id))
+        for ref in command.equipment or ()
+        if allowed is None or ref.router_sn in allowed
+    ]
+    denied = len(equipment) < len(command.equipment or ())
+    if isinstance(command.routers, list):
+        denied = denied or len(routers) < len(command.routers)
+    if denied:
+        log_access(
+            action="ws_subscribe", role=ctx.role,
+            client_ip=ctx.client_ip, result="denied",
+            detail="scope_violation",
+        )
+
+    if command.op == "subscribe":
+        if command.routers is not None:
+            sub.add_routers(routers)
+        sub.add_equipment(equipment)
+        if command.addrs is not None:
+            sub.addrs = None if command.addrs == "*" else frozenset(command.addrs)
+        if command.summary:
+            sub.summary = True
+    else:
+        if command.routers is not None:
+            sub.remove_routers(routers)
+        sub.remove_equipment(equipment)
+        if command.summary:
+            sub.summary = False
+
+    hub.reroute(mailbox, before.routers)
+    mailbox.prune()
+
+    # Фильтр регистров расширился — клиенту нужно полное состояние всего,
+    # на что он подписан; snapshot заменяет ожидающие кадры
+    widened = before.addrs is not None and (sub.addrs is None or not sub.addrs <= before.addrs)
+    if widened:
+        mailbox.discard_pending()
+    frames = [
+        mailbox.view(frame)
+        for router_sn, key, frame in hub.iter_cache(sub.routers)
+        if mailbox.wants(router_sn, key) and (widened or not before.wants(router_sn, key))
+    ]
+    if sub.wants_summary() and not before.wants_summary():
+        frames += hub.summary_frames(allowed)
+
+    mailbox.put_control(encode_json({"type": "subscribed", **sub.as_dict()}))
+    for message in _snapshot_messages(frames, mailbox):
+        mailbox.put_control(message)
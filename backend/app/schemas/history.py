@@ -39,6 +39,18 @@ class HistoryResponse(BaseModel):
     resolution_secs: int = 0  # фактическое разрешение ответа; 0 = сырые точки
 
 
+class HistorySeries(BaseModel):
+    addr: int
+    points: List[HistoryPoint]
+    first_data_at: Optional[datetime] = None
+    resolution_secs: int = 0
+
+
+class MultiHistoryResponse(BaseModel):
+    series: List[HistorySeries]       # в порядке addrs запроса
+    gaps: List[GapZone] = []          # разрывы связи — общие для панели
+
+
 # ── Journal (все state_events оборудования) ──────────────────────────────────
 
 class JournalEvent(BaseModel):
@@ -9,7 +9,7 @@
 
 from __future__ import annotations
 
-from typing import Any, Optional
+from typing import Any, Literal, Optional, Union
 
 from pydantic import BaseModel
 
@@ -18,3 +18,24 @@ class WsMessage(BaseModel):
     type: str
     router_sn: Optional[str] = None
     data: Optional[dict[str, Any]] = None
+
+
+class WsEquipmentRef(BaseModel):
+    router_sn: str
+    equip_type: str
+    panel_id: int
+
+
+class WsCommand(BaseModel):
+    """Команда клиента по /ws: изменить подписку без переподключения.
+
+    routers / addrs: "*" — все; equipment — отдельное оборудование объекта.
+    addrs учитывается только в subscribe и заменяет текущий фильтр регистров.
+    summary: true — (от)писаться от object_summary по всем объектам scope.
+    """
+
+    op: Literal["subscribe", "unsubscribe"]
+    routers: Union[list[str], Literal["*"], None] = None
+    equipment: Optional[list[WsEquipmentRef]] = None
+    addrs: Union[list[int], Literal["*"], None] = None
+    summary: Optional[bool] = None
@@ -0,0 +1,109 @@
+# Copyright (c) 2026 ООО «НГ-ЭНЕРГОСЕРВИС». Все права защищены.
+# Программный комплекс «Честная Генерация»
+# Модуль веб-дашборда и визуализации телеметрии
+# Автор: Саввиди Александр Анатольевич | ИНН 4725009270
+#
+# Данное программное обеспечение является конфиденциальным.
+# Несанкционированное копирование, распространение или использование
+# без письменного разрешения правообладателя запрещено.
+
+"""Процессный кэш register_catalog.
+
+Каталог меняется только при обновлении прошивок/справочников, а раньше
+присоединялся JOIN-ом и декодировался (states_json → json.loads) в каждой строке
+каждого ответа. Теперь он грузится целиком при старте и перечитывается не чаще
+раза в TTL (или сразу после POST /api/system/catalog/reload); запросы читают
+только динамические таблицы. Для обогащения метаданные каждого equip_type
+компилируются в декодеры (app.services.enrichment) один раз на загрузку каталога.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+import asyncpg
+
+from app.db.queries.registers import fetch_catalog
+from app.services.enrichment import RegisterDecoder, compile_decoders
+
+logger = logging.getLogger(__name__)
+
+# Как часто перечитывать каталог (новые equip_type появляются без перезапуска)
+_CATALOG_TTL_SEC = 300.0
+
+_EMPTY: dict[int, dict[str, Any]] = {}
+
+
+class RegisterCatalog:
+    """equip_type → addr → метаданные (name_default, name_ru, unit_default,
+    register_kind, states_json — уже декодированный). Словари общие для всех
+    запросов — не изменять."""
+
+    def __init__(self, ttl_sec: float = _CATALOG_TTL_SEC) -> None:
+        self.ttl_sec = ttl_sec
+        self._types: dict[str, dict[int, dict[str, Any]]] = {}
+        # equip_type → addr → RegisterDecoder; компилируются по первому запросу
+        self._decoders: dict[str, dict[int, RegisterDecoder]] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+        self.loads = 0
+        self.load_errors = 0
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_sec
+
+    async def refresh(self, pool: asyncpg.Pool) -> None:
+        """Перечитать каталог целиком."""
+        self._types = await fetch_catalog(pool)
+        self._decoders = {}
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+
+    async def decoders(self, pool: asyncpg.Pool, equip_type: str) -> dict[int, RegisterDecoder]:
+        """Скомпилированные декодеры регистров equip_type (перечитывает каталог, если TTL истёк)."""
+        await self._ensure(pool)
+        return self.compiled(equip_type)
+
+    def compiled(self, equip_type: str) -> dict[int, RegisterDecoder]:
+        """Декодеры из уже загруженного каталога, без обращения к БД (для хаба)."""
+        decoders = self._decoders.get(equip_type)
+        if decoders is None:
+            decoders = self._decoders[equip_type] = compile_decoders(
+                self._types.get(equip_type, _EMPTY)
+            )
+        return decoders
+
+    async def _ensure(self, pool: asyncpg.Pool) -> None:
+        if not self._fresh():
+            async with self._lock:
+                if not self._fresh():
+                    try:
+                        await self.refresh(pool)
+                    except Exception as exc:
+                        if self._loaded_at is None:
+                            raise
+                        # БД недоступна — отдаём прежний каталог до следующего TTL
+                        self.load_errors += 1
+                        self._loaded_at = time.monotonic()
+                        logger.warning("register_catalog refresh failed: %s", exc)
+
+    def invalidate(self) -> None:
+        """Перечитать каталог при следующем обращении."""
+        self._loaded_at = None
+
+    def stats(self) -> dict:
+        return {
+            "equip_types": {et: len(regs) for et, regs in sorted(self._types.items())},
+            "age_sec": (
+                None if self._loaded_at is None
+                else round(time.monotonic() - self._loaded_at, 1)
+            ),
+            "ttl_sec": self.ttl_sec,
+            "loads": self.loads,
+            "load_errors": self.load_errors,
+        }
+
+
+register_catalog = RegisterCatalog()
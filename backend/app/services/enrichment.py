@@ -9,84 +9,182 @@
 
 """Обогащение регистров метаданными из register_catalog (HTTP-слой).
 
-Использует колонки из SQL JOIN — никакого состояния в памяти.
+Метаданные каталога компилируются один раз на equip_type в RegisterDecoder
+(см. app.services.catalog): имена и единицы — готовые строки, enum — словарь
+int → подпись, fault_bitmap — таблица из 16 битов и кэш разворота raw → список
+активных битов. Обогащение строки — несколько обращений к словарям, без
+str(int(...)) ключей и цикла по 16 битам на каждый ответ.
 """
 from __future__ import annotations
 
+from typing import Any, Optional
 
-def enrich_from_catalog_row(row: dict) -> dict:
-    """Собрать обогащённый dict из строки БД с присоединёнными колонками каталога.
-
-    Ожидаемые ключи (из LEFT JOIN register_catalog):
-      addr, value, raw,
-      name_default, unit_default, register_kind, states_json  (все nullable)
-
-    states_json для enum:   {"labels_ru": {"0": "АВТО"}, "labels": {"0": "AUTO"}}
-    states_json для bitmap: {"0": {"name": "...", "name_ru": "...", "severity": "..."}}
-    """
-    addr: int = row["addr"]
-    value = row.get("value")
-    raw = row.get("raw")
-    name_en: str = row.get("name_default") or f"reg {addr}"
-    name: str = row.get("name_ru") or name_en   # русское, fallback на английское
-    unit: str = row.get("unit_default") or ""
-    states_json: dict = row.get("states_json") or {}
-
-    result: dict = {
-        "addr": addr,
-        "name": name,
-        "name_en": name_en,
-        "value": value,
-        "raw": raw,
-        "text": None,
-        "unit": unit or None,
-        "notes_ru": None,
-        "faults": None,
-    }
-
-    if unit == "enum" and value is not None:
-        key = str(int(value))
-        labels_ru: dict = states_json.get("labels_ru") or {}
-        labels: dict = states_json.get("labels") or {}
-        result["text"] = labels_ru.get(key) or labels.get(key)
-
-    elif unit == "fault_bitmap" and raw is not None:
-        faults = []
-        for bit in range(16):
-            if (int(raw) >> bit) & 1:
-                bit_info: dict = states_json.get(str(bit)) or {}
-                faults.append({
+from app.services.telemetry import is_na
+
+_FAULT_BITS = 16
+
+# Бит fault_bitmap: (name_en, name_ru, severity) — всё nullable, как в states_json
+BitInfo = tuple[Optional[str], Optional[str], Optional[str]]
+_NO_BIT: BitInfo = (None, None, None)
+
+
+def _compile_labels(states_json: dict) -> dict[int, str]:
+    """labels_ru поверх labels: значение enum → подпись."""
+    labels: dict[int, str] = {}
+    for source in (states_json.get("labels") or {}, states_json.get("labels_ru") or {}):
+        for key, label in source.items():
+            try:
+                code = int(key)
+            except (TypeError, ValueError):
+                continue
+            if label:
+                labels[code] = label
+    return labels
+
+
+def _compile_bits(states_json: dict) -> tuple[BitInfo, ...]:
+    """states_json fault_bitmap: {"<bit>": {"name", "name_ru", "severity"}} → 16 записей."""
+    bits = []
+    for bit in range(_FAULT_BITS):
+        info = states_json.get(str(bit))
+        if isinstance(info, dict):
+            bits.append((info.get("name"), info.get("name_ru"), info.get("severity")))
+        else:
+            bits.append(_NO_BIT)
+    return tuple(bits)
+
+
+class RegisterDecoder:
+    """Скомпилированные метаданные одного регистра equip_type."""
+
+    __slots__ = (
+        "addr", "name", "name_en", "unit", "enum", "labels", "bits", "_bit_faults", "_faults", "_template",
+    )
+
+    def __init__(self, addr: int, meta: dict[str, Any] | None = None) -> None:
+        meta = meta or {}
+        states_json: dict = meta.get("states_json") or {}
+        unit: str = meta.get("unit_default") or ""
+        self.addr = addr
+        self.name_en: str = meta.get("name_default") or f"reg {addr}"
+        self.name: str = meta.get("name_ru") or self.name_en   # русское, fallback на английское
+        self.unit = unit or None
+        # Подписи — у любого регистра с labels (журнал enum_history подписывает
+        # и дискретные); text в RegisterOut — только для unit == "enum"
+        self.enum = unit == "enum"
+        self.labels = _compile_labels(states_json) if states_json else None
+        # Для журнала уведомлений биты нужны у любого регистра с описанием битов
+        self.bits = _compile_bits(states_json) if states_json else None
+        # fault_bitmap: готовые FaultItem по биту и кэш raw & 0xFFFF → список
+        if unit == "fault_bitmap":
+            bits = self.bits or (_NO_BIT,) * _FAULT_BITS
+            self._bit_faults = tuple(
+                {
                     "bit": bit,
-                    "name": bit_info.get("name_ru") or bit_info.get("name") or f"bit {bit}",
-                    "severity": bit_info.get("severity", "unknown"),
-                })
-        result["faults"] = faults
-        if not states_json:
-            result["text"] = f"0x{int(raw):04X}"
-
-    return result
-
-
-def _text_from_catalog(unit: str, raw, states_json: dict) -> str | None:
-    """Вычислить текст для события журнала по метаданным каталога."""
-    if unit == "enum" and raw is not None:
-        key = str(int(raw))
-        labels_ru: dict = states_json.get("labels_ru") or {}
-        labels: dict = states_json.get("labels") or {}
-        return labels_ru.get(key) or labels.get(key)
-
-    if unit == "fault_bitmap" and raw is not None:
-        active = []
-        for bit in range(16):
-            if (int(raw) >> bit) & 1:
-                bit_info: dict = states_json.get(str(bit)) or {}
-                active.append(
-                    bit_info.get("name_ru") or bit_info.get("name") or f"bit {bit}"
-                )
-        if active:
-            return ", ".join(active)
-        if states_json:
-            return "OK"
-        return f"0x{int(raw):04X}"
-
-    return None
+                    "name": name_ru or name or f"bit {bit}",
+                    "severity": severity or "unknown",
+                }
+                for bit, (name, name_ru, severity) in enumerate(bits)
+            )
+            self._faults: dict[int, tuple[dict, ...]] | None = {}
+        else:
+            self._bit_faults = ()
+            self._faults = None
+        # Постоянная часть строки RegisterOut — копируется, а не собирается заново
+        self._template: dict = {
+            "addr": addr,
+            "name": self.name,
+            "name_en": self.name_en,
+            "value": None,
+            "raw": None,
+            "text": None,
+            "unit": self.unit,
+            "notes_ru": None,
+            "faults": None,
+        }
+
+    def label(self, value: Any) -> str | None:
+        """Подпись значения из states_json labels или None."""
+        if value is None or not self.labels:
+            return None
+        return self.labels.get(int(value))
+
+    def bit(self, bit: int) -> BitInfo:
+        """(name_en, name_ru, severity) бита fault_bitmap."""
+        if self.bits is None or not 0 <= bit < _FAULT_BITS:
+            return _NO_BIT
+        return self.bits[bit]
+
+    def faults(self, raw: int) -> list[dict]:
+        """Активные биты fault_bitmap; разворот кэшируется по raw (не больше 65536 записей)."""
+        mask = int(raw) & 0xFFFF
+        cached = self._faults.get(mask)
+        if cached is None:
+            items = []
+            m = mask
+            while m:
+                low = m & -m
+                items.append(self._bit_faults[low.bit_length() - 1])
+                m ^= low
+            cached = self._faults[mask] = tuple(items)
+        return list(cached)
+
+    def _decode(self, value: Any, raw: Any) -> tuple[str | None, list[dict] | None]:
+        """(text, faults) для значения регистра."""
+        if self.enum:
+            # NaN / нечисловые значения из MQTT подписи не имеют
+            if isinstance(value, (int, float)) and value == value:
+                return self.label(value), None
+            return None, None
+        if self._faults is not None and isinstance(raw, (int, float)):
+            text = f"0x{int(raw):04X}" if self.bits is None else None
+            return text, self.faults(raw)
+        return None, None
+
+    def enrich(self, value: Any, raw: Any) -> dict:
+        """Строка RegisterOut для текущего значения."""
+        result = self._template.copy()
+        result["value"] = value
+        result["raw"] = raw
+        result["text"], result["faults"] = self._decode(value, raw)
+        return result
+
+    def live(self, reg: dict) -> dict:
+        """Регистр MQTT-пакета + text / unit / faults / na (WS-стрим с enrich=1)."""
+        item = dict(reg)
+        item["text"], item["faults"] = self._decode(reg.get("value"), reg.get("raw"))
+        item["unit"] = self.unit
+        item["na"] = is_na(reg.get("raw"), reg.get("reason"))
+        return item
+
+
+def compile_decoders(meta: dict[int, dict[str, Any]]) -> dict[int, RegisterDecoder]:
+    """Декодеры всех регистров equip_type из строк каталога."""
+    return {addr: RegisterDecoder(addr, row) for addr, row in meta.items()}
+
+
+# Декодеры регистров без записи в каталоге (только имя "reg N"), общие для всех типов
+_PLAIN: dict[int, RegisterDecoder] = {}
+
+
+def decoder_for(decoders: dict[int, RegisterDecoder], addr: int) -> RegisterDecoder:
+    """Декодер регистра; регистра нет в каталоге — только имя "reg N"."""
+    decoder = decoders.get(addr)
+    if decoder is None:
+        decoder = _PLAIN.get(addr)
+        if decoder is None:
+            decoder = _PLAIN[addr] = RegisterDecoder(addr)
+    return decoder
+
+
+def enrich_rows(rows: list[dict], decoders: dict[int, RegisterDecoder]) -> list[dict]:
+    """Строки latest_state / хаба (addr, value, raw) → строки RegisterOut."""
+    return [decoder_for(decoders, r["addr"]).enrich(r["value"], r["raw"]) for r in rows]
+
+
+def enrich_telemetry(message: dict, decoders: dict[int, RegisterDecoder]) -> dict:
+    """telemetry / telemetry_delta с обогащёнными регистрами (исходный dict не меняется)."""
+    regs = message.get("registers")
+    if not regs:
+        return message
+    return {**message, "registers": [decoder_for(decoders, r["addr"]).live(r) for r in regs]}
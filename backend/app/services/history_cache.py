@@ -0,0 +1,360 @@
+# Copyright (c) 2026 ООО «НГ-ЭНЕРГОСЕРВИС». Все права защищены.
+# Программный комплекс «Честная Генерация»
+# Модуль веб-дашборда и визуализации телеметрии
+# Автор: Саввиди Александр Анатольевич | ИНН 4725009270
+#
+# Данное программное обеспечение является конфиденциальным.
+# Несанкционированное копирование, распространение или использование
+# без письменного разрешения правообладателя запрещено.
+
+"""Кэш истории выровненными блоками (LRU с бюджетом в байтах).
+
+Пан/зум графика и одинаковые графики у нескольких диспетчеров перезапрашивали
+почти те же окна истории целиком. Здесь запрос приводится к «круглому» бакету
+(10 с, 1 мин, 5 мин, 1 ч, …; не мельче нужного) и делится на блоки по
+BLOCK_BUCKETS бакетов, выровненные от эпохи (как и time_bucket в запросах
+истории — см. _BUCKET_ORIGIN): одно и то же время всегда попадает
+в один и тот же блок. Блок считается один раз (подряд идущие недостающие блоки —
+одним чтением) и хранится колонками в array — без словаря на точку.
+
+Блок, целиком старше live-границы (now - live_edge_sec), неизменяем и живёт
+до вытеснения; блок у живого края считается каждый раз и не хранится.
+Одновременные запросы одного блока ждут одну загрузку.
+
+FirstDataCache — first_data_at серии (самая старая точка по всем источникам):
+меняется только когда retention срезает старые чанки, а считался запросом
+по трём таблицам на каждый /api/history.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+# (router_sn, equip_type, panel_id) и (router_sn, equip_type, panel_id, addr)
+EquipRef = tuple[str, str, int]
+SeriesRef = tuple[str, str, int, int]
+
+# Бакетов в блоке: окно на 2000 точек — ~8 блоков
+BLOCK_BUCKETS = 256
+
+# «Круглые» ширины бакета, сек; крупнее суток — кратно суткам
+_NICE_BUCKETS = (
+    10, 15, 30, 60, 120, 300, 600, 900, 1_800,
+    3_600, 7_200, 10_800, 21_600, 43_200, 86_400,
+)
+
+# Ключ, словарь и объект блока — сверх массивов
+_ENTRY_OVERHEAD = 400
+
+# loader(start, end, bucket_secs, addrs) → {addr: точки [start, end) с этим бакетом}
+Loader = Callable[[datetime, datetime, int, list[int]], Awaitable[dict[int, list]]]
+
+_COLUMNS = ("value", "min_value", "max_value", "open_value", "close_value")
+
+
+def nice_bucket(target_secs: float) -> int:
+    """Наименьший «круглый» бакет не мельче target_secs."""
+    for bucket in _NICE_BUCKETS:
+        if bucket >= target_secs:
+            return bucket
+    return math.ceil(target_secs / 86_400) * 86_400
+
+
+def _num(value: Any) -> float:
+    return math.nan if value is None else float(value)
+
+
+class Block:
+    """Точки одного блока: ts (epoch начала бакета) и агрегаты — параллельные массивы."""
+
+    __slots__ = ("ts", "columns", "counts", "nbytes")
+
+    def __init__(self, rows: list) -> None:
+        self.ts = array("d", (row["ts"].timestamp() for row in rows))
+        self.columns = tuple(
+            array("d", (_num(row[name]) for row in rows)) for name in _COLUMNS
+        )
+        self.counts = array("q", (row["sample_count"] or 0 for row in rows))
+        self.nbytes = _ENTRY_OVERHEAD + sum(
+            sys.getsizeof(a) for a in (self.ts, self.counts, *self.columns)
+        )
+
+    def points(self, lo: float, hi: float) -> list[dict]:
+        """Точки с lo ≤ ts ≤ hi в формате fetch_history."""
+        result = []
+        for i, ts in enumerate(self.ts):
+            if ts < lo or ts > hi:
+                continue
+            point: dict[str, Any] = {"ts": datetime.fromtimestamp(ts, timezone.utc)}
+            for name, column in zip(_COLUMNS, self.columns):
+                v = column[i]
+                point[name] = None if v != v else v
+            point["sample_count"] = self.counts[i]
+            point["text"] = None
+            point["reason"] = None
+            result.append(point)
+        return result
+
+
+class HistoryBlockCache:
+    """LRU блоков истории: (серия, бакет, номер блока) → Block."""
+
+    def __init__(self, max_bytes: int = 0, live_edge_sec: float = 300.0) -> None:
+        self.max_bytes = max_bytes
+        self.live_edge_sec = live_edge_sec
+        self._blocks: OrderedDict[tuple, Block] = OrderedDict()
+        self._pending: dict[tuple, asyncio.Future] = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    async def read_many(
+        self,
+        equip: EquipRef,
+        addrs: list[int],
+        bucket: int,
+        start: datetime,
+        end: datetime,
+        loader: Loader,
+    ) -> dict[int, list[dict]]:
+        """Точки окна [start, end] с бакетом bucket по каждому addr панели.
+
+        Недостающие блоки всех серий читаются вместе: на каждую непрерывную
+        серию номеров блоков — один вызов loader для всех addrs, которым они нужны.
+        """
+        lo, hi = _epoch(start) - bucket, _epoch(end)
+        span = bucket * BLOCK_BUCKETS
+        first, last = math.floor((lo + 1e-9) / span), math.floor(hi / span)
+        immutable_before = math.floor((time.time() - self.live_edge_sec) / span)
+
+        blocks: dict[tuple[int, int], Block] = {}
+        waits: dict[tuple[int, int], asyncio.Future] = {}
+        missing: dict[int, list[int]] = {}
+        for addr in addrs:
+            for n in range(first, last + 1):
+                key = ((*equip, addr), bucket, n)
+                block = self._blocks.get(key)
+                if block is not None:
+                    self._blocks.move_to_end(key)
+                    blocks[addr, n] = block
+                    self.hits += 1
+                elif key in self._pending:
+                    waits[addr, n] = self._pending[key]
+                    self.hits += 1
+                else:
+                    missing.setdefault(n, []).append(addr)
+                    self.misses += 1
+
+        # Подряд идущие недостающие блоки — одним чтением на все серии
+        for run in _runs(sorted(missing)):
+            needed = {(addr, n) for n in run for addr in missing[n]}
+            blocks.update(await self._load(equip, bucket, run, needed, immutable_before, loader))
+        for (addr, n), fut in waits.items():
+            block = await fut
+            if block is None:
+                # Чужая загрузка не удалась — читаем сами
+                loaded = await self._load(
+                    equip, bucket, [n], {(addr, n)}, immutable_before, loader,
+                )
+                block = loaded[addr, n]
+            blocks[addr, n] = block
+
+        result: dict[int, list[dict]] = {}
+        for addr in addrs:
+            points = result[addr] = []
+            for n in range(first, last + 1):
+                points.extend(blocks[addr, n].points(lo + 1e-9, hi))
+        return result
+
+    async def _load(
+        self,
+        equip: EquipRef,
+        bucket: int,
+        run: list[int],
+        needed: set[tuple[int, int]],
+        immutable_before: int,
+        loader: Loader,
+    ) -> dict[tuple[int, int], Block]:
+        span = bucket * BLOCK_BUCKETS
+        loop = asyncio.get_running_loop()
+        keys = {item: ((*equip, item[0]), bucket, item[1]) for item in needed}
+        futures = {item: loop.create_future() for item in needed}
+        for item, key in keys.items():
+            self._pending[key] = futures[item]
+        try:
+            self.loads += 1
+            series = await loader(
+                datetime.fromtimestamp(run[0] * span, timezone.utc),
+                datetime.fromtimestamp((run[-1] + 1) * span, timezone.utc),
+                bucket,
+                sorted({addr for addr, _ in needed}),
+            )
+            by_block: dict[tuple[int, int], list] = {item: [] for item in needed}
+            for addr, rows in series.items():
+                for row in rows:
+                    item = (addr, math.floor(row["ts"].timestamp() / span))
+                    if item in by_block:
+                        by_block[item].append(row)
+            blocks = {item: Block(block_rows) for item, block_rows in by_block.items()}
+        except BaseException:
+            # Ожидающие этих блоков загрузят их сами
+            for fut in futures.values():
+                fut.set_result(None)
+            raise
+        finally:
+            for key in keys.values():
+                self._pending.pop(key, None)
+
+        for item, block in blocks.items():
+            futures[item].set_result(block)
+            if item[1] < immutable_before:
+                self._store(keys[item], block)
+        return blocks
+
+    def _store(self, key: tuple, block: Block) -> None:
+        if block.nbytes > self.max_bytes:
+            return
+        self._blocks[key] = block
+        self.nbytes += block.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._blocks.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+    def drop_router(self, router_sn: str) -> None:
+        """Забыть блоки объекта (объект удалён)."""
+        for key in [k for k in self._blocks if k[0][0] == router_sn]:
+            self.nbytes -= self._blocks.pop(key).nbytes
+
+    def stats(self) -> dict:
+        return {
+            "blocks": len(self._blocks),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+
+class FirstDataCache:
+    """(router_sn, equip_type, panel_id, addr) → first_data_at с TTL.
+
+    Заполняется лениво; пустой ответ (данных ещё нет) живёт короткий TTL —
+    первая точка новой серии появится на графике быстро.
+    """
+
+    def __init__(
+        self, ttl_sec: float = 3_600.0, empty_ttl_sec: float = 60.0, max_entries: int = 50_000,
+    ) -> None:
+        self.ttl_sec = ttl_sec
+        self.empty_ttl_sec = empty_ttl_sec
+        self.max_entries = max_entries
+        # series → (first_data_at, monotonic-время, до которого значение свежее)
+        self._entries: OrderedDict[SeriesRef, tuple[datetime | None, float]] = OrderedDict()
+        self._pending: dict[SeriesRef, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_many(
+        self,
+        equip: EquipRef,
+        addrs: list[int],
+        loader: Callable[[list[int]], Awaitable[dict[int, datetime | None]]],
+    ) -> dict[int, datetime | None]:
+        """first_data_at по addrs панели; устаревшие и новые — одним вызовом loader."""
+        now = time.monotonic()
+        result: dict[int, datetime | None] = {}
+        waits: dict[int, asyncio.Future] = {}
+        missing: list[int] = []
+        for addr in addrs:
+            series = (*equip, addr)
+            entry = self._entries.get(series)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(series)
+                result[addr] = entry[0]
+                self.hits += 1
+            elif series in self._pending:
+                waits[addr] = self._pending[series]
+                self.hits += 1
+            else:
+                missing.append(addr)
+                self.misses += 1
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {addr: loop.create_future() for addr in missing}
+            for addr, fut in futures.items():
+                self._pending[(*equip, addr)] = fut
+            try:
+                loaded = await loader(missing)
+            except BaseException:
+                # Ожидающие получат прежнее значение (или None) — это лишь граница пан/зума
+                for addr, fut in futures.items():
+                    entry = self._entries.get((*equip, addr))
+                    fut.set_result(entry[0] if entry is not None else None)
+                raise
+            finally:
+                for addr in missing:
+                    self._pending.pop((*equip, addr), None)
+            now = time.monotonic()
+            for addr in missing:
+                value = loaded.get(addr)
+                futures[addr].set_result(value)
+                ttl = self.ttl_sec if value is not None else self.empty_ttl_sec
+                series = (*equip, addr)
+                self._entries[series] = (value, now + ttl)
+                self._entries.move_to_end(series)
+                result[addr] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        for addr, fut in waits.items():
+            result[addr] = await fut
+        return result
+
+    def drop_router(self, router_sn: str) -> None:
+        for series in [s for s in self._entries if s[0] == router_sn]:
+            del self._entries[series]
+
+    def stats(self) -> dict:
+        return {
+            "series": len(self._entries),
+            "ttl_sec": self.ttl_sec,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _runs(blocks: list[int]) -> list[list[int]]:
+    """[3, 4, 5, 8, 9] → [[3, 4, 5], [8, 9]]."""
+    runs: list[list[int]] = []
+    for n in blocks:
+        if runs and runs[-1][-1] == n - 1:
+            runs[-1].append(n)
+        else:
+            runs.append([n])
+    return runs
+
+
+def _epoch(dt: datetime) -> float:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+history_cache = HistoryBlockCache()
+first_data_cache = FirstDataCache()
@@ -0,0 +1,129 @@
+# Copyright (c) 2026 ООО «НГ-ЭНЕРГОСЕРВИС». Все права защищены.
+# Программный комплекс «Честная Генерация»
+# Модуль веб-дашборда и визуализации телеметрии
+# Автор: Саввиди Александр Анатольевич | ИНН 4725009270
+#
+# Данное программное обеспечение является конфиденциальным.
+# Несанкционированное копирование, распространение или использование
+# без письменного разрешения правообладателя запрещено.
+
+"""Колоночный и бинарный форматы ответа истории (/api/history?format=...).
+
+JSON по умолчанию — точка за точкой через pydantic HistoryPoint: на
+points=20000 это 20k моделей по 9 полей. Здесь точки (asyncpg Record или
+dict из кэшей) сразу раскладываются в параллельные колонки:
+
+columnar — JSON {ts: [epoch ms], value: [...], min_value, max_value,
+           open_value, close_value, sample_count} (null — нет значения);
+binary   — cg.hist.v1, все числа little-endian, смещения колонок кратны 8 —
+           на клиенте это Float64Array поверх ArrayBuffer без копирования:
+
+    u8   version (= 1)
+    u8   reserved
+    u16  series_count
+    u32  gap_count
+    f64[2 × gap_count]  gap_start, gap_end (epoch ms; NaN — gap продолжается)
+    серия × series_count:
+        u32  addr
+        u32  n                  (число точек)
+        u32  resolution_secs
+        u32  reserved
+        f64  first_data_at      (epoch ms; NaN — null)
+        f64[n] ts (epoch ms), value, min_value, max_value,
+               open_value, close_value, sample_count   (NaN — null)
+
+Все колонки — f64: ts в мс и счётчики точны до 2^53, а JS не нужен BigInt.
+"""
+from __future__ import annotations
+
+import json
+import math
+import struct
+import sys
+from array import array
+from datetime import datetime
+from typing import Any, Iterable
+
+BINARY_MEDIA_TYPE = "application/vnd.cg.hist.v1"
+VERSION = 1
+
+# Колонки после ts — в этом порядке и в JSON, и в бинарном формате
+COLUMNS = ("value", "min_value", "max_value", "open_value", "close_value", "sample_count")
+
+_NAN = math.nan
+_SWAP = sys.byteorder != "little"
+
+
+def _ms(dt: datetime | None) -> float | None:
+    return None if dt is None else dt.timestamp() * 1000.0
+
+
+def columns(points: Iterable[Any]) -> dict[str, list]:
+    """Точки → параллельные колонки {ts, value, ..., sample_count} (None сохраняется)."""
+    points = list(points)
+    result: dict[str, list] = {"ts": [round(p["ts"].timestamp() * 1000) for p in points]}
+    # float(): avg по numeric приходит из asyncpg Decimal'ом
+    for name in COLUMNS[:-1]:
+        result[name] = [None if (v := p[name]) is None else float(v) for p in points]
+    result["sample_count"] = [p["sample_count"] for p in points]
+    return result
+
+
+def _gaps_json(gaps: list[dict]) -> list[dict]:
+    return [
+        {"gap_start": g["gap_start"].isoformat(), "gap_end": g["gap_end"] and g["gap_end"].isoformat()}
+        for g in gaps
+    ]
+
+
+def _series_json(series: dict[str, Any]) -> dict[str, Any]:
+    fda = series.get("first_data_at")
+    return {
+        "first_data_at": fda.isoformat() if fda is not None else None,
+        "resolution_secs": series["resolution_secs"],
+        **columns(series["points"]),
+    }
+
+
+def encode_columnar(result: dict[str, Any], gaps: list[dict]) -> bytes:
+    """Ответ /api/history в колоночном JSON."""
+    body = _series_json(result)
+    body["gaps"] = _gaps_json(gaps)
+    return json.dumps(body, separators=(",", ":")).encode()
+
+
+def encode_columnar_multi(results: dict[int, dict[str, Any]], gaps: list[dict]) -> bytes:
+    """Ответ /api/history/multi в колоночном JSON (series — в порядке results)."""
+    body = {
+        "series": [{"addr": addr, **_series_json(s)} for addr, s in results.items()],
+        "gaps": _gaps_json(gaps),
+    }
+    return json.dumps(body, separators=(",", ":")).encode()
+
+
+def _f64(values: Iterable[float | None]) -> array:
+    arr = array("d", (_NAN if v is None else v for v in values))
+    if _SWAP:
+        arr.byteswap()
+    return arr
+
+
+def encode_binary(results: dict[int, dict[str, Any]], gaps: list[dict]) -> bytes:
+    """Серии и gap'ы в cg.hist.v1 (один формат и для /api/history, и для /multi)."""
+    parts: list[bytes] = [struct.pack("<BBHI", VERSION, 0, len(results), len(gaps))]
+    gap_bounds: list[float | None] = []
+    for g in gaps:
+        gap_bounds += (_ms(g["gap_start"]), _ms(g["gap_end"]))
+    parts.append(_f64(gap_bounds).tobytes())
+
+    for addr, series in results.items():
+        cols = columns(series["points"])
+        fda = _ms(series.get("first_data_at"))
+        parts.append(struct.pack(
+            "<IIIId", addr & 0xFFFFFFFF, len(cols["ts"]), series["resolution_secs"], 0,
+            _NAN if fda is None else fda,
+        ))
+        parts.append(_f64(cols["ts"]).tobytes())
+        for name in COLUMNS:
+            parts.append(_f64(cols[name]).tobytes())
+    return b"".join(parts)
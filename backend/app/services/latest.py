@@ -0,0 +1,149 @@
+# Copyright (c) 2026 ООО «НГ-ЭНЕРГОСЕРВИС». Все права защищены.
+# Программный комплекс «Честная Генерация»
+# Модуль веб-дашборда и визуализации телеметрии
+# Автор: Саввиди Александр Анатольевич | ИНН 4725009270
+#
+# Данное программное обеспечение является конфиденциальным.
+# Несанкционированное копирование, распространение или использование
+# без письменного разрешения правообладателя запрещено.
+
+"""Последние значения регистров: из хаба, если оборудование на связи, иначе из latest_state.
+
+Хаб держит то же, что пишет в latest_state ingest, но без запроса к БД;
+оборудование, молчащее дольше offline_timeout (или не виденное с запуска), читается
+из БД. Хаб знает только регистры, пришедшие с запуска процесса (после рестарта
+пакеты могут нести часть регистров), поэтому первое чтение оборудования идёт в БД
+и запоминает её набор регистров (EquipmentState.db_addrs): пока хаб его не
+покрыл или хранит нечисловое значение, строки БД дополняются значениями хаба.
+Вызывающий получает источник ("hub" / "db" / "mixed") — для заголовка X-Data-Source.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+import asyncpg
+
+from app.config import KeyRegisters
+from app.db.queries.equipment import fetch_key_metrics
+from app.db.queries.registers import fetch_registers
+from app.mqtt.hub import TelemetryHub
+from app.mqtt.state import EquipmentState
+
+SOURCE_HUB = "hub"
+SOURCE_DB = "db"
+SOURCE_MIXED = "mixed"
+
+
+def _fresh_state(
+    hub: TelemetryHub, router_sn: str, equip_type: str, panel_id: int,
+) -> EquipmentState | None:
+    """Состояние из хаба, если телеметрия свежая (ONLINE), иначе None."""
+    state = hub.get_state(router_sn, equip_type, panel_id)
+    if state is None or not state.last_seen or state.conn_status != "ONLINE":
+        return None
+    return state
+
+
+def _covers_db(
+    state: EquipmentState, addrs: Iterable[int], scope: frozenset[int] | None = None,
+) -> bool:
+    """Хаб знает всё, что было в latest_state при первом чтении (None — ещё не
+    читали); scope — проверять только эти адреса."""
+    known = state.db_addrs
+    if known is None:
+        return False
+    if scope is not None:
+        known = known & scope
+    return known <= set(addrs)
+
+
+def _row(reg: dict) -> dict[str, Any] | None:
+    """Регистр хаба как строка latest_state; None — так не представить
+    (строка, raw не int): значение берётся из БД."""
+    value, raw = reg["value"], reg["raw"]
+    if value is not None and not isinstance(value, (int, float)):
+        return None
+    if raw is not None and not isinstance(raw, int):
+        return None
+    return {"addr": reg["addr"], "value": value, "raw": raw}
+
+
+async def latest_registers(
+    pool: asyncpg.Pool,
+    hub: TelemetryHub,
+    router_sn: str,
+    equip_type: str,
+    panel_id: int,
+) -> tuple[list[dict[str, Any]], str]:
+    """Строки как у fetch_registers (addr, value, raw по порядку addr) и источник."""
+    state = _fresh_state(hub, router_sn, equip_type, panel_id)
+    if state is None:
+        return await fetch_registers(pool, router_sn, equip_type, panel_id), SOURCE_DB
+
+    regs = state.registers()
+    hub_rows = {row["addr"]: row for row in map(_row, regs) if row is not None}
+    exact = len(hub_rows) == len(regs)
+    if exact and _covers_db(state, hub_rows):
+        return [hub_rows[addr] for addr in sorted(hub_rows)], SOURCE_HUB
+
+    # Хаб знает не всё — строки БД, поверх них свежие значения хаба
+    db_rows = await fetch_registers(pool, router_sn, equip_type, panel_id)
+    state.db_addrs = frozenset(row["addr"] for row in db_rows)
+    merged = {row["addr"]: row for row in db_rows}
+    merged.update(hub_rows)
+    source = SOURCE_HUB if exact and _covers_db(state, hub_rows) else SOURCE_MIXED
+    return [merged[addr] for addr in sorted(merged)], source
+
+
+async def latest_key_metrics(
+    pool: asyncpg.Pool,
+    hub: TelemetryHub,
+    equips: list[dict[str, Any]],
+    key_regs: KeyRegisters,
+) -> tuple[dict[tuple[str, str, int], dict[int, dict[str, Any]]], set[str]]:
+    """Ключевые метрики оборудования: (router_sn, equip_type, panel_id) → addr → строка.
+
+    Оборудование на связи читается из хаба; молчащее — одним запросом
+    fetch_key_metrics по всем его объектам. Если хаб может знать не все
+    ключевые регистры (см. _covers_db), его значения ложатся поверх строк
+    того же запроса. Второе значение — множество источников.
+    """
+    addrs = key_regs.addrs()
+    scope = frozenset(addrs)
+    result: dict[tuple[str, str, int], dict[int, dict[str, Any]]] = {}
+    stale: list[tuple[str, str, int]] = []
+    partial: dict[tuple[str, str, int], dict[int, dict[str, Any]]] = {}
+    for eq in equips:
+        key = (eq["router_sn"], eq["equip_type"], eq["panel_id"])
+        state = _fresh_state(hub, *key)
+        if state is None:
+            stale.append(key)
+            continue
+        regs = [reg for reg in map(state.get, addrs) if reg is not None]
+        rows = {row["addr"]: row for row in map(_row, regs) if row is not None}
+        if len(rows) == len(regs) and _covers_db(state, rows, scope):
+            result[key] = rows
+        else:
+            partial[key] = rows
+
+    sources = {SOURCE_HUB} if result else set()
+    if stale or partial:
+        router_sns = sorted({key[0] for key in (*stale, *partial)})
+        db_metrics = await fetch_key_metrics(pool, router_sns, key_regs)
+        for key in stale:
+            result[key] = db_metrics.get(key, {})
+        for key, rows in partial.items():
+            result[key] = {**db_metrics.get(key, {}), **rows}
+        if stale:
+            sources.add(SOURCE_DB)
+        if partial:
+            sources.add(SOURCE_MIXED)
+    return result, sources
+
+
+def combine_sources(sources: set[str]) -> str:
+    """Источник ответа из нескольких чтений: hub / db / mixed."""
+    if len(sources) == 1:
+        return next(iter(sources))
+    return SOURCE_MIXED if sources else SOURCE_HUB
@@ -0,0 +1,260 @@
+# Copyright (c) 2026 ООО «НГ-ЭНЕРГОСЕРВИС». Все права защищены.
+# Программный комплекс «Честная Генерация»
+# Модуль веб-дашборда и визуализации телеметрии
+# Автор: Саввиди Александр Анатольевич | ИНН 4725009270
+#
+# Данное программное обеспечение является конфиденциальным.
+# Несанкционированное копирование, распространение или использование
+# без письменного разрешения правообладателя запрещено.
+
+"""Метрики рассылки телеметрии: MQTT-ingest, хаб, WebSocket-клиенты.
+
+Счётчики процесса (ingest_stats, ws_stats) плюс статистика каждого
+подписчика (SubscriberStats на Mailbox). Отдаются в /api/system/diagnostics
+(JSON, со списком самых медленных клиентов) и /api/system/metrics
+(текстовый формат Prometheus, только агрегаты — без меток на клиента).
+"""
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.mqtt.hub import TelemetryHub
+
+# Границы корзин времени отправки в WebSocket, секунды
+SEND_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class RateMeter:
+    """Скорость событий за последние WINDOW секунд (посекундные корзины)."""
+
+    WINDOW = 60
+
+    __slots__ = ("_counts", "_stamps")
+
+    def __init__(self) -> None:
+        self._counts = [0] * self.WINDOW
+        self._stamps = [0] * self.WINDOW
+
+    def mark(self, n: int = 1) -> None:
+        sec = int(time.monotonic())
+        i = sec % self.WINDOW
+        if self._stamps[i] != sec:
+            self._stamps[i] = sec
+            self._counts[i] = 0
+        self._counts[i] += n
+
+    def rate(self) -> float:
+        now = int(time.monotonic())
+        total = sum(c for c, s in zip(self._counts, self._stamps) if now - s < self.WINDOW)
+        return total / self.WINDOW
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (как histogram в Prometheus)."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...] = SEND_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # последняя — +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Оценка квантиля сверху — граница корзины, в которую он попал."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum / self.count * 1000, 3) if self.count else None,
+            "p50_ms": _ms(self.quantile(0.5)),
+            "p99_ms": _ms(self.quantile(0.99)),
+        }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+@dataclass
+class IngestStats:
+    """Входящий поток телеметрии (MQTT или IPC от ingest-процесса)."""
+
+    messages: int = 0
+    bytes: int = 0
+    parse_errors: int = 0
+    last_message_at: float | None = None
+    message_rate: RateMeter = field(default_factory=RateMeter)
+    byte_rate: RateMeter = field(default_factory=RateMeter)
+
+    def record(self, size: int) -> None:
+        self.messages += 1
+        self.bytes += size
+        self.last_message_at = time.time()
+        self.message_rate.mark()
+        self.byte_rate.mark(size)
+
+    def as_dict(self) -> dict:
+        return {
+            "messages": self.messages,
+            "bytes": self.bytes,
+            "parse_errors": self.parse_errors,
+            "messages_per_sec": round(self.message_rate.rate(), 2),
+            "bytes_per_sec": round(self.byte_rate.rate(), 1),
+            "last_message_age_sec": (
+                round(time.time() - self.last_message_at, 1)
+                if self.last_message_at is not None else None
+            ),
+        }
+
+
+@dataclass
+class WsStats:
+    """Отправка во все WebSocket-соединения процесса."""
+
+    sent: int = 0
+    sent_bytes: int = 0
+    # Кадры, затёртые более свежими в Mailbox уже закрытых соединений
+    closed_coalesced: int = 0
+    message_rate: RateMeter = field(default_factory=RateMeter)
+    byte_rate: RateMeter = field(default_factory=RateMeter)
+    send_latency: Histogram = field(default_factory=Histogram)
+
+
+ingest_stats = IngestStats()
+ws_stats = WsStats()
+
+
+class SubscriberStats:
+    """Статистика одного WS-клиента (живёт на его Mailbox)."""
+
+    __slots__ = ("label", "connected_at", "sent", "sent_bytes", "send_latency")
+
+    def __init__(self, label: str = "") -> None:
+        self.label = label
+        self.connected_at = time.monotonic()
+        self.sent = 0
+        self.sent_bytes = 0
+        self.send_latency = Histogram()
+
+    def record_send(self, size: int, seconds: float) -> None:
+        """Учесть отправленное сообщение (size — символы JSON или байты cg.bin.v1)."""
+        self.sent += 1
+        self.sent_bytes += size
+        self.send_latency.observe(seconds)
+        ws_stats.sent += 1
+        ws_stats.sent_bytes += size
+        ws_stats.message_rate.mark()
+        ws_stats.byte_rate.mark(size)
+        ws_stats.send_latency.observe(seconds)
+
+
+# Сколько самых медленных клиентов показывать в диагностике
+SLOWEST_CLIENTS = 5
+
+
+def ws_summary(hub: TelemetryHub) -> dict:
+    """Агрегаты по WS-клиентам и самые медленные из них (для диагностики)."""
+    mailboxes = hub.mailboxes()
+    clients = []
+    for mailbox in mailboxes:
+        st = mailbox.stats
+        age = max(time.monotonic() - st.connected_at, 1.0)
+        clients.append({
+            "client": st.label,
+            "queue_depth": mailbox.qsize(),
+            "coalesced": mailbox.coalesced,
+            "sent": st.sent,
+            "messages_per_sec": round(st.sent / age, 2),
+            "bytes_per_sec": round(st.sent_bytes / age, 1),
+            "connected_sec": int(age),
+            **{f"send_{k}": v for k, v in st.send_latency.as_dict().items() if k != "count"},
+        })
+    clients.sort(
+        key=lambda c: (c["send_p99_ms"] or 0, c["queue_depth"]), reverse=True,
+    )
+    depths = [c["queue_depth"] for c in clients]
+    return {
+        "connections": len(mailboxes),
+        "sent": ws_stats.sent,
+        "sent_bytes": ws_stats.sent_bytes,
+        "messages_per_sec": round(ws_stats.message_rate.rate(), 2),
+        "bytes_per_sec": round(ws_stats.byte_rate.rate(), 1),
+        "queue_depth_total": sum(depths),
+        "queue_depth_max": max(depths, default=0),
+        "coalesced": ws_stats.closed_coalesced + sum(c["coalesced"] for c in clients),
+        "send_latency": ws_stats.send_latency.as_dict(),
+        "slowest_clients": clients[:SLOWEST_CLIENTS],
+    }
+
+
+def render_prometheus(hub: TelemetryHub) -> str:
+    """Метрики процесса в текстовом формате Prometheus (0.0.4)."""
+    lines: list[str] = []
+
+    def metric(name: str, kind: str, value: float, help_text: str) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+
+    metric("cg_ingest_messages_total", "counter", ingest_stats.messages,
+           "Telemetry messages received (MQTT or IPC)")
+    metric("cg_ingest_bytes_total", "counter", ingest_stats.bytes,
+           "Telemetry payload bytes received")
+    metric("cg_ingest_parse_errors_total", "counter", ingest_stats.parse_errors,
+           "Telemetry messages rejected as malformed")
+
+    hub_stats = hub.stats
+    metric("cg_hub_published_total", "counter", hub_stats.published,
+           "Messages published into the hub")
+    metric("cg_hub_deliveries_total", "counter", hub_stats.deliveries,
+           "Frames put into subscriber mailboxes")
+    metric("cg_hub_cached_devices", "gauge", hub.device_count(),
+           "Equipment with cached state")
+    metric("cg_hub_state_bytes", "gauge", hub.memory_stats()["state_bytes"],
+           "Memory of compact register state")
+
+    mailboxes = hub.mailboxes()
+    depths = [m.qsize() for m in mailboxes]
+    metric("cg_ws_connections", "gauge", len(mailboxes), "Open WebSocket subscribers")
+    metric("cg_ws_queue_depth", "gauge", sum(depths), "Frames pending in all mailboxes")
+    metric("cg_ws_queue_depth_max", "gauge", max(depths, default=0),
+           "Frames pending in the most backed-up mailbox")
+    metric("cg_ws_coalesced_total", "counter",
+           ws_stats.closed_coalesced + sum(m.coalesced for m in mailboxes),
+           "Frames replaced by newer ones before sending")
+    metric("cg_ws_sent_messages_total", "counter", ws_stats.sent, "WebSocket messages sent")
+    metric("cg_ws_sent_bytes_total", "counter", ws_stats.sent_bytes,
+           "WebSocket payload size sent (JSON chars / binary bytes)")
+
+    hist = ws_stats.send_latency
+    name = "cg_ws_send_seconds"
+    lines.append(f"# HELP {name} Time spent in a single WebSocket send")
+    lines.append(f"# TYPE {name} histogram")
+    cumulative = 0
+    for bound, n in zip(hist.bounds, hist.counts):
+        cumulative += n
+        lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{le="+Inf"}} {hist.count}')
+    lines.append(f"{name}_sum {hist.sum}")
+    lines.append(f"{name}_count {hist.count}")
+
+    return "\n".join(lines) + "\n"
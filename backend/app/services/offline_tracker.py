@@ -7,52 +7,45 @@
 # Несанкционированное копирование, распространение или использование
 # без письменного разрешения правообладателя запрещено.
 
-"""Background task: detect MQTT silence and emit OFFLINE status events.
-
-Шлёт OFFLINE только при переходе (ONLINE → OFFLINE), а не каждые 30 секунд.
+"""Background task: detect MQTT silence and emit DELAY / OFFLINE status events.
+
+Вместо периодического обхода всего кэша — куча дедлайнов в хабе
+(TelemetryHub.expire): задача спит до ближайшего дедлайна, но не дольше
+секунды, поэтому переход шлётся не позже чем через ~1 с после срока.
+Статус шлётся только при переходе; ONLINE клиент выставляет сам по телеметрии.
+DELAY — после telemetry.offline_timeout_sec тишины, OFFLINE — после
+offline_timeout_sec * offline_multiplier (при 1 DELAY не шлётся).
 """
 from __future__ import annotations
 
 import asyncio
 import logging
-from datetime import datetime, timezone
+import time
 
 from app.mqtt.hub import TelemetryHub
 
 logger = logging.getLogger(__name__)
 
-# Храним последний отправленный статус по ключу оборудования
-_emitted_offline: set[tuple[str, str, int]] = set()
+# Максимальный сон: новый дедлайн может оказаться раньше текущего ближайшего
+_MAX_SLEEP_SEC = 1.0
 
 
-async def offline_tracker(hub: TelemetryHub, timeout_sec: int) -> None:
+async def offline_tracker(hub: TelemetryHub) -> None:
     while True:
-        await asyncio.sleep(30)
-        now = datetime.now(timezone.utc)
-
-        for (router_sn, equip_type, panel_id), last_ts in hub.last_seen.items():
-            key = (router_sn, equip_type, panel_id)
-
-            if last_ts.tzinfo is None:
-                last_ts = last_ts.replace(tzinfo=timezone.utc)
-
-            age = (now - last_ts).total_seconds()
-
-            if age > timeout_sec:
-                # Шлём OFFLINE только если ещё не отправляли
-                if key not in _emitted_offline:
-                    _emitted_offline.add(key)
-                    await hub.publish(router_sn, {
-                        "type": "status_change",
-                        "router_sn": router_sn,
-                        "equip_type": equip_type,
-                        "panel_id": panel_id,
-                        "status": "OFFLINE",
-                    })
-                    logger.info(
-                        "OFFLINE: %s/%s/%s (молчит %ds)",
-                        router_sn, equip_type, panel_id, int(age),
-                    )
-            else:
-                # Оборудование снова на связи — сбрасываем флаг
-                _emitted_offline.discard(key)
+        now = time.monotonic()
+        for state in hub.expire(now):
+            await hub.publish(state.router_sn, {
+                "type": "status_change",
+                "router_sn": state.router_sn,
+                "equip_type": state.equip_type,
+                "panel_id": state.panel_id,
+                "status": state.conn_status,
+            })
+            logger.info(
+                "%s: %s/%s/%s (молчит %ds)", state.conn_status,
+                state.router_sn, state.equip_type, state.panel_id, int(now - state.last_seen),
+            )
+
+        deadline = hub.next_deadline()
+        delay = _MAX_SLEEP_SEC if deadline is None else deadline - time.monotonic()
+        await asyncio.sleep(min(max(delay, 0.0), _MAX_SLEEP_SEC))
@@ -39,12 +39,13 @@ def is_na(raw: int | None, reason: str | None) -> bool:
 def derive_connection_status(
     last_seen: datetime | None,
     offline_timeout_sec: int,
+    offline_multiplier: float = 2.0,
 ) -> str:
     """Определяет статус связи по last_seen_at (любые данные).
 
     ONLINE  — данные свежие (< offline_timeout)
-    DELAY   — данные устаревают (< 2 * offline_timeout)
-    OFFLINE — данных нет или сильно устарели (> 2 * offline_timeout)
+    DELAY   — данные устаревают (< offline_multiplier * offline_timeout)
+    OFFLINE — данных нет или сильно устарели (> offline_multiplier * offline_timeout)
     """
     if last_seen is None:
         return "OFFLINE"
@@ -56,7 +57,7 @@ def derive_connection_status(
     age = (now - last_seen).total_seconds()
     if age <= offline_timeout_sec:
         return "ONLINE"
-    if age <= offline_timeout_sec * 2:
+    if age <= offline_timeout_sec * offline_multiplier:
         return "DELAY"
     return "OFFLINE"
 
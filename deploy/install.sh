@@ -297,6 +297,8 @@ fi
 step "8. Systemd сервис (автозапуск при ребуте)"
 # =============================================================
 cp "$INSTALL_DIR/deploy/cg-dashboard.service" /etc/systemd/system/
+# Ingest-процесс нужен только для ingest.mode: ipc (несколько воркеров) — не включаем
+cp "$INSTALL_DIR/deploy/cg-dashboard-ingest.service" /etc/systemd/system/
 systemctl daemon-reload
 systemctl enable cg-dashboard
 info "cg-dashboard.service — enabled (стартует при ребуте)"
@@ -16,8 +16,9 @@ import { ShieldX } from "lucide-react";
 import Header from "@/components/layout/Header";
 import PageTransition from "@/components/layout/PageTransition";
 import { ThemeProvider } from "@/hooks/use-theme";
-import { AuthContext, useAuthQuery } from "@/hooks/use-auth";
+import { AuthContext, useAuth, useAuthQuery } from "@/hooks/use-auth";
 import { useWebSocket } from "@/hooks/use-websocket";
+import type { WsSubscription } from "@/lib/ws";
 
 const StartPage = lazy(() => import("@/pages/StartPage"));
 const ObjectPage = lazy(() => import("@/pages/ObjectPage"));
@@ -26,6 +27,10 @@ const ShareLinksPage = lazy(() => import("@/pages/ShareLinksPage"));
 const SystemPage = lazy(() => import("@/pages/SystemPage"));
 const FaultCodesPage = lazy(() => import("@/pages/FaultCodesPage"));
 
+/** Share-ссылки открывают с мобильных по LTE — просим у сервера прореженный
+ *  стрим в бинарной упаковке (cg.bin.v1) */
+const SHARE_LINK_MAX_RATE = 2;
+
 function AppContent() {
   const location = useLocation();
   const objectMatch = matchPath("/objects/:routerSn", location.pathname);
@@ -33,9 +38,27 @@ function AppContent() {
     "/objects/:routerSn/equipment/:equipType/:panelId",
     location.pathname,
   );
-  const subscribe = equipmentMatch?.params.routerSn ?? objectMatch?.params.routerSn;
+  // Странице оборудования нужна только её панель, объекту — весь объект,
+  // стартовой — сводки объектов, остальным live-данные не нужны
+  const subscription: WsSubscription = equipmentMatch
+    ? {
+        equipment: [
+          {
+            router_sn: equipmentMatch.params.routerSn!,
+            equip_type: equipmentMatch.params.equipType!,
+            panel_id: Number(equipmentMatch.params.panelId),
+          },
+        ],
+      }
+    : objectMatch
+      ? { routers: [objectMatch.params.routerSn!] }
+      : location.pathname === "/"
+        ? { summary: true }
+        : {};
 
-  useWebSocket(subscribe);
+  const auth = useAuth();
+  const isShareLink = auth.method === "cookie";
+  useWebSocket(subscription, isShareLink ? SHARE_LINK_MAX_RATE : undefined, isShareLink);
 
   return (
     <div className="flex min-h-screen flex-col bg-background text-foreground font-sans antialiased">
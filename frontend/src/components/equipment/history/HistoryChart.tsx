@@ -13,17 +13,18 @@ import { useEffect, useLayoutEffect, useRef, useCallback } from "react";
 import uPlot from "uplot";
 import "uplot/dist/uPlot.min.css";
 import { MIN_SPAN_MS } from "./constants";
-import type { ChartPoint, ViewportRange } from "./types";
+import { EMPTY_COLUMNS } from "./utils";
+import type { SeriesColumns, ViewportRange } from "./types";
 import type { GapMs } from "@/hooks/use-chart-engine";
 
 /* ── Props ──────────────────────────────────────────────────────────────── */
 
-/** Серия графика: метаданные + точки */
+/** Серия графика: метаданные + колонки данных */
 export interface ChartSeriesInput {
   label: string;
   unit: string;
   color: string;
-  points: ChartPoint[];
+  columns: SeriesColumns;
 }
 
 interface HistoryChartProps {
@@ -61,44 +62,23 @@ function fitChartHeight(el: HTMLElement): number {
   return Math.max(CHART_MIN_H, Math.floor(window.innerHeight - top - CHART_BOTTOM_GAP));
 }
 
-/** Подготовка одной серии: ChartPoint[] → [times, values, mins, maxs] */
-function toUPlotData(
-  pts: ChartPoint[],
-  tzOffSec: number,
-): [number[], number[], number[], number[]] {
-  const len = pts.length;
-  const times = new Array<number>(len);
-  const values = new Array<number>(len);
-  const mins = new Array<number>(len);
-  const maxs = new Array<number>(len);
-
-  for (let i = 0; i < len; i++) {
-    const p = pts[i];
-    times[i] = p.ts / 1000 + tzOffSec;
-    values[i] = p.value!;
-    const hasAgg = p.sampleCount != null && p.sampleCount > 1;
-    mins[i] = hasAgg && p.minValue != null ? p.minValue : p.value!;
-    maxs[i] = hasAgg && p.maxValue != null ? p.maxValue : p.value!;
-  }
+/** Ось X uPlot: Unix ms → секунды со сдвигом часового пояса */
+function toXSeconds(ts: Float64Array, tzOffSec: number): Float64Array {
+  const xs = new Float64Array(ts.length);
+  for (let i = 0; i < ts.length; i++) xs[i] = ts[i] / 1000 + tzOffSec;
+  return xs;
+}
 
-  return [times, values, mins, maxs];
+/** Одна серия: [times, values, mins, maxs] — колонки передаются в uPlot как есть */
+function toUPlotData(c: SeriesColumns, tzOffSec: number): uPlot.AlignedData {
+  return [toXSeconds(c.ts, tzOffSec), c.value, c.min, c.max];
 }
 
 /** Мультисерийные данные: join таблиц [x, y] по общей оси времени */
-function toUPlotDataMulti(
-  seriesPts: ChartPoint[][],
-  tzOffSec: number,
-): uPlot.AlignedData {
-  const tables: uPlot.AlignedData[] = seriesPts.map((pts) => {
-    const xs = new Array<number>(pts.length);
-    const ys = new Array<number>(pts.length);
-    for (let i = 0; i < pts.length; i++) {
-      xs[i] = pts[i].ts / 1000 + tzOffSec;
-      ys[i] = pts[i].value!;
-    }
-    return [xs, ys] as uPlot.AlignedData;
-  });
-  return uPlot.join(tables);
+function toUPlotDataMulti(series: SeriesColumns[], tzOffSec: number): uPlot.AlignedData {
+  return uPlot.join(
+    series.map((c) => [toXSeconds(c.ts, tzOffSec), c.value] as uPlot.AlignedData),
+  );
 }
 
 /** Подпись значения по величине */
@@ -126,7 +106,7 @@ export function HistoryChart({
 }: HistoryChartProps) {
   const containerRef = useRef<HTMLDivElement>(null);
   const chartRef = useRef<uPlot | null>(null);
-  const prevPointsRef = useRef<ChartPoint[][] | null>(null);
+  const prevPointsRef = useRef<SeriesColumns[] | null>(null);
   const appliedVpRef = useRef<ViewportRange>(viewport);
   const viewportPropRef = useRef(viewport);
   viewportPropRef.current = viewport;
@@ -155,7 +135,7 @@ export function HistoryChart({
   const suppressRef = useRef(false);
   // Drag состояние
   const isDraggingRef = useRef(false);
-  const pendingDataRef = useRef<ChartPoint[][] | null>(null);
+  const pendingDataRef = useRef<SeriesColumns[] | null>(null);
 
   // Сигнатура конфигурации: смена состава серий пересоздаёт график
   const seriesSig = series
@@ -164,20 +144,20 @@ export function HistoryChart({
 
   /* ── Применение данных к графику ─────────────────────────────────────── */
   const applyDataToChart = useCallback(
-    (ptsArr: ChartPoint[][]) => {
+    (ptsArr: SeriesColumns[]) => {
       const u = chartRef.current;
       if (!u) return;
 
       prevPointsRef.current = ptsArr;
 
       const uData = singleRef.current
-        ? toUPlotData(ptsArr[0] ?? [], tzOffRef.current)
+        ? toUPlotData(ptsArr[0] ?? EMPTY_COLUMNS, tzOffRef.current)
         : toUPlotDataMulti(ptsArr, tzOffRef.current);
 
       // suppressRef предотвращает лишние pan-события при пересчёте масштабов
       suppressRef.current = true;
       // true → пересчитать ВСЕ оси (включая Y). Без этого Y остаётся 0–1.
-      u.setData(uData as uPlot.AlignedData, true);
+      u.setData(uData, true);
       // Затем переопределяем X нашим viewport (Y остаётся авто)
       const vp = appliedVpRef.current;
       u.setScale("x", {
@@ -273,20 +253,19 @@ export function HistoryChart({
       const { left, top, width, height } = u.bbox;
       const dpr = devicePixelRatio || 1;
 
-      const pts = prevPointsRef.current?.[0];
-      if (!pts || pts.length === 0) return;
+      const cols = prevPointsRef.current?.[0];
+      if (!cols || cols.ts.length === 0) return;
 
       ctx.save();
       ctx.fillStyle = colorRef.current;
 
-      for (const p of pts) {
-        if (p.value == null) continue;
+      for (let i = 0; i < cols.ts.length; i++) {
         // Кружочки — только реальные измерения; усреднённые бакеты рисуются линией
-        if ((p.sampleCount ?? 1) > 1) continue;
-        const tSec = p.ts / 1000 + tzOffRef.current;
+        if (cols.count[i] > 1) continue;
+        const tSec = cols.ts[i] / 1000 + tzOffRef.current;
         // CSS→buffer пиксели + bbox offset (как в drawDayBands)
         const x = left + u.valToPos(tSec, "x", false) * dpr;
-        const y = top + u.valToPos(p.value!, s.scale!, false) * dpr;
+        const y = top + u.valToPos(cols.value[i], s.scale!, false) * dpr;
         if (x < left || x > left + width || y < top || y > top + height) continue;
 
         ctx.beginPath();
@@ -775,7 +754,7 @@ export function HistoryChart({
   useEffect(() => {
     if (!chartRef.current) return;
 
-    const ptsArr = series.map((s) => s.points);
+    const ptsArr = series.map((s) => s.columns);
     const prev = prevPointsRef.current;
     const same =
       prev != null &&
@@ -18,6 +18,7 @@ import { useChartEngine } from "@/hooks/use-chart-engine";
 import { useChartSettings, DEFAULT_REGISTERS } from "@/hooks/use-chart-settings";
 import { HistoryChart, type ChartSeriesInput } from "./HistoryChart";
 import { MIN_SPAN_MS } from "./constants";
+import { EMPTY_COLUMNS } from "./utils";
 
 /**
  * Запрос параметра извне (клик по панели ДГУ); seq — для повторных кликов.
@@ -123,12 +124,12 @@ export default function HistoryTab({ routerSn, equipType, panelId, chartRequest
         label: d.label,
         unit: d.unit,
         color: d.color,
-        points: engine.series[i] ?? [],
+        columns: engine.series[i] ?? EMPTY_COLUMNS,
       })),
     [seriesDefs, engine.series],
   );
 
-  const hasData = engine.series.some((pts) => pts.some((p) => p.value !== null));
+  const hasData = engine.series.some((c) => c.ts.length > 0);
 
   // Уровень зума: 0 = максимальное приближение (MIN_SPAN_MS), +1 за каждый шаг отдаления
   const span = engine.viewport.to - engine.viewport.from;
@@ -16,12 +16,16 @@ export interface ViewportRange {
   to: number;   // Unix ms
 }
 
-export interface ChartPoint {
-  ts: number;           // Unix ms
-  value: number | null;
-  minValue?: number | null;
-  maxValue?: number | null;
-  sampleCount?: number;
+/** Серия графика в колонках — в таком виде её принимает uPlot (без объекта на точку).
+ *  Отсортирована по ts, value без NaN. */
+export interface SeriesColumns {
+  ts: Float64Array;     // Unix ms
+  value: Float64Array;
+  /** Полоса min–max: у одиночных измерений (count ≤ 1) равна value */
+  min: Float64Array;
+  max: Float64Array;
+  /** sample_count бакета; 1 — реальное измерение */
+  count: Float64Array;
 }
 
 /* ── API types ──────────────────────────────────────────────────────────── */
@@ -50,3 +54,19 @@ export interface HistoryResponse {
   /** Фактическое разрешение ответа в секундах; 0 = сырые точки */
   resolution_secs?: number;
 }
+
+/** /api/history/multi — несколько регистров панели одним запросом */
+export interface HistorySeries {
+  addr: number;
+  points: HistoryPoint[];
+  first_data_at: string | null;
+  /** Фактическое разрешение ответа в секундах; 0 = сырые точки */
+  resolution_secs?: number;
+}
+
+export interface MultiHistoryResponse {
+  /** В порядке addrs запроса */
+  series: HistorySeries[];
+  /** Разрывы связи — общие для панели */
+  gaps: GapZone[];
+}
@@ -9,7 +9,7 @@
  * без письменного разрешения правообладателя запрещено.
  */
 
-import type { ChartPoint, HistoryPoint } from "./types";
+import type { SeriesColumns } from "./types";
 
 /* ── Примитивы ──────────────────────────────────────────────────────────── */
 
@@ -51,58 +51,199 @@ export function requiredResolutionSecs(spanMs: number): number {
   return spanMs / 1000 / calcTargetPoints(spanMs);
 }
 
-/* ── Конвертация API → ChartPoint[] ─────────────────────────────────────── */
-
-export function buildChartData(points: HistoryPoint[]): ChartPoint[] {
-  return points
-    .filter(
-      (p) =>
-        p.ts != null &&
-        p.value != null &&
-        p.reason?.toUpperCase().includes("NA") !== true,
-    )
-    .map((p) => ({
-      ts: parseIsoToMs(p.ts!),
-      value: p.value!,
-      minValue: p.min_value,
-      maxValue: p.max_value,
-      sampleCount: p.sample_count ?? 1,
-    }))
-    .filter((p) => isFiniteNumber(p.ts) && isFiniteNumber(p.value as number))
-    .sort((a, b) => a.ts - b.ts);
+/* ── Бинарный ответ истории (cg.hist.v1, format=binary) ─────────────────── */
+
+/** Одна серия cg.hist.v1: колонки — Float64Array поверх буфера (без копирования), NaN = null */
+export interface HistoryBinarySeries {
+  addr: number;
+  resolutionSecs: number;
+  firstDataAt: number | null;
+  ts: Float64Array;
+  value: Float64Array;
+  minValue: Float64Array;
+  maxValue: Float64Array;
+  openValue: Float64Array;
+  closeValue: Float64Array;
+  sampleCount: Float64Array;
 }
 
-/* ── Merge двух отсортированных массивов точек ──────────────────────────── */
+export interface HistoryBinary {
+  series: HistoryBinarySeries[];
+  /** Gap-зоны в Unix ms; to = null — разрыв продолжается */
+  gaps: { from: number; to: number | null }[];
+}
+
+/** Разбор cg.hist.v1 (см. backend/app/services/history_format.py). */
+export function decodeHistoryBinary(buf: ArrayBuffer): HistoryBinary {
+  const view = new DataView(buf);
+  const version = view.getUint8(0);
+  if (version !== 1) throw new Error(`cg.hist: unsupported version ${version}`);
+  const seriesCount = view.getUint16(2, true);
+  const gapCount = view.getUint32(4, true);
+  let off = 8;
+
+  const gaps: HistoryBinary["gaps"] = [];
+  for (let i = 0; i < gapCount; i++, off += 16) {
+    const to = view.getFloat64(off + 8, true);
+    gaps.push({ from: view.getFloat64(off, true), to: Number.isNaN(to) ? null : to });
+  }
+
+  const series: HistoryBinarySeries[] = [];
+  for (let s = 0; s < seriesCount; s++) {
+    const addr = view.getUint32(off, true);
+    const n = view.getUint32(off + 4, true);
+    const resolutionSecs = view.getUint32(off + 8, true);
+    const fda = view.getFloat64(off + 16, true);
+    off += 24;
+    const col = () => {
+      const arr = new Float64Array(buf, off, n);
+      off += n * 8;
+      return arr;
+    };
+    series.push({
+      addr,
+      resolutionSecs,
+      firstDataAt: Number.isNaN(fda) ? null : fda,
+      ts: col(),
+      value: col(),
+      minValue: col(),
+      maxValue: col(),
+      openValue: col(),
+      closeValue: col(),
+      sampleCount: col(),
+    });
+  }
+  return { series, gaps };
+}
+
+/* ── Колонки графика ────────────────────────────────────────────────────── */
+
+export const EMPTY_COLUMNS: SeriesColumns = {
+  ts: new Float64Array(0),
+  value: new Float64Array(0),
+  min: new Float64Array(0),
+  max: new Float64Array(0),
+  count: new Float64Array(0),
+};
+
+/**
+ * Серия cg.hist.v1 → колонки графика. ts и value берутся из буфера как есть
+ * (точки без ts/value отбрасываются — только тогда колонки копируются),
+ * проходом по типизированным массивам считается полоса min/max.
+ */
+export function seriesColumns(s: HistoryBinarySeries): SeriesColumns {
+  let { ts, value, minValue, maxValue, sampleCount } = s;
+  let n = ts.length;
+
+  let keep = 0;
+  for (let i = 0; i < n; i++) {
+    if (Number.isFinite(ts[i]) && Number.isFinite(value[i])) keep++;
+  }
+  if (keep !== n) {
+    const pick = (src: Float64Array) => {
+      const out = new Float64Array(keep);
+      for (let i = 0, j = 0; i < n; i++) {
+        if (Number.isFinite(ts[i]) && Number.isFinite(value[i])) out[j++] = src[i];
+      }
+      return out;
+    };
+    [minValue, maxValue, sampleCount] = [pick(minValue), pick(maxValue), pick(sampleCount)];
+    [ts, value] = [pick(ts), pick(value)];
+    n = keep;
+  }
+
+  const min = new Float64Array(n);
+  const max = new Float64Array(n);
+  const count = new Float64Array(n);
+  for (let i = 0; i < n; i++) {
+    const c = Number.isNaN(sampleCount[i]) ? 1 : sampleCount[i];
+    const agg = c > 1;
+    count[i] = c;
+    min[i] = agg && !Number.isNaN(minValue[i]) ? minValue[i] : value[i];
+    max[i] = agg && !Number.isNaN(maxValue[i]) ? maxValue[i] : value[i];
+  }
+  return { ts, value, min, max, count };
+}
+
+/** Одно живое измерение из WS */
+export function liveColumns(ts: number, value: number): SeriesColumns {
+  const v = Float64Array.of(value);
+  return { ts: Float64Array.of(ts), value: v, min: v, max: v, count: Float64Array.of(1) };
+}
+
+const COLUMN_KEYS = ["ts", "value", "min", "max", "count"] as const;
+
+function concatColumns(a: SeriesColumns, b: SeriesColumns): SeriesColumns {
+  const n = a.ts.length;
+  const out = {} as SeriesColumns;
+  for (const k of COLUMN_KEYS) {
+    const col = new Float64Array(n + b.ts.length);
+    col.set(a[k]);
+    col.set(b[k], n);
+    out[k] = col;
+  }
+  return out;
+}
 
 /**
- * Объединяет два отсортированных по ts массива ChartPoint[].
+ * Объединяет две отсортированные по ts серии.
  * При дубликатах по ts берём точку от последнего запроса (b).
+ * Частые случаи (подгрузка с края, live-точка в конец) — склейка без сравнения.
  */
-export function mergePoints(a: ChartPoint[], b: ChartPoint[]): ChartPoint[] {
-  const result: ChartPoint[] = [];
+export function mergeColumns(a: SeriesColumns, b: SeriesColumns): SeriesColumns {
+  const na = a.ts.length;
+  const nb = b.ts.length;
+  if (na === 0) return b;
+  if (nb === 0) return a;
+  if (a.ts[na - 1] < b.ts[0]) return concatColumns(a, b);
+  if (b.ts[nb - 1] < a.ts[0]) return concatColumns(b, a);
+
+  const out = {} as SeriesColumns;
+  for (const k of COLUMN_KEYS) out[k] = new Float64Array(na + nb);
   let i = 0;
   let j = 0;
-
-  while (i < a.length && j < b.length) {
-    const pa = a[i];
-    const pb = b[j];
-
-    if (pa.ts < pb.ts) {
-      result.push(pa);
-      i++;
-    } else if (pa.ts > pb.ts) {
-      result.push(pb);
-      j++;
-    } else {
+  let n = 0;
+  const take = (src: SeriesColumns, idx: number) => {
+    for (const k of COLUMN_KEYS) out[k][n] = src[k][idx];
+    n++;
+  };
+  while (i < na && j < nb) {
+    const ta = a.ts[i];
+    const tb = b.ts[j];
+    if (ta < tb) take(a, i++);
+    else if (ta > tb) take(b, j++);
+    else {
       // Одинаковый ts — берём более свежую (b)
-      result.push(pb);
+      take(b, j++);
       i++;
-      j++;
     }
   }
+  while (i < na) take(a, i++);
+  while (j < nb) take(b, j++);
 
-  while (i < a.length) result.push(a[i++]);
-  while (j < b.length) result.push(b[j++]);
+  for (const k of COLUMN_KEYS) out[k] = out[k].subarray(0, n);
+  return out;
+}
+
+/** Первый индекс с ts >= t (бинарный поиск) */
+function lowerBound(ts: Float64Array, t: number): number {
+  let lo = 0;
+  let hi = ts.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (ts[mid] < t) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
 
-  return result;
+/** Точки с from <= ts <= to — view на те же буферы, без копирования */
+export function sliceColumns(c: SeriesColumns, from: number, to: number): SeriesColumns {
+  const lo = lowerBound(c.ts, from);
+  let hi = lowerBound(c.ts, to);
+  if (hi < c.ts.length && c.ts[hi] === to) hi++;
+  if (lo === 0 && hi === c.ts.length) return c;
+  const out = {} as SeriesColumns;
+  for (const k of COLUMN_KEYS) out[k] = c[k].subarray(lo, hi);
+  return out;
 }
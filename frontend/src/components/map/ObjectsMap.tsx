@@ -21,6 +21,7 @@ import type { MapRef } from "react-map-gl/maplibre";
 import "maplibre-gl/dist/maplibre-gl.css";
 import "./objects-map.css";
 import type { ObjectOut } from "@/hooks/use-objects";
+import type { EquipmentOut } from "@/hooks/use-equipment";
 import { useTheme } from "@/hooks/use-theme";
 import DguMarker from "./DguMarker";
 import { Skeleton } from "@/components/ui/skeleton";
@@ -34,12 +35,25 @@ import ObjectsMapPopup from "./ObjectsMapPopup";
 import MapProviderSwitcher from "./MapProviderSwitcher";
 import DiveOverlay from "./DiveOverlay";
 
+/** Статус маркера: объект на связи — по двигателям его установок
+ *  (авария > работа > стоп), иначе — статус связи объекта */
+function markerStatus(obj: ObjectOut, gensets: EquipmentOut[] | undefined): string {
+  if (obj.status !== "ONLINE" || !gensets?.length) return obj.status;
+  const states = new Set(gensets.map((eq) => eq.engine_state));
+  if (states.has("ALARM")) return "ALARM";
+  if (states.has("RUN")) return "RUN";
+  if (states.has("STOP")) return "STOP";
+  return obj.status;
+}
+
 // ---------------------------------------------------------------------------
 // Компонент карты
 // ---------------------------------------------------------------------------
 
 interface Props {
   objects: ObjectOut[];
+  /** Оборудование по router_sn (один запрос /api/equipment на весь парк) */
+  equipment?: Map<string, EquipmentOut[]>;
   isLoading: boolean;
   focusedSn?: string | null;
   onFocusChange?: (sn: string | null) => void;
@@ -49,6 +63,7 @@ interface Props {
 
 export default function ObjectsMap({
   objects,
+  equipment,
   isLoading,
   focusedSn,
   onFocusChange,
@@ -116,12 +131,12 @@ export default function ObjectsMap({
           anchor="center"
         >
           <DguMarker
-            status={obj.status}
+            status={markerStatus(obj, equipment?.get(obj.router_sn))}
             onClick={() => handleMarkerClick(obj)}
           />
         </Marker>
       )),
-    [geoObjects, handleMarkerClick],
+    [geoObjects, equipment, handleMarkerClick],
   );
 
   // Фокусировка карты на объектах
@@ -10,7 +10,7 @@
  */
 
 import { useCallback, useEffect, useRef, useState } from "react";
-import { apiFetch } from "@/lib/api";
+import { apiFetchBuffer } from "@/lib/api";
 import { useTelemetryStore, makeEquipKey } from "@/stores/telemetry-store";
 import {
   CACHE_TRIM_SCREENS,
@@ -24,18 +24,20 @@ import {
   ZOOM_SPEED,
 } from "@/components/equipment/history/constants";
 import {
-  buildChartData,
   calcTargetPoints,
   clamp,
+  decodeHistoryBinary,
+  EMPTY_COLUMNS,
   isFiniteNumber,
-  mergePoints,
+  liveColumns,
+  mergeColumns,
   parseIsoToMs,
   requiredResolutionSecs,
+  seriesColumns,
+  sliceColumns,
 } from "@/components/equipment/history/utils";
 import type {
-  ChartPoint,
-  GapZone,
-  HistoryResponse,
+  SeriesColumns,
   ViewportRange,
 } from "@/components/equipment/history/types";
 
@@ -48,8 +50,8 @@ export interface GapMs {
 }
 
 interface DataCache {
-  /** Точки по каждому регистру (порядок = addrs) */
-  series: ChartPoint[][];
+  /** Колонки по каждому регистру (порядок = addrs) */
+  series: SeriesColumns[];
   gaps: GapMs[];
   /** Фактически загруженный диапазон (loadedTo не заходит дальше now + pad) */
   loadedFrom: number;
@@ -75,8 +77,8 @@ const LIVE_SHIFT_INTERVAL_MS = 60_000;
 interface UseChartEngineResult {
   /** Текущий видимый диапазон (ms) */
   viewport: ViewportRange;
-  /** Загруженные точки по каждому регистру (порядок = addrs) */
-  series: ChartPoint[][];
+  /** Загруженные колонки по каждому регистру (порядок = addrs) — прямо в uPlot */
+  series: SeriesColumns[];
   /** Gap-зоны (разрывы связи) */
   gaps: GapMs[];
   /** Загрузка в процессе */
@@ -98,85 +100,62 @@ interface UseChartEngineResult {
 
 /* ── Fetch helpers ──────────────────────────────────────────────────────── */
 
-function parseGaps(gaps: GapZone[]): GapMs[] {
-  return gaps.map((g) => ({
-    from: parseIsoToMs(g.gap_start),
-    to: g.gap_end ? parseIsoToMs(g.gap_end) : null,
-  }));
-}
-
-async function fetchRange(
+/** Все регистры за один диапазон — один запрос /api/history/multi
+ *  (на бэкенде — один SQL на источник для всех addr, gap'ы — один раз на панель).
+ *  Ответ в бинарном формате cg.hist.v1: колонки Float64 читаются прямо из буфера
+ *  и так и остаются колонками — без JSON, ISO-строк и объекта на точку */
+async function fetchRangeMulti(
   routerSn: string,
   equipType: string,
   panelId: string,
-  addr: number,
+  addrs: number[],
   from: number,
   to: number,
   points: number,
   signal?: AbortSignal,
-): Promise<{ points: ChartPoint[]; gaps: GapMs[]; firstDataAt: number | null; resolutionSecs: number } | null> {
+): Promise<{ series: SeriesColumns[]; gaps: GapMs[]; firstDataAt: number | null; resolutionSecs: number } | null> {
+  if (addrs.length === 0) return null;
   const params = new URLSearchParams({
     router_sn: routerSn,
     equip_type: equipType,
     panel_id: panelId,
-    addr: String(addr),
     start: new Date(from).toISOString(),
     end: new Date(Math.min(to, Date.now() + FUTURE_PAD_MS)).toISOString(),
     points: String(Math.min(points, MAX_POINTS_PER_REQUEST)),
+    format: "binary",
   });
+  for (const addr of addrs) params.append("addrs", String(addr));
 
+  let resp: ReturnType<typeof decodeHistoryBinary>;
   try {
-    const resp = await apiFetch<HistoryResponse>(`/api/history?${params}`, { signal });
-    const pts = buildChartData(resp.points);
-    const gaps = parseGaps(resp.gaps ?? []);
-    const fda = resp.first_data_at ? parseIsoToMs(resp.first_data_at) : null;
-    return {
-      points: pts,
-      gaps,
-      firstDataAt: isFiniteNumber(fda) ? fda : null,
-      resolutionSecs: resp.resolution_secs ?? 0,
-    };
+    const buf = await apiFetchBuffer(`/api/history/multi?${params}`, { signal });
+    resp = decodeHistoryBinary(buf);
   } catch (e: unknown) {
     if (e instanceof DOMException && e.name === "AbortError") return null;
     console.error("[chart-engine] fetch error:", e);
     return null;
   }
-}
-
-/** Параллельный fetch всех регистров за один диапазон */
-async function fetchRangeMulti(
-  routerSn: string,
-  equipType: string,
-  panelId: string,
-  addrs: number[],
-  from: number,
-  to: number,
-  points: number,
-  signal?: AbortSignal,
-): Promise<{ series: ChartPoint[][]; gaps: GapMs[]; firstDataAt: number | null; resolutionSecs: number } | null> {
-  const results = await Promise.all(
-    addrs.map((addr) =>
-      fetchRange(routerSn, equipType, panelId, addr, from, to, points, signal),
-    ),
-  );
   if (signal?.aborted) return null;
-  if (results.every((r) => r == null)) return null;
 
-  // Gap-зоны — разрывы связи, одинаковы для всех регистров панели
-  let gaps: GapMs[] = [];
-  for (const r of results) {
-    if (r) { gaps = r.gaps; break; }
-  }
+  const byAddr = new Map(resp.series.map((s) => [s.addr, s]));
   let firstDataAt: number | null = null;
   let resolutionSecs = 0;
-  for (const r of results) {
-    if (r?.firstDataAt != null) {
-      firstDataAt = firstDataAt == null ? r.firstDataAt : Math.min(firstDataAt, r.firstDataAt);
+  for (const s of resp.series) {
+    if (isFiniteNumber(s.firstDataAt)) {
+      firstDataAt = firstDataAt == null ? s.firstDataAt : Math.min(firstDataAt, s.firstDataAt);
     }
     // Разрешение по грубейшему из регистров (обычно одинаковое)
-    if (r) resolutionSecs = Math.max(resolutionSecs, r.resolutionSecs);
+    resolutionSecs = Math.max(resolutionSecs, s.resolutionSecs);
   }
-  return { series: results.map((r) => r?.points ?? []), gaps, firstDataAt, resolutionSecs };
+  return {
+    series: addrs.map((addr) => {
+      const s = byAddr.get(addr);
+      return s ? seriesColumns(s) : EMPTY_COLUMNS;
+    }),
+    gaps: resp.gaps,
+    firstDataAt,
+    resolutionSecs,
+  };
 }
 
 /* ── Hook ───────────────────────────────────────────────────────────────── */
@@ -200,11 +179,11 @@ function trimCache(cache: DataCache, vp: ViewportRange): void {
   const keepTo = vp.to + span * CACHE_TRIM_SCREENS;
 
   if (cache.loadedFrom < keepFrom - span) {
-    cache.series = cache.series.map((pts) => pts.filter((p) => p.ts >= keepFrom));
+    cache.series = cache.series.map((c) => sliceColumns(c, keepFrom, Infinity));
     cache.loadedFrom = keepFrom;
   }
   if (cache.loadedTo > keepTo + span) {
-    cache.series = cache.series.map((pts) => pts.filter((p) => p.ts <= keepTo));
+    cache.series = cache.series.map((c) => sliceColumns(c, -Infinity, keepTo));
     cache.loadedTo = keepTo;
   }
 }
@@ -222,7 +201,7 @@ export function useChartEngine({
 }: UseChartEngineOpts): UseChartEngineResult {
   /* ── state ─────────────────────────────────────────────────────────────── */
   const [viewport, setViewportRaw] = useState<ViewportRange>(makeDefaultViewport);
-  const [series, setSeries] = useState<ChartPoint[][]>(() => addrs.map(() => []));
+  const [series, setSeries] = useState<SeriesColumns[]>(() => addrs.map(() => EMPTY_COLUMNS));
   const [gaps, setGaps] = useState<GapMs[]>([]);
   const [firstDataAt, setFirstDataAt] = useState<number | null>(null);
   const [isLoading, setIsLoading] = useState(true);
@@ -233,7 +212,7 @@ export function useChartEngine({
   const timerRef = useRef<ReturnType<typeof setTimeout>>(undefined);
   const abortRef = useRef<AbortController | null>(null);
   // Live-точки из WS, пришедшие пока первичная загрузка ещё шла (кэша нет)
-  const pendingLiveRef = useRef<ChartPoint[][] | null>(null);
+  const pendingLiveRef = useRef<SeriesColumns[] | null>(null);
   // Автосдвиг viewport в live: следующий запуск data-loader'а пропускаем
   const liveShiftSkipRef = useRef(false);
   const viewportRef = useRef(viewport);
@@ -258,7 +237,7 @@ export function useChartEngine({
       cacheRef.current = null;
       pendingLiveRef.current = null;
       liveShiftSkipRef.current = false;
-      setSeries(addrsRef.current.map(() => []));
+      setSeries(addrsRef.current.map(() => EMPTY_COLUMNS));
       setGaps([]);
       setFirstDataAt(null);
       setResolutionSecs(null);
@@ -316,8 +295,7 @@ export function useChartEngine({
             const pending = pendingLiveRef.current;
             pendingLiveRef.current = null;
             const series = pending
-              ? res.series.map((pts0, i) =>
-                  pending[i]?.length ? mergePoints(pts0, pending[i]) : pts0)
+              ? res.series.map((c, i) => (pending[i] ? mergeColumns(c, pending[i]) : c))
               : res.series;
             cacheRef.current = {
               series,
@@ -354,7 +332,7 @@ export function useChartEngine({
           promise = fetchRangeMulti(routerSn, equipType, panelId, curAddrs, edgeFrom, edgeTo, edgePts, ac.signal)
             .then((res) => {
               if (!res || ac.signal.aborted) return;
-              cache.series = cache.series.map((pts, i) => mergePoints(res.series[i] ?? [], pts));
+              cache.series = cache.series.map((c, i) => mergeColumns(res.series[i] ?? EMPTY_COLUMNS, c));
               cache.gaps = mergeGaps(res.gaps, cache.gaps);
               cache.loadedFrom = edgeFrom;
               cache.resolutionSecs = Math.max(cache.resolutionSecs, res.resolutionSecs);
@@ -380,7 +358,7 @@ export function useChartEngine({
             return fetchRangeMulti(routerSn, equipType, panelId, curAddrs, edgeFrom, edgeTo, edgePts, ac.signal)
               .then((res) => {
                 if (!res || ac.signal.aborted) return;
-                cache.series = cache.series.map((pts, i) => mergePoints(pts, res.series[i] ?? []));
+                cache.series = cache.series.map((c, i) => mergeColumns(c, res.series[i] ?? EMPTY_COLUMNS));
                 cache.gaps = mergeGaps(cache.gaps, res.gaps);
                 cache.loadedTo = edgeTo;
                 cache.resolutionSecs = Math.max(cache.resolutionSecs, res.resolutionSecs);
@@ -481,7 +459,7 @@ export function useChartEngine({
     cacheRef.current = null;
     pendingLiveRef.current = null;
     liveShiftSkipRef.current = false;
-    setSeries(addrsRef.current.map(() => []));
+    setSeries(addrsRef.current.map(() => EMPTY_COLUMNS));
     setGaps([]);
     setFirstDataAt(null);
     setResolutionSecs(null);
@@ -518,37 +496,42 @@ export function useChartEngine({
       if (!regs) return;
 
       const curAddrs = addrsRef.current;
-      const newPts: (ChartPoint | null)[] = curAddrs.map((addr) => {
+      let maxTs = -Infinity;
+      const newPts: (SeriesColumns | null)[] = curAddrs.map((addr) => {
         const reg = regs.get(addr);
         if (!reg || reg.value == null) return null;
         const ts = parseLiveTs(reg.ts);
         if (ts <= (lastTsByAddr.get(addr) ?? 0)) return null;
         lastTsByAddr.set(addr, ts);
-        return { ts, value: reg.value, sampleCount: 1 };
+        maxTs = Math.max(maxTs, ts);
+        return liveColumns(ts, reg.value);
       });
       if (newPts.every((p) => p == null)) return;
 
       // Добавляем точки в кэш
       const cache = cacheRef.current;
       if (cache) {
-        cache.series = cache.series.map((pts, i) =>
-          newPts[i] ? mergePoints(pts, [newPts[i]!]) : pts,
-        );
-        const maxTs = Math.max(...newPts.filter(Boolean).map((p) => p!.ts));
+        cache.series = cache.series.map((c, i) => {
+          const p = newPts[i];
+          return p ? mergeColumns(c, p) : c;
+        });
         cache.loadedTo = Math.max(cache.loadedTo, maxTs + 1000);
       } else {
         // Первичная загрузка ещё идёт — буферизуем, data-loader вольёт
         // точки в кэш по её завершении (иначе они потеряются: lastTsByAddr
         // уже запомнил их ts и повторно из WS они не придут)
-        const buf = pendingLiveRef.current ?? curAddrs.map(() => []);
+        const buf = pendingLiveRef.current ?? curAddrs.map(() => EMPTY_COLUMNS);
         newPts.forEach((p, i) => {
-          if (p) buf[i] = mergePoints(buf[i] ?? [], [p]);
+          if (p) buf[i] = mergeColumns(buf[i] ?? EMPTY_COLUMNS, p);
         });
         pendingLiveRef.current = buf;
       }
 
       setSeries((prev) =>
-        prev.map((pts, i) => (newPts[i] ? mergePoints(pts, [newPts[i]!]) : pts)),
+        prev.map((c, i) => {
+          const p = newPts[i];
+          return p ? mergeColumns(c, p) : c;
+        }),
       );
     });
 
@@ -588,8 +571,8 @@ export function useChartEngine({
           // Кэш читаем после ответа — он мог появиться, пока шёл запрос
           const cache = cacheRef.current;
           if (cache) {
-            cache.series = cache.series.map((pts, i) =>
-              mergePoints(pts, res.series[i] ?? []),
+            cache.series = cache.series.map((c, i) =>
+              mergeColumns(c, res.series[i] ?? EMPTY_COLUMNS),
             );
             // Фактически загружено до «сейчас» (момент запроса), не до pad
             cache.loadedTo = Math.max(cache.loadedTo, now);
@@ -78,3 +78,61 @@ export function useEquipment(routerSn: string) {
     refetchInterval: 60_000, // фолбэк при отключённом WS
   });
 }
+
+const FLEET_KEY = ["equipment", "*"];
+
+/** Всё оборудование парка в пределах scope — один запрос вместо запроса на объект.
+ *
+ *  Без поллинга: список грузится один раз, дальше при смене object_summary
+ *  объекта (WS) перезапрашивается только его оборудование — не чаще раза
+ *  в 20 сек на объект — и подменяется в общем списке. */
+export function useFleetEquipment(enabled = true) {
+  const qc = useQueryClient();
+
+  useEffect(() => {
+    if (!enabled) return;
+
+    const THROTTLE_MS = 20_000;
+    // Как в useEquipment: дать cg-bd-writer записать пакет в БД
+    const WRITER_DELAY_MS = 3_000;
+    const lastFiredAt = new Map<string, number>();
+    const pending = new Map<string, ReturnType<typeof setTimeout>>();
+
+    const reload = async (routerSn: string) => {
+      pending.delete(routerSn);
+      lastFiredAt.set(routerSn, Date.now());
+      try {
+        const fresh = await apiFetch<EquipmentOut[]>(`/api/objects/${routerSn}/equipment`);
+        qc.setQueryData<EquipmentOut[]>(FLEET_KEY, (prev) =>
+          prev && [...prev.filter((eq) => eq.router_sn !== routerSn), ...fresh],
+        );
+      } catch {
+        // Следующая сводка объекта повторит запрос
+      }
+    };
+
+    const unsub = useTelemetryStore.subscribe((state, prev) => {
+      if (state.objectSummaries === prev.objectSummaries) return;
+      for (const [routerSn, summary] of state.objectSummaries) {
+        if (prev.objectSummaries.get(routerSn) === summary || pending.has(routerSn)) continue;
+        const wait = Math.max(
+          WRITER_DELAY_MS,
+          (lastFiredAt.get(routerSn) ?? 0) + THROTTLE_MS - Date.now(),
+        );
+        pending.set(routerSn, setTimeout(() => void reload(routerSn), wait));
+      }
+    });
+
+    return () => {
+      unsub();
+      for (const id of pending.values()) clearTimeout(id);
+    };
+  }, [enabled, qc]);
+
+  return useQuery({
+    queryKey: FLEET_KEY,
+    queryFn: () => apiFetch<EquipmentOut[]>("/api/equipment"),
+    enabled,
+    staleTime: Infinity,
+  });
+}
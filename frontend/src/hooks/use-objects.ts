@@ -9,8 +9,10 @@
  * без письменного разрешения правообладателя запрещено.
  */
 
+import { useEffect, useMemo, useRef } from "react";
 import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { apiFetch } from "@/lib/api";
+import { useTelemetryStore } from "@/stores/telemetry-store";
 
 export interface ObjectOut {
   router_sn: string;
@@ -26,12 +28,47 @@ export interface ObjectOut {
   total_load_kw: number | null;
 }
 
+/** Список объектов: один запрос, дальше статус и мощности обновляет
+ *  object_summary по WebSocket (подписка summary на стартовой странице). */
 export function useObjects() {
-  return useQuery({
+  const summaries = useTelemetryStore((s) => s.objectSummaries);
+  const query = useQuery({
     queryKey: ["objects"],
     queryFn: () => apiFetch<ObjectOut[]>("/api/objects"),
-    refetchInterval: 60_000,
   });
+
+  const data = useMemo(
+    () =>
+      query.data?.map((obj) => {
+        const live = summaries.get(obj.router_sn);
+        if (!live) return obj;
+        return {
+          ...obj,
+          status: live.status,
+          total_installed_power_kw: live.total_installed_power_kw,
+          total_load_kw: live.total_load_kw,
+        };
+      }),
+    [query.data, summaries],
+  );
+
+  // Сводка пришла по объекту, которого нет в списке, — объект новый
+  // (перезапрашиваем один раз на объект: удалённый может остаться в store)
+  const { data: list, refetch } = query;
+  const requested = useRef(new Set<string>());
+  useEffect(() => {
+    if (!list) return;
+    const known = new Set(list.map((obj) => obj.router_sn));
+    for (const sn of summaries.keys()) {
+      if (!known.has(sn) && !requested.current.has(sn)) {
+        requested.current.add(sn);
+        refetch();
+        return;
+      }
+    }
+  }, [list, summaries, refetch]);
+
+  return { ...query, data };
 }
 
 export function useDeleteObject() {
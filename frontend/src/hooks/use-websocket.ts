@@ -9,14 +9,20 @@
  * без письменного разрешения правообладателя запрещено.
  */
 
-import { useEffect } from "react";
+import { useEffect, useRef } from "react";
 import { getToken } from "@/lib/api";
-import { createWebSocket } from "@/lib/ws";
+import { createWebSocket, type WsSubscription } from "@/lib/ws";
 import { useTelemetryStore } from "@/stores/telemetry-store";
 
-export function useWebSocket(subscribe?: string) {
+/** Одно долгоживущее соединение: смена подписки при навигации уходит командой,
+ *  а не переподключением. */
+export function useWebSocket(subscription: WsSubscription, maxRate?: number, binary?: boolean) {
   const handleMessage = useTelemetryStore((s) => s.handleMessage);
   const setConnected = useTelemetryStore((s) => s.setConnected);
+  const wsRef = useRef<ReturnType<typeof createWebSocket> | null>(null);
+  const subscriptionRef = useRef(subscription);
+  subscriptionRef.current = subscription;
+  const subscriptionKey = JSON.stringify(subscription);
 
   useEffect(() => {
     const wsUrl =
@@ -27,11 +33,29 @@ export function useWebSocket(subscribe?: string) {
     const ws = createWebSocket({
       url: wsUrl,
       token: getToken(),
-      subscribe,
+      subscription: subscriptionRef.current,
+      // Store накапливает регистры по ключу — дельт достаточно после snapshot
+      mode: "delta",
+      maxRate,
+      // Пачка пакетов от многих панелей приходит одним кадром
+      batchMs: 100,
+      binary,
+      // Живые text / faults для вкладки регистров; cg.bin.v1 их не несёт —
+      // share-ссылкам (binary) остаются REST-метаданные
+      enrich: !binary,
       onMessage: handleMessage,
       onStatusChange: setConnected,
     });
 
-    return () => ws.close();
-  }, [subscribe, handleMessage, setConnected]);
+    wsRef.current = ws;
+
+    return () => {
+      wsRef.current = null;
+      ws.close();
+    };
+  }, [maxRate, binary, handleMessage, setConnected]);
+
+  useEffect(() => {
+    wsRef.current?.setSubscription(subscriptionRef.current);
+  }, [subscriptionKey]);
 }
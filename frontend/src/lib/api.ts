@@ -56,3 +56,26 @@ export async function apiFetch<T>(
   }
   return res.json();
 }
+
+/** Как apiFetch, но тело ответа — ArrayBuffer (бинарные форматы API). */
+export async function apiFetchBuffer(
+  path: string,
+  options?: RequestInit,
+): Promise<ArrayBuffer> {
+  const headers: Record<string, string> = {
+    ...((options?.headers as Record<string, string>) ?? {}),
+  };
+  if (_token) {
+    headers["Authorization"] = `Bearer ${_token}`;
+  }
+
+  const res = await fetch(`${API_BASE}${path}`, {
+    ...options,
+    credentials: "include",
+    headers,
+  });
+  if (!res.ok) {
+    throw new ApiError(res.status, await res.text());
+  }
+  return res.arrayBuffer();
+}
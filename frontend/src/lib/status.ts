@@ -9,6 +9,11 @@
  * без письменного разрешения правообладателя запрещено.
  */
 
+/** Статус связи оборудования / объекта (status_change, object_summary, REST):
+ *  DELAY — после telemetry.offline_timeout_sec тишины, OFFLINE — после
+ *  offline_timeout_sec × offline_multiplier (при 1 DELAY не приходит) */
+export type ConnectionStatus = "ONLINE" | "DELAY" | "OFFLINE";
+
 export type DashboardStatus =
   | "RUN"
   | "STOP"
@@ -9,33 +9,177 @@
  * без письменного разрешения правообладателя запрещено.
  */
 
+import type { ConnectionStatus } from "@/lib/status";
+
 export type TelemetryItem = {
-  type: "telemetry" | "status_change";
+  /** telemetry_delta — только изменившиеся регистры (mode=delta) */
+  type: "telemetry" | "telemetry_delta" | "status_change";
   router_sn: string;
   equip_type?: string;
   panel_id?: number;
   timestamp?: string;
-  /** Raw register values only — metadata comes from HTTP API (/api/registers) */
+  /** Raw register values; с enrich=1 — ещё text / unit / faults / na
+   *  (имена и прочие метаданные — из HTTP API /api/registers) */
   registers?: Array<{
     addr: number;
     value: number | null;
     raw: number | null;
     ts?: string | null;
+    text?: string | null;
+    unit?: string | null;
+    faults?: Array<{ bit: number; name: string; severity: string }> | null;
+    na?: boolean;
   }>;
-  status?: string;
+  /** status_change: ONLINE / DELAY / OFFLINE */
+  status?: ConnectionStatus;
 };
 
 export type SnapshotMessage = {
   type: "snapshot";
-  items: TelemetryItem[];
+  items: Array<TelemetryItem | ObjectSummaryMessage>;
+};
+
+/** Кадры, накопленные сервером за окно batch_ms, — одним сообщением */
+export type BatchMessage = {
+  type: "batch";
+  items: Array<TelemetryItem | ObjectSummaryMessage>;
+};
+
+/** Подтверждение команды подписки — текущая подписка целиком */
+export type SubscribedMessage = {
+  type: "subscribed";
+  routers: string[] | "*";
+  equipment: EquipRef[];
+  addrs: number[] | "*";
+  summary: boolean;
 };
 
-export type WsMessage = TelemetryItem | SnapshotMessage;
+/** Сводка объекта (стартовая страница) — приходит при её изменении */
+export type ObjectSummaryMessage = {
+  type: "object_summary";
+  router_sn: string;
+  status: ConnectionStatus;
+  total_installed_power_kw: number | null;
+  total_load_kw: number | null;
+};
+
+export type WsMessage =
+  | TelemetryItem
+  | ObjectSummaryMessage
+  | SnapshotMessage
+  | BatchMessage
+  | SubscribedMessage;
+
+export type EquipRef = {
+  router_sn: string;
+  equip_type: string;
+  panel_id: number;
+};
+
+/** Что нужно текущей странице: объекты целиком, отдельное оборудование,
+ *  фильтр регистров, сводки объектов. Пустая подписка — ничего
+ *  (соединение остаётся открытым). */
+export type WsSubscription = {
+  routers?: string[] | "*";
+  equipment?: EquipRef[];
+  addrs?: number[] | "*";
+  summary?: boolean;
+};
+
+function isEmptySubscription(sub: WsSubscription): boolean {
+  return !sub.routers?.length && !sub.equipment?.length && !sub.summary;
+}
+
+/* ── cg.bin.v1: бинарная упаковка телеметрии (backend/app/mqtt/packed.py) ── */
+
+export const BIN_SUBPROTOCOL = "cg.bin.v1";
+
+const KIND_DELTA = 2;
+const FLAG_RAW_F64 = 0x80;
+const RAW_NULL = -(2 ** 31);
+
+const utf8 = new TextDecoder();
+
+/** Разобрать бинарный кадр cg.bin.v1 в обычные TelemetryItem */
+export function decodePacked(buf: ArrayBuffer): TelemetryItem[] {
+  const view = new DataView(buf);
+  const bytes = new Uint8Array(buf);
+  let pos = 0;
+
+  const u8 = () => view.getUint8(pos++);
+  const str8 = () => {
+    const len = u8();
+    const s = utf8.decode(bytes.subarray(pos, pos + len));
+    pos += len;
+    return s;
+  };
+
+  pos += 1; // version
+  const count = view.getUint16(pos, true);
+  pos += 2;
+
+  const items: TelemetryItem[] = [];
+  for (let i = 0; i < count; i++) {
+    const kind = u8();
+    const router_sn = str8();
+    const equip_type = str8();
+    const panel_id = view.getUint32(pos, true);
+    pos += 4;
+    const timestamp = str8() || undefined;
+    const n = view.getUint16(pos, true);
+    pos += 2;
+
+    const addrOff = pos;
+    const valueOff = addrOff + n * 2;
+    const rawOff = valueOff + n * 8;
+    const rawF64 = (kind & FLAG_RAW_F64) !== 0;
+
+    const registers = new Array(n);
+    for (let j = 0; j < n; j++) {
+      const value = view.getFloat64(valueOff + j * 8, true);
+      let raw: number | null;
+      if (rawF64) {
+        raw = view.getFloat64(rawOff + j * 8, true);
+        if (Number.isNaN(raw)) raw = null;
+      } else {
+        raw = view.getInt32(rawOff + j * 4, true);
+        if (raw === RAW_NULL) raw = null;
+      }
+      registers[j] = {
+        addr: view.getUint16(addrOff + j * 2, true),
+        value: Number.isNaN(value) ? null : value,
+        raw,
+      };
+    }
+    pos = rawOff + n * (rawF64 ? 8 : 4);
+
+    items.push({
+      type: (kind & ~FLAG_RAW_F64) === KIND_DELTA ? "telemetry_delta" : "telemetry",
+      router_sn,
+      equip_type,
+      panel_id,
+      timestamp,
+      registers,
+    });
+  }
+  return items;
+}
 
 type WsOptions = {
   url: string;
   token: string;
-  subscribe?: string;
+  /** Начальная подписка; дальше меняется через setSubscription без переподключения */
+  subscription: WsSubscription;
+  /** delta — сервер шлёт только изменившиеся регистры после snapshot */
+  mode?: "full" | "delta";
+  /** Не больше N кадров в секунду — сервер схлопывает промежуточные обновления */
+  maxRate?: number;
+  /** Окно микробатчинга (мс): сервер склеивает кадры в один batch */
+  batchMs?: number;
+  /** Согласовать cg.bin.v1 — телеметрия приходит бинарными кадрами */
+  binary?: boolean;
+  /** Сервер обогащает телеметрию (text / unit / faults / na) — один раз на пакет */
+  enrich?: boolean;
   onMessage: (msg: WsMessage) => void;
   onStatusChange?: (connected: boolean) => void;
 };
@@ -45,23 +189,46 @@ export function createWebSocket(options: WsOptions) {
   let reconnectDelay = 1000;
   let shouldReconnect = true;
   let reconnectTimer: ReturnType<typeof setTimeout>;
+  let subscription = options.subscription;
+
+  function sendSubscription() {
+    if (ws?.readyState !== WebSocket.OPEN) return;
+    // Сервер применяет команды по порядку: сброс, затем новая подписка
+    ws.send(JSON.stringify({ op: "unsubscribe", routers: "*" }));
+    if (!isEmptySubscription(subscription)) {
+      ws.send(JSON.stringify({ op: "subscribe", ...subscription }));
+    }
+  }
 
   function connect() {
     const params = new URLSearchParams();
     if (options.token) params.set("token", options.token);
-    if (options.subscribe) params.set("subscribe", options.subscribe);
+    // Подключаемся без подписки — её задают команды (в т.ч. после реконнекта)
+    params.set("idle", "1");
+    if (options.mode) params.set("mode", options.mode);
+    if (options.maxRate) params.set("max_rate", String(options.maxRate));
+    if (options.batchMs) params.set("batch_ms", String(options.batchMs));
+    if (options.enrich) params.set("enrich", "1");
 
     const qs = params.toString();
     const url = qs ? `${options.url}?${qs}` : options.url;
-    ws = new WebSocket(url);
+    ws = options.binary ? new WebSocket(url, [BIN_SUBPROTOCOL]) : new WebSocket(url);
+    ws.binaryType = "arraybuffer";
 
     ws.onopen = () => {
       reconnectDelay = 1000;
+      if (!isEmptySubscription(subscription)) {
+        ws?.send(JSON.stringify({ op: "subscribe", ...subscription }));
+      }
       options.onStatusChange?.(true);
     };
 
     ws.onmessage = (event) => {
       try {
+        if (event.data instanceof ArrayBuffer) {
+          options.onMessage({ type: "batch", items: decodePacked(event.data) });
+          return;
+        }
         const msg = JSON.parse(event.data) as WsMessage;
         options.onMessage(msg);
       } catch {
@@ -83,6 +250,12 @@ export function createWebSocket(options: WsOptions) {
   connect();
 
   return {
+    /** Сменить подписку на том же соединении (навигация между страницами) */
+    setSubscription(next: WsSubscription) {
+      if (JSON.stringify(next) === JSON.stringify(subscription)) return;
+      subscription = next;
+      sendSubscription();
+    },
     close() {
       shouldReconnect = false;
       clearTimeout(reconnectTimer);
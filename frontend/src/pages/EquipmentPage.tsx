@@ -113,14 +113,26 @@ export default function EquipmentPage() {
     panelId!,
   );
 
-  // Merge REST registers (metadata) with live WS data (value + raw only)
+  // Merge REST registers (metadata) with live WS data
   const mergedRegisters = useMemo(() => {
     if (!registers) return [];
     return registers.map((r) => {
       const live = liveRegs?.get(r.addr);
       if (!live) return r;
-      // Keep all HTTP metadata (name, text, unit, faults, …), only update numeric fields
-      return { ...r, value: live.value, raw: live.raw, ts: live.ts, receivedAt: live.receivedAt };
+      // Keep HTTP metadata (name, notes, …); text / unit / faults — живые, если
+      // сервер обогащает стрим (enrich=1), иначе из REST
+      return {
+        ...r,
+        value: live.value,
+        raw: live.raw,
+        ts: live.ts,
+        receivedAt: live.receivedAt,
+        ...(live.text !== undefined && {
+          text: live.text,
+          unit: live.unit ?? r.unit,
+          faults: live.faults,
+        }),
+      };
     });
   }, [registers, liveRegs]);
 
@@ -9,8 +9,9 @@
  * без письменного разрешения правообладателя запрещено.
  */
 
-import { lazy, Suspense, useState } from "react";
+import { lazy, Suspense, useMemo, useState } from "react";
 import { useObjects } from "@/hooks/use-objects";
+import { useFleetEquipment, type EquipmentOut } from "@/hooks/use-equipment";
 import { Skeleton } from "@/components/ui/skeleton";
 import { ErrorBoundary } from "@/components/ui/error-boundary";
 import ObjectsTable from "@/components/objects/ObjectsTable";
@@ -19,6 +20,17 @@ const ObjectsMap = lazy(() => import("@/components/map/ObjectsMap"));
 
 export default function StartPage() {
   const { data: objects, isLoading } = useObjects();
+  // Состояние установок для маркеров карты — один запрос на весь парк
+  const { data: fleet } = useFleetEquipment();
+  const equipment = useMemo(() => {
+    const bySn = new Map<string, EquipmentOut[]>();
+    for (const eq of fleet ?? []) {
+      const list = bySn.get(eq.router_sn);
+      if (list) list.push(eq);
+      else bySn.set(eq.router_sn, [eq]);
+    }
+    return bySn;
+  }, [fleet]);
   const [focusedSn, setFocusedSn] = useState<string | null>(null);
   const [divingSn, setDivingSn] = useState<string | null>(null);
 
@@ -29,6 +41,7 @@ export default function StartPage() {
           <Suspense fallback={<Skeleton className="h-full w-full" />}>
             <ObjectsMap
               objects={objects ?? []}
+              equipment={equipment}
               isLoading={isLoading}
               focusedSn={focusedSn}
               onFocusChange={setFocusedSn}
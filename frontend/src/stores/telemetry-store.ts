@@ -10,10 +10,12 @@
  */
 
 import { create } from "zustand";
-import type { WsMessage, TelemetryItem } from "@/lib/ws";
+import type { WsMessage, TelemetryItem, ObjectSummaryMessage } from "@/lib/ws";
+import type { ConnectionStatus } from "@/lib/status";
 
-/** Live register snapshot from WebSocket — raw values only.
- *  Metadata (name, text, unit, faults) comes from the HTTP /api/registers response.
+/** Live register snapshot from WebSocket.
+ *  text / unit / faults / na — только при enrich=1 (иначе undefined);
+ *  имена и прочие метаданные — из HTTP /api/registers.
  */
 export interface RegisterValue {
   addr: number;
@@ -21,6 +23,10 @@ export interface RegisterValue {
   raw: number | null;
   ts: string | null;
   receivedAt: string;
+  text?: string | null;
+  unit?: string | null;
+  faults?: Array<{ bit: number; name: string; severity: string }> | null;
+  na?: boolean;
 }
 
 export function makeEquipKey(
@@ -33,14 +39,17 @@ export function makeEquipKey(
 
 interface TelemetryState {
   registers: Map<string, Map<number, RegisterValue>>;
-  statuses: Map<string, string>;
+  /** Статус связи по status_change; телеметрия выставляет ONLINE */
+  statuses: Map<string, ConnectionStatus>;
   lastUpdate: Map<string, number>;
   /** Drift (сек) между часами сервера и браузера, per router_sn */
   drifts: Map<string, number>;
+  /** Сводки объектов (object_summary), per router_sn — поверх /api/objects */
+  objectSummaries: Map<string, ObjectSummaryMessage>;
   connected: boolean;
 
   handleMessage: (msg: WsMessage) => void;
-  _applyTelemetryItem: (msg: TelemetryItem) => void;
+  _applyTelemetryItem: (msg: TelemetryItem | ObjectSummaryMessage) => void;
   setConnected: (c: boolean) => void;
 }
 
@@ -49,20 +58,25 @@ export const useTelemetryStore = create<TelemetryState>((set, get) => ({
   statuses: new Map(),
   lastUpdate: new Map(),
   drifts: new Map(),
+  objectSummaries: new Map(),
   connected: false,
 
   handleMessage(msg: WsMessage) {
-    if (msg.type === "snapshot" && "items" in msg) {
+    if ((msg.type === "snapshot" || msg.type === "batch") && "items" in msg) {
       for (const item of msg.items) {
         get()._applyTelemetryItem(item);
       }
       return;
     }
-    get()._applyTelemetryItem(msg as TelemetryItem);
+    get()._applyTelemetryItem(msg as TelemetryItem | ObjectSummaryMessage);
   },
 
-  _applyTelemetryItem(msg: TelemetryItem) {
-    if (msg.type === "telemetry" && msg.registers) {
+  _applyTelemetryItem(msg: TelemetryItem | ObjectSummaryMessage) {
+    if (msg.type === "object_summary") {
+      const newSummaries = new Map(get().objectSummaries);
+      newSummaries.set(msg.router_sn, msg);
+      set({ objectSummaries: newSummaries });
+    } else if ((msg.type === "telemetry" || msg.type === "telemetry_delta") && msg.registers) {
       const key = makeEquipKey(
         msg.router_sn,
         msg.equip_type || "pcc",
@@ -73,6 +87,14 @@ export const useTelemetryStore = create<TelemetryState>((set, get) => ({
       const current = get().registers;
       const regMap = new Map(current.get(key) || []);
 
+      // telemetry_delta несёт только изменившиеся регистры: остальные на момент
+      // пакета имеют прежнее значение — продлеваем им ts (live-график, «обновлено»)
+      if (msg.type === "telemetry_delta") {
+        for (const [addr, prev] of regMap) {
+          regMap.set(addr, { ...prev, ts, receivedAt });
+        }
+      }
+
       for (const r of msg.registers) {
         regMap.set(r.addr, {
           addr: r.addr,
@@ -80,6 +102,10 @@ export const useTelemetryStore = create<TelemetryState>((set, get) => ({
           raw: r.raw,
           ts: r.ts ?? ts,
           receivedAt,
+          text: r.text,
+          unit: r.unit,
+          faults: r.faults,
+          na: r.na,
         });
       }
 